@@ -0,0 +1,541 @@
+"""
+Compact Knowledge Graph
+Read-only, array-backed alternative to the NetworkX graph in KnowledgeGraph.
+
+This module handles:
+- Storing the graph as CSR adjacency in NumPy arrays (int32 node indices,
+  uint8 edge-type codes, float32 confidence)
+- Keeping node and edge properties as serialized JSON side tables
+- Answering the same queries as KnowledgeGraph (get_neighbors, traverse,
+  find_paths, get_similar_nodes, get_stats)
+
+A NetworkX edge costs several hundred bytes (attribute dict, nested
+adjacency dicts); here an edge costs roughly 30 bytes across the outgoing
+and incoming CSR arrays, which lets one worker hold the full ticket history.
+"""
+
+import logging
+from array import array
+from typing import Dict, List, Tuple, Optional, Any, Callable, Iterable, Union
+
+import numpy as np
+
+from knowledge_graph import KnowledgeGraph, encode_properties, json_loads
+
+logger = logging.getLogger(__name__)
+
+
+def _as_confidence(value: float) -> float:
+    """Round a float32 confidence back to the precision stored in MySQL."""
+    return round(value, 6)
+
+
+class _CompactGraphBuilder:
+    """Accumulates nodes and edges in flat arrays before building the CSR graph."""
+
+    def __init__(self):
+        self.node_index: Dict[str, int] = {}
+        self.node_ids: List[str] = []
+        self.node_types: Dict[Optional[str], int] = {}
+        self.node_type_codes = array('B')
+        self.node_props = bytearray()
+        self.node_props_offsets = array('q', [0])
+
+        self.edge_types: Dict[str, int] = {}
+        self.sources = array('i')
+        self.targets = array('i')
+        self.edge_type_codes = array('B')
+        self.confidence = array('f')
+        self.edge_props = bytearray()
+        self.edge_props_offsets = array('q', [0])
+
+    @staticmethod
+    def _encode(properties: Any) -> bytes:
+        encoded = encode_properties(properties)
+        return b'' if encoded == b'{}' else encoded
+
+    @staticmethod
+    def _code(table: Dict[Any, int], value: Any) -> int:
+        code = table.setdefault(value, len(table))
+        if code > 255:
+            raise ValueError("CompactKnowledgeGraph supports at most 256 node or edge types")
+        return code
+
+    def add_node(self, node_id: str, node_type: Optional[str], properties: Any) -> None:
+        if node_id in self.node_index:
+            return
+        self.node_index[node_id] = len(self.node_ids)
+        self.node_ids.append(node_id)
+        self.node_type_codes.append(self._code(self.node_types, node_type))
+        self.node_props += self._encode(properties)
+        self.node_props_offsets.append(len(self.node_props))
+
+    def add_edge(self, source_id: str, target_id: str, edge_type: str,
+                 confidence: float, properties: Any) -> bool:
+        source = self.node_index.get(source_id)
+        target = self.node_index.get(target_id)
+        if source is None or target is None:
+            return False
+        self.sources.append(source)
+        self.targets.append(target)
+        self.edge_type_codes.append(self._code(self.edge_types, edge_type))
+        self.confidence.append(float(confidence))
+        self.edge_props += self._encode(properties)
+        self.edge_props_offsets.append(len(self.edge_props))
+        return True
+
+    def build(self) -> 'CompactKnowledgeGraph':
+        return CompactKnowledgeGraph(
+            node_ids=self.node_ids,
+            node_types=list(self.node_types),
+            node_type_codes=np.frombuffer(self.node_type_codes, dtype=np.uint8),
+            node_props=bytes(self.node_props),
+            node_props_offsets=np.frombuffer(self.node_props_offsets, dtype=np.int64),
+            edge_types=list(self.edge_types),
+            sources=np.frombuffer(self.sources, dtype=np.int32),
+            targets=np.frombuffer(self.targets, dtype=np.int32),
+            edge_type_codes=np.frombuffer(self.edge_type_codes, dtype=np.uint8),
+            confidence=np.frombuffer(self.confidence, dtype=np.float32),
+            edge_props=bytes(self.edge_props),
+            edge_props_offsets=np.frombuffer(self.edge_props_offsets, dtype=np.int64),
+        )
+
+
+class CompactKnowledgeGraph:
+    """
+    Read-only knowledge graph stored as CSR adjacency in NumPy arrays.
+
+    Edges are kept twice, grouped by source (outgoing) and by target
+    (incoming). Within each node's row the edges are sorted by edge type,
+    so typed lookups are a binary search on the row instead of a scan.
+    Parallel edges of different types between the same pair are kept.
+
+    Build one with from_db() or KnowledgeGraph.to_compact(). To pick up
+    changes, rebuild it; there are no add_node/add_edge methods.
+    """
+
+    def __init__(self, node_ids: List[str], node_types: List[Optional[str]],
+                 node_type_codes: np.ndarray, node_props: bytes,
+                 node_props_offsets: np.ndarray, edge_types: List[str],
+                 sources: np.ndarray, targets: np.ndarray,
+                 edge_type_codes: np.ndarray, confidence: np.ndarray,
+                 edge_props: bytes, edge_props_offsets: np.ndarray):
+        """
+        Initialize from flat edge arrays; use from_db() or
+        from_knowledge_graph() instead of calling this directly.
+        """
+        self.node_ids = node_ids
+        self.node_index = {node_id: i for i, node_id in enumerate(node_ids)}
+        self.node_types = node_types
+        self.node_type_codes = node_type_codes
+        self.edge_types = edge_types
+        self.edge_type_index = {edge_type: code for code, edge_type in enumerate(edge_types)}
+        self._node_props = node_props
+        self._node_props_offsets = node_props_offsets
+        self._edge_props = edge_props
+        self._edge_props_offsets = edge_props_offsets
+
+        n = len(node_ids)
+        (self.out_indptr, self.out_indices, self.out_types,
+         self.out_confidence, self.out_edges) = self._build_csr(sources, targets, edge_type_codes, confidence, n)
+        (self.in_indptr, self.in_indices, self.in_types,
+         self.in_confidence, _) = self._build_csr(targets, sources, edge_type_codes, confidence, n)
+
+    @staticmethod
+    def _build_csr(rows: np.ndarray, cols: np.ndarray, types: np.ndarray,
+                   confidence: np.ndarray, n: int) -> Tuple[np.ndarray, ...]:
+        """Group edges by row and sort each row by edge type."""
+        order = np.lexsort((types, rows)).astype(np.int32)
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+        return indptr, cols[order], types[order], confidence[order], order
+
+    @classmethod
+    def from_knowledge_graph(cls, kg: KnowledgeGraph) -> 'CompactKnowledgeGraph':
+        """
+        Build a compact copy of a loaded KnowledgeGraph.
+
+        Args:
+            kg: Source knowledge graph
+
+        Returns:
+            CompactKnowledgeGraph with the same nodes and edges
+        """
+        builder = _CompactGraphBuilder()
+        for node_id, data in kg.graph.nodes(data=True):
+            builder.add_node(node_id, data.get('node_type'), data.get('properties'))
+        for source, target, data in kg.graph.edges(data=True):
+            builder.add_edge(source, target, data.get('edge_type'),
+                             data.get('confidence', 1.0), data.get('properties'))
+        return builder.build()
+
+    @classmethod
+    def from_db(cls, db_config: Dict[str, str], node_types: Optional[List[str]] = None,
+                min_confidence: float = 0.0, batch_size: int = 5000,
+                progress_callback: Optional[Callable[[str, int], None]] = None,
+                edge_types: Optional[List[str]] = None) -> 'CompactKnowledgeGraph':
+        """
+        Stream the graph from MySQL straight into compact arrays.
+
+        No NetworkX graph is built along the way. The node_types filter is
+        applied to both edge endpoints in SQL, as in KnowledgeGraph.load_from_db.
+
+        Args:
+            db_config: MySQL connection configuration (see KnowledgeGraph)
+            node_types: Optional filter for specific node types
+            min_confidence: Minimum confidence threshold for edges (0.0-1.0)
+            batch_size: Number of rows fetched from the server per round-trip
+            progress_callback: Optional callable invoked after every batch with
+                the load phase ('nodes' or 'edges') and the rows loaded so far
+            edge_types: Optional filter for specific edge types
+
+        Returns:
+            CompactKnowledgeGraph
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+
+        source = KnowledgeGraph(db_config)
+        builder = _CompactGraphBuilder()
+        skipped = 0
+
+        conn = source.connect_db()
+        cursor = conn.cursor(dictionary=True, buffered=False)
+
+        try:
+            cursor.execute(*source._node_query(node_types))
+            for node in source._stream_rows(cursor, batch_size, 'nodes', progress_callback):
+                builder.add_node(node['node_id'], node['node_type'], node['properties'])
+
+            cursor.execute(*source._edge_query(min_confidence, node_types, edge_types))
+            for edge in source._stream_rows(cursor, batch_size, 'edges', progress_callback):
+                if not builder.add_edge(edge['source_id'], edge['target_id'], edge['edge_type'],
+                                        edge['confidence'], edge['properties']):
+                    skipped += 1
+        except Exception as e:
+            logger.error(f"Error loading compact graph from database: {e}")
+            raise
+        finally:
+            KnowledgeGraph._close_streaming(cursor, conn)
+
+        graph = builder.build()
+        logger.info(f"Loaded compact graph with {graph.number_of_nodes()} nodes and "
+                    f"{graph.number_of_edges()} edges ({skipped} edges to unloaded nodes skipped)")
+        return graph
+
+    def number_of_nodes(self) -> int:
+        return len(self.node_ids)
+
+    def number_of_edges(self) -> int:
+        return len(self.out_indices)
+
+    def has_node(self, node_id: str) -> bool:
+        return node_id in self.node_index
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the adjacency arrays and property tables."""
+        arrays = [self.node_type_codes, self._node_props_offsets, self._edge_props_offsets,
+                  self.out_indptr, self.out_indices, self.out_types, self.out_confidence, self.out_edges,
+                  self.in_indptr, self.in_indices, self.in_types, self.in_confidence]
+        return sum(a.nbytes for a in arrays) + len(self._node_props) + len(self._edge_props)
+
+    def get_node(self, node_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a node with its decoded properties.
+
+        Returns:
+            Dictionary with id, type and properties, or None if not found
+        """
+        index = self.node_index.get(node_id)
+        if index is None:
+            return None
+        return self._node_dict(index)
+
+    def get_edge_properties(self, source_id: str, target_id: str, edge_type: str) -> Optional[Dict[str, Any]]:
+        """Get the decoded properties of an edge, or None if it does not exist."""
+        source = self.node_index.get(source_id)
+        target = self.node_index.get(target_id)
+        code = self.edge_type_index.get(edge_type)
+        if source is None or target is None or code is None:
+            return None
+        start, end = self._typed_range(self.out_indptr, self.out_types, source, code)
+        hits = np.flatnonzero(self.out_indices[start:end] == target)
+        if len(hits) == 0:
+            return None
+        edge = self.out_edges[start + hits[0]]
+        raw = self._edge_props[self._edge_props_offsets[edge]:self._edge_props_offsets[edge + 1]]
+        return json_loads(raw) if raw else {}
+
+    def _node_dict(self, index: int) -> Dict[str, Any]:
+        raw = self._node_props[self._node_props_offsets[index]:self._node_props_offsets[index + 1]]
+        return {
+            'id': self.node_ids[index],
+            'type': self.node_types[self.node_type_codes[index]],
+            'properties': json_loads(raw) if raw else {}
+        }
+
+    def _typed_range(self, indptr: np.ndarray, types: np.ndarray, index: int,
+                     code: Optional[int]) -> Tuple[int, int]:
+        """Slice bounds of a node's row, narrowed to one edge type if given."""
+        start, end = int(indptr[index]), int(indptr[index + 1])
+        if code is None:
+            return start, end
+        row_types = types[start:end]
+        return (start + int(np.searchsorted(row_types, code, 'left')),
+                start + int(np.searchsorted(row_types, code, 'right')))
+
+    @staticmethod
+    def _confidence_floor(min_confidence: float) -> Optional[np.float32]:
+        """min_confidence as float32 (so stored values equal to it pass), or None for no filter."""
+        return np.float32(min_confidence) if min_confidence > 0.0 else None
+
+    def _successors(self, index: int, floor: Optional[np.float32]) -> List[int]:
+        """Distinct out-neighbors of a node over edges at or above floor."""
+        start, end = int(self.out_indptr[index]), int(self.out_indptr[index + 1])
+        row = self.out_indices[start:end]
+        if floor is not None:
+            row = row[self.out_confidence[start:end] >= floor]
+        return np.unique(row).tolist()
+
+    def _type_codes(self, edge_types: Optional[List[str]]) -> Optional[np.ndarray]:
+        if edge_types is None:
+            return None
+        return np.array([self.edge_type_index[t] for t in edge_types if t in self.edge_type_index],
+                        dtype=np.uint8)
+
+    def get_neighbors(self, node_id: str, edge_type: Optional[str] = None,
+                      direction: str = 'out', min_confidence: float = 0.0) -> List[str]:
+        """
+        Get neighboring nodes.
+
+        Args:
+            node_id: Node to get neighbors for
+            edge_type: Optional filter by edge type
+            direction: 'out' (outgoing), 'in' (incoming), or 'both'
+            min_confidence: Only follow edges with at least this confidence
+
+        Returns:
+            List of neighbor node IDs
+        """
+        index = self.node_index.get(node_id)
+        if index is None:
+            return []
+
+        code = None
+        if edge_type is not None:
+            code = self.edge_type_index.get(edge_type)
+            if code is None:
+                return []
+
+        floor = self._confidence_floor(min_confidence)
+        neighbors = []
+        for wanted, indptr, indices, types, confidence in (
+                ('out', self.out_indptr, self.out_indices, self.out_types, self.out_confidence),
+                ('in', self.in_indptr, self.in_indices, self.in_types, self.in_confidence)):
+            if direction not in [wanted, 'both']:
+                continue
+            start, end = self._typed_range(indptr, types, index, code)
+            row = indices[start:end]
+            if floor is not None:
+                row = row[confidence[start:end] >= floor]
+            row = row.tolist()
+            if code is None:
+                # Parallel edges of different types share one neighbor
+                row = dict.fromkeys(row)
+            neighbors.extend(self.node_ids[i] for i in row)
+        return neighbors
+
+    def traverse(self, start_node: Union[str, Iterable[str]], max_depth: int = 2,
+                 edge_types: Optional[List[str]] = None, ids_only: bool = False,
+                 min_confidence: float = 0.0) -> Union[Dict[str, Any], List[str]]:
+        """
+        Traverse graph from starting node(s) up to max depth.
+
+        Args:
+            start_node: Starting node ID, or an iterable of node IDs
+            max_depth: Maximum traversal depth (default 2 hops)
+            edge_types: Optional filter for edge types
+            ids_only: If True, return only the list of reached node IDs
+            min_confidence: Only follow edges with at least this confidence
+
+        Returns:
+            Dictionary with nodes and edges in subgraph, or a list of node IDs
+            when ids_only is True
+        """
+        starts = [start_node] if isinstance(start_node, str) else start_node
+        frontier = [self.node_index[node_id] for node_id in dict.fromkeys(starts)
+                    if node_id in self.node_index]
+        visited = dict.fromkeys(frontier)
+        codes = self._type_codes(edge_types)
+        floor = self._confidence_floor(min_confidence)
+        edges = []
+
+        for depth in range(max_depth + 1):
+            expand = depth < max_depth
+            if not frontier or (ids_only and not expand):
+                break
+
+            next_frontier = []
+            for node in frontier:
+                start_pos, end_pos = int(self.out_indptr[node]), int(self.out_indptr[node + 1])
+                targets = self.out_indices[start_pos:end_pos]
+                types = self.out_types[start_pos:end_pos]
+                confidence = self.out_confidence[start_pos:end_pos]
+                if codes is not None or floor is not None:
+                    mask = np.isin(types, codes) if codes is not None else np.ones(len(types), dtype=bool)
+                    if floor is not None:
+                        mask &= confidence >= floor
+                    targets, types, confidence = targets[mask], types[mask], confidence[mask]
+
+                if not ids_only:
+                    for target, code, conf in zip(targets.tolist(), types.tolist(), confidence.tolist()):
+                        edges.append({
+                            'source': self.node_ids[node],
+                            'target': self.node_ids[target],
+                            'type': self.edge_types[code],
+                            'confidence': _as_confidence(conf)
+                        })
+                if expand:
+                    for target in targets.tolist():
+                        if target not in visited:
+                            visited[target] = None
+                            next_frontier.append(target)
+            frontier = next_frontier
+
+        if ids_only:
+            return [self.node_ids[index] for index in visited]
+
+        return {
+            'nodes': [self._node_dict(index) for index in visited],
+            'edges': edges
+        }
+
+    def find_paths(self, source_id: str, target_id: str,
+                   max_length: int = 3, min_confidence: float = 0.0) -> List[List[str]]:
+        """
+        Find all paths between two nodes.
+
+        Args:
+            source_id: Source node ID
+            target_id: Target node ID
+            max_length: Maximum path length
+            min_confidence: Only follow edges with at least this confidence
+
+        Returns:
+            List of paths (each path is a list of node IDs); a node reaches
+            itself by the single path [source_id]
+        """
+        source = self.node_index.get(source_id)
+        target = self.node_index.get(target_id)
+        if source is None or target is None:
+            return []
+        if source == target:
+            return [[source_id]]
+
+        floor = self._confidence_floor(min_confidence)
+        paths = []
+        path = [source]
+        on_path = {source}
+        # Stack of iterators over the distinct successors of each node on the path
+        stack = [iter(self._successors(source, floor))]
+
+        while stack:
+            child = next(stack[-1], None)
+            if child is None:
+                stack.pop()
+                on_path.discard(path.pop())
+            elif child == target:
+                paths.append([self.node_ids[i] for i in path] + [target_id])
+            elif child not in on_path and len(path) < max_length:
+                path.append(child)
+                on_path.add(child)
+                stack.append(iter(self._successors(child, floor)))
+
+        return paths
+
+    def compute_centrality(self, node_id: str, min_confidence: float = 0.0) -> float:
+        """
+        Compute degree centrality for a node.
+
+        Args:
+            node_id: Node to compute centrality for
+            min_confidence: Only count edges with at least this confidence
+
+        Returns:
+            Centrality score (0.0-1.0)
+        """
+        index = self.node_index.get(node_id)
+        if index is None or self.number_of_nodes() <= 1:
+            return 0.0
+        out_start, out_end = int(self.out_indptr[index]), int(self.out_indptr[index + 1])
+        in_start, in_end = int(self.in_indptr[index]), int(self.in_indptr[index + 1])
+        floor = self._confidence_floor(min_confidence)
+        if floor is None:
+            degree = out_end - out_start + in_end - in_start
+        else:
+            degree = int(np.count_nonzero(self.out_confidence[out_start:out_end] >= floor)
+                         + np.count_nonzero(self.in_confidence[in_start:in_end] >= floor))
+        return float(degree) / (self.number_of_nodes() - 1)
+
+    def get_similar_nodes(self, node_id: str, top_k: int = 5,
+                          min_confidence: float = 0.0) -> List[Tuple[str, float]]:
+        """
+        Get most similar nodes based on SIMILAR_TO edges in either direction.
+
+        Args:
+            node_id: Node to find similar nodes for
+            top_k: Number of results to return
+            min_confidence: Leave out nodes with a lower similarity
+
+        Returns:
+            List of (node_id, similarity_score) tuples
+        """
+        index = self.node_index.get(node_id)
+        code = self.edge_type_index.get('SIMILAR_TO')
+        if index is None or code is None:
+            return []
+
+        out_start, out_end = self._typed_range(self.out_indptr, self.out_types, index, code)
+        in_start, in_end = self._typed_range(self.in_indptr, self.in_types, index, code)
+        neighbors = np.concatenate([self.out_indices[out_start:out_end], self.in_indices[in_start:in_end]])
+        scores = np.concatenate([self.out_confidence[out_start:out_end], self.in_confidence[in_start:in_end]])
+        floor = self._confidence_floor(min_confidence)
+        if floor is not None:
+            keep = scores >= floor
+            neighbors, scores = neighbors[keep], scores[keep]
+
+        best: Dict[int, float] = {}
+        for neighbor, score in zip(neighbors.tolist(), scores.tolist()):
+            if score > best.get(neighbor, -1.0):
+                best[neighbor] = score
+
+        ranked = sorted(best.items(), key=lambda x: x[1], reverse=True)
+        return [(self.node_ids[neighbor], _as_confidence(score)) for neighbor, score in ranked[:top_k]]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get graph statistics.
+
+        Returns:
+            Dictionary with graph metrics
+        """
+        n = self.number_of_nodes()
+        e = self.number_of_edges()
+        node_counts = np.bincount(self.node_type_codes, minlength=len(self.node_types))
+        edge_counts = np.bincount(self.out_types, minlength=len(self.edge_types))
+
+        node_type_stats: Dict[str, int] = {}
+        for code, count in enumerate(node_counts.tolist()):
+            if count:
+                name = self.node_types[code] or 'unknown'
+                node_type_stats[name] = node_type_stats.get(name, 0) + count
+
+        return {
+            'total_nodes': n,
+            'total_edges': e,
+            'node_types': node_type_stats,
+            'edge_types': {self.edge_types[code]: count
+                           for code, count in enumerate(edge_counts.tolist()) if count},
+            'avg_degree': 2 * e / n if n else 0.0,
+            'density': e / (n * (n - 1)) if n > 1 else 0.0
+        }
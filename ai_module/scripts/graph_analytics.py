@@ -0,0 +1,602 @@
+"""
+Graph Analytics
+Whole-graph metrics for KnowledgeGraph, computed on a sparse-matrix view.
+
+This module handles:
+- Building a SciPy CSR adjacency matrix (confidence-weighted) of the
+  in-memory graph, cached until the graph changes
+- Degree, in/out-degree, PageRank and sampled betweenness centrality for
+  all nodes at once
+- Ranking nodes per metric and node type (top_nodes)
+- Personalized PageRank from one or many seed sets (related-item retrieval)
+- Link prediction from shared neighbors (common neighbors, Jaccard,
+  Adamic-Adar, resource allocation) to propose new SIMILAR_TO edges
+- Community detection (Louvain, label propagation) on the
+  confidence-weighted graph
+
+Results are cached per metric and invalidated by KnowledgeGraph's mutation
+version counter, so repeated report queries on an unchanged graph are free.
+Related-item retrieval may reuse a slightly stale view (see
+GraphAnalytics.max_stale_versions) so a burst of new tickets does not
+rebuild it on every query.
+"""
+
+import logging
+import math
+import time
+from typing import Dict, List, Tuple, Optional, Any, Iterable, Sequence
+
+import networkx as nx
+import numpy as np
+import scipy.sparse as sp
+
+logger = logging.getLogger(__name__)
+
+METRICS = ('degree', 'in_degree', 'out_degree', 'pagerank', 'betweenness')
+LINK_METHODS = ('common_neighbors', 'jaccard', 'adamic_adar', 'resource_allocation')
+COMMUNITY_METHODS = ('louvain', 'label_propagation')
+
+
+def link_confidence(method: str, score: float) -> float:
+    """
+    Map a link prediction score to an edge confidence in [0, 1).
+
+    The mapping depends only on the method, so confidences from separate
+    runs (and graphs) compare: Jaccard is already a fraction, other scores
+    grow with the number of shared neighbors and go through 1 - exp(-score).
+    """
+    if method == 'jaccard':
+        return score
+    return -math.expm1(-score)
+
+
+class GraphView:
+    """Immutable sparse snapshot of a KnowledgeGraph at one version."""
+
+    def __init__(self, kg: 'KnowledgeGraph'):
+        self.version = kg._version
+        self.built_at = time.monotonic()
+        self.node_ids: List[str] = list(kg.graph)
+        self.node_index: Dict[str, int] = {node_id: i for i, node_id in enumerate(self.node_ids)}
+        self.type_names: List[Optional[str]] = []
+        type_codes: Dict[Optional[str], int] = {}
+        self.node_types = np.fromiter(
+            (type_codes.setdefault(data.get('node_type'), len(type_codes))
+             for _, data in kg.graph.nodes(data=True)),
+            dtype=np.int32, count=len(self.node_ids)
+        )
+        self.type_names = list(type_codes)
+
+        num_edges = kg.graph.number_of_edges()
+        sources = np.empty(num_edges, dtype=np.int64)
+        targets = np.empty(num_edges, dtype=np.int64)
+        weights = np.empty(num_edges, dtype=np.float64)
+        edge_types = np.empty(num_edges, dtype=np.int32)
+        edge_type_codes: Dict[str, int] = {}
+        index = self.node_index
+        edges = kg.graph.edges(keys=True, data='confidence', default=1.0)
+        for i, (source, target, edge_type, confidence) in enumerate(edges):
+            sources[i] = index[source]
+            targets[i] = index[target]
+            weights[i] = confidence
+            edge_types[i] = edge_type_codes.setdefault(edge_type, len(edge_type_codes))
+        # Per-edge arrays, for computations that select edges by type
+        self.edge_sources = sources
+        self.edge_targets = targets
+        self.edge_types = edge_types
+        self.edge_type_names = list(edge_type_codes)
+
+        n = len(self.node_ids)
+        # Degrees count parallel edges; the matrices merge them (weights summed)
+        self.out_degree = np.bincount(sources, minlength=n)
+        self.in_degree = np.bincount(targets, minlength=n)
+        self.weighted = sp.csr_matrix((weights, (sources, targets)), shape=(n, n))
+        self.weighted.sum_duplicates()
+        self.binary = self.weighted.copy()
+        self.binary.data[:] = 1.0
+        self._walk_t: Optional[sp.csr_matrix] = None
+        self._dangling: Optional[np.ndarray] = None
+
+    def walk_matrix(self) -> Tuple[sp.csr_matrix, np.ndarray]:
+        """
+        Transposed random-walk matrix over the symmetrized graph.
+
+        Relations are followed in both directions (a ticket AFFECTS a CI, so
+        the CI leads back to its other tickets), weighted by confidence.
+
+        Returns:
+            (P^T as CSR, boolean mask of nodes without any edges)
+        """
+        if self._walk_t is None:
+            symmetric = (self.weighted + self.weighted.T).tocsr()
+            weight = np.asarray(symmetric.sum(axis=1)).ravel()
+            self._dangling = weight == 0
+            inv_weight = np.divide(1.0, weight, out=np.zeros(len(weight)), where=~self._dangling)
+            self._walk_t = (sp.diags(inv_weight) @ symmetric).T.tocsr()
+        return self._walk_t, self._dangling
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.node_ids)
+
+    def edge_mask(self, edge_types: Iterable[str]) -> np.ndarray:
+        codes = [self.edge_type_names.index(edge_type) for edge_type in edge_types
+                 if edge_type in self.edge_type_names]
+        return np.isin(self.edge_types, codes)
+
+    def type_mask(self, node_type: Optional[str]) -> np.ndarray:
+        if node_type is None:
+            return np.ones(self.num_nodes, dtype=bool)
+        if node_type not in self.type_names:
+            return np.zeros(self.num_nodes, dtype=bool)
+        return self.node_types == self.type_names.index(node_type)
+
+
+class GraphAnalytics:
+    """
+    Batch metrics over a KnowledgeGraph.
+
+    Usually reached through KnowledgeGraph.analytics:
+
+        kg.analytics.top_nodes('pagerank', node_type='kb', k=10)
+        scores = kg.analytics.scores('betweenness')
+        kg.analytics.related(['ticket_123'], node_type='kb', k=5)
+    """
+
+    def __init__(self, kg: 'KnowledgeGraph', max_stale_versions: int = 1000,
+                 max_stale_seconds: float = 300.0):
+        """
+        Args:
+            kg: Graph to analyze
+            max_stale_versions: related()/related_many() reuse the current
+                view for up to this many graph mutations after it was built;
+                seeds added since are walked from through their neighbors
+                (0 always rebuilds). Metrics always use an up-to-date view.
+            max_stale_seconds: ... and for at most this many seconds
+        """
+        self.kg = kg
+        self.max_stale_versions = max_stale_versions
+        self.max_stale_seconds = max_stale_seconds
+        self._view: Optional[GraphView] = None
+        self._results: Dict[Tuple[str, Tuple], np.ndarray] = {}
+
+    def view(self, max_stale_versions: int = 0, max_stale_seconds: float = 0.0) -> GraphView:
+        """
+        Sparse view of the graph, rebuilt only after it changed.
+
+        Args:
+            max_stale_versions: Accept a view this many mutations behind the graph
+            max_stale_seconds: Accept a stale view only if it is at most this old
+        """
+        view = self._view
+        if view is None or not (
+            view.version == self.kg._version
+            or (self.kg._version - view.version <= max_stale_versions
+                and time.monotonic() - view.built_at <= max_stale_seconds)
+        ):
+            self._view = GraphView(self.kg)
+            self._results = {}
+            logger.info(f"Built sparse graph view ({self._view.num_nodes} nodes, "
+                        f"{self._view.weighted.nnz} node pairs)")
+        return self._view
+
+    def metric(self, name: str, **params: Any) -> np.ndarray:
+        """
+        Compute (or fetch from cache) a metric for every node.
+
+        Args:
+            name: One of 'degree', 'in_degree', 'out_degree', 'pagerank', 'betweenness'
+            **params: Options for the metric (see pagerank() and betweenness())
+
+        Returns:
+            Array of scores aligned with view().node_ids
+        """
+        if name not in METRICS:
+            raise ValueError(f"Unknown metric '{name}' (choose from {', '.join(METRICS)})")
+        view = self.view()
+        key = (name, tuple(sorted(params.items())))
+        if key not in self._results:
+            self._results[key] = getattr(self, f"_compute_{name}")(view, **params)
+        return self._results[key]
+
+    def scores(self, name: str, **params: Any) -> Dict[str, float]:
+        """Metric as a node_id -> score dictionary."""
+        values = self.metric(name, **params)
+        return dict(zip(self.view().node_ids, values.tolist()))
+
+    def top_nodes(self, metric: str, node_type: Optional[str] = None, k: int = 10,
+                  **params: Any) -> List[Tuple[str, float]]:
+        """
+        Highest scoring nodes for a metric, e.g. the most connected CIs.
+
+        Args:
+            metric: Metric name (see metric())
+            node_type: Only rank nodes of this type
+            k: Number of results
+            **params: Options for the metric
+
+        Returns:
+            List of (node_id, score) tuples, best first
+        """
+        values = self.metric(metric, **params)
+        view = self.view()
+        candidates = np.flatnonzero(view.type_mask(node_type))
+        if k <= 0 or len(candidates) == 0:
+            return []
+        if len(candidates) > k:
+            part = np.argpartition(-values[candidates], k - 1)[:k]
+            candidates = candidates[part]
+        order = np.lexsort((candidates, -values[candidates]))
+        return [(view.node_ids[i], float(values[i])) for i in candidates[order]]
+
+    def pagerank(self, damping: float = 0.85, tol: float = 1e-6, max_iter: int = 100) -> Dict[str, float]:
+        return self.scores('pagerank', damping=damping, tol=tol, max_iter=max_iter)
+
+    def betweenness(self, samples: Optional[int] = 256, seed: int = 0) -> Dict[str, float]:
+        return self.scores('betweenness', samples=samples, seed=seed)
+
+    def related(self, seeds: Iterable[str], node_type: Optional[str] = None, k: int = 10,
+                **params: Any) -> List[Tuple[str, float]]:
+        """
+        Rank nodes by personalized PageRank from a set of seed nodes.
+
+        Args:
+            seeds: Node IDs the random walk restarts from
+            node_type: Only return nodes of this type
+            k: Number of results
+            **params: See related_many()
+
+        Returns:
+            List of (node_id, score) tuples, best first (seeds excluded)
+        """
+        return self.related_many([seeds], node_type=node_type, k=k, **params)[0]
+
+    def related_many(self, seed_sets: Sequence[Iterable[str]], node_type: Optional[str] = None,
+                     k: int = 10, damping: float = 0.85, tol: float = 1e-6, max_iter: int = 100,
+                     include_seeds: bool = False) -> List[List[Tuple[str, float]]]:
+        """
+        Personalized PageRank for many seed sets in one sparse-matrix iteration.
+
+        Each seed set is one column of the iterate, so a batch of incoming
+        tickets costs one sparse-dense product per iteration. Columns that
+        have converged are dropped from the iteration.
+
+        The view may lag the graph by max_stale_versions mutations. A seed
+        added since it was built restarts the walk from its neighbors in the
+        view instead (weighted by edge confidence), which is the walk's
+        first step from the seed; nodes removed since are never returned.
+
+        Args:
+            seed_sets: One iterable of seed node IDs per query; unknown IDs are ignored
+            node_type: Only return nodes of this type
+            k: Number of results per query
+            damping: Probability of following an edge instead of restarting
+            tol: L1 change per column below which a query has converged
+            max_iter: Maximum number of iterations
+            include_seeds: Also rank the seed nodes themselves
+
+        Returns:
+            One list of (node_id, score) tuples per seed set, best first
+        """
+        # Each seed set is read twice (restart weights, seed exclusion)
+        seed_sets = [list(seeds) for seeds in seed_sets]
+        view = self.view(self.max_stale_versions, self.max_stale_seconds)
+        stale = view.version != self.kg._version
+        restarts = [self._restart_weights(view, seeds) for seeds in seed_sets]
+        results: List[List[Tuple[str, float]]] = [[] for _ in restarts]
+        queries = [i for i, weights in enumerate(restarts) if weights]
+        if not queries or k <= 0:
+            return results
+
+        restart = np.zeros((view.num_nodes, len(queries)))
+        for column, query in enumerate(queries):
+            rows, weights = zip(*restarts[query].items())
+            restart[list(rows), column] = np.array(weights) / sum(weights)
+        ranks = self._personalized_pagerank(view, restart, damping, tol, max_iter)
+
+        allowed = view.type_mask(node_type)
+        for column, query in enumerate(queries):
+            scores = np.where(allowed, ranks[:, column], 0.0)
+            if not include_seeds:
+                seeds = [view.node_index[node_id] for node_id in seed_sets[query]
+                         if node_id in view.node_index]
+                scores[seeds] = 0.0
+            while True:
+                candidates = np.flatnonzero(scores > 0)
+                if len(candidates) > k:
+                    candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+                # A stale view can still hold nodes removed from the graph since
+                removed = [i for i in candidates.tolist() if view.node_ids[i] not in self.kg.graph] if stale else []
+                if not removed:
+                    break
+                scores[removed] = 0.0
+            order = np.lexsort((candidates, -scores[candidates]))
+            results[query] = [(view.node_ids[i], float(scores[i])) for i in candidates[order]]
+        return results
+
+    def _restart_weights(self, view: GraphView, seeds: Iterable[str]) -> Dict[int, float]:
+        """
+        Restart mass per view row for one seed set (seeds share it equally).
+
+        Seeds missing from a stale view pass their share on to their
+        neighbors in the view, in proportion to edge confidence.
+        """
+        graph = self.kg.graph
+        seeds = [node_id for node_id in dict.fromkeys(seeds)
+                 if node_id in view.node_index or node_id in graph]
+        weights: Dict[int, float] = {}
+        for node_id in seeds:
+            row = view.node_index.get(node_id)
+            if row is not None:
+                weights[row] = weights.get(row, 0.0) + 1.0
+                continue
+            neighbors: Dict[int, float] = {}
+            for edges in (graph.out_edges(node_id, data='confidence', default=1.0),
+                          graph.in_edges(node_id, data='confidence', default=1.0)):
+                for source, target, confidence in edges:
+                    neighbor = view.node_index.get(target if source == node_id else source)
+                    if neighbor is not None:
+                        neighbors[neighbor] = neighbors.get(neighbor, 0.0) + confidence
+            total = sum(neighbors.values())
+            for neighbor, weight in neighbors.items():
+                if total > 0:
+                    weights[neighbor] = weights.get(neighbor, 0.0) + weight / total
+        return {row: weight for row, weight in weights.items() if weight > 0}
+
+    def link_predictions(self, node_type: str = 'ticket', method: str = 'adamic_adar', k: int = 5,
+                         min_score: float = 0.0, via_edge_types: Optional[Iterable[str]] = None,
+                         max_degree: Optional[int] = 1000, exclude_existing: bool = True,
+                         block_size: int = 1024) -> List[Tuple[str, str, float]]:
+        """
+        Score pairs of nodes of one type by their shared neighbors.
+
+        Scores for a block of rows at a time come from one sparse product
+        (rows x neighbors) @ (neighbors x rows), so only pairs that actually
+        share a neighbor are ever materialized.
+
+        Args:
+            node_type: Type of the nodes to pair up (e.g. 'ticket')
+            method: 'common_neighbors', 'jaccard', 'adamic_adar' or 'resource_allocation'
+            k: Keep at most this many predictions per node
+            min_score: Drop pairs scoring below this
+            via_edge_types: Edge types that make nodes neighbors (either
+                direction); default all types except SIMILAR_TO
+            max_degree: Ignore shared neighbors with more connections than
+                this (e.g. a category holding most tickets); None keeps all.
+                For jaccard they are left out of both neighbor sets
+            exclude_existing: Skip pairs already linked by SIMILAR_TO
+            block_size: Rows scored per sparse product (bounds memory)
+
+        Returns:
+            List of (node_id, other_node_id, score), per node best first
+        """
+        if method not in LINK_METHODS:
+            raise ValueError(f"Unknown method '{method}' (choose from {', '.join(LINK_METHODS)})")
+        view = self.view()
+        n = view.num_nodes
+        rows = np.flatnonzero(view.type_mask(node_type))
+        if k <= 0 or len(rows) < 2:
+            return []
+
+        if via_edge_types is None:
+            selected = ~view.edge_mask(['SIMILAR_TO'])
+        else:
+            selected = view.edge_mask(via_edge_types)
+        sources, targets = view.edge_sources[selected], view.edge_targets[selected]
+        adjacency = sp.csr_matrix((np.ones(2 * len(sources)),
+                                   (np.concatenate([sources, targets]), np.concatenate([targets, sources]))),
+                                  shape=(n, n))
+        adjacency.setdiag(0)
+        adjacency.eliminate_zeros()
+        adjacency.data[:] = 1.0
+
+        degree = np.asarray(adjacency.sum(axis=1)).ravel()
+        if method == 'adamic_adar':
+            log_degree = np.log(degree, out=np.zeros(n), where=degree > 1)
+            weights = np.divide(1.0, log_degree, out=np.zeros(n), where=degree > 1)
+        elif method == 'resource_allocation':
+            weights = np.divide(1.0, degree, out=np.zeros(n), where=degree > 0)
+        else:
+            weights = np.ones(n)
+        if max_degree is not None:
+            weights[degree > max_degree] = 0.0
+
+        incidence = adjacency[rows]
+        spread = (incidence @ sp.diags(weights)).T.tocsr()
+        # Jaccard denominators count the same (non-hub) neighbors as the overlap
+        sizes = incidence @ (weights > 0).astype(float)
+        existing = None
+        if exclude_existing:
+            similar = view.edge_mask(['SIMILAR_TO'])
+            position = np.full(n, -1)
+            position[rows] = np.arange(len(rows))
+            pair_sources = position[view.edge_sources[similar]]
+            pair_targets = position[view.edge_targets[similar]]
+            linked = (pair_sources >= 0) & (pair_targets >= 0)
+            pair_sources, pair_targets = pair_sources[linked], pair_targets[linked]
+            existing = sp.csr_matrix((np.ones(2 * len(pair_sources)),
+                                      (np.concatenate([pair_sources, pair_targets]),
+                                       np.concatenate([pair_targets, pair_sources]))),
+                                     shape=(len(rows), len(rows)))
+
+        predictions: List[Tuple[str, str, float]] = []
+        for start in range(0, len(rows), block_size):
+            scores = (incidence[start:start + block_size] @ spread).tocsr()
+            if existing is not None:
+                scores = scores - scores.multiply(existing[start:start + block_size] > 0)
+            scores = scores.tocoo()
+            block_rows, columns, values = scores.row + start, scores.col, scores.data
+            if method == 'jaccard':
+                values = values / (sizes[block_rows] + sizes[columns] - values)
+            keep = (block_rows != columns) & (values > 0) & (values >= min_score)
+            block_rows, columns, values = block_rows[keep], columns[keep], values[keep]
+
+            # Top k per row: sort by (row, -score), then rank within each row
+            order = np.lexsort((columns, -values, block_rows))
+            block_rows, columns, values = block_rows[order], columns[order], values[order]
+            rank = np.arange(len(block_rows)) - np.searchsorted(block_rows, block_rows)
+            top = rank < k
+            node_ids = view.node_ids
+            predictions.extend(
+                (node_ids[rows[row]], node_ids[rows[column]], float(value))
+                for row, column, value in zip(block_rows[top], columns[top], values[top])
+            )
+        return predictions
+
+    def community_labels(self, method: str = 'louvain', resolution: float = 1.0,
+                         seed: int = 0) -> np.ndarray:
+        """
+        Partition the graph into communities.
+
+        Edge directions are ignored and parallel edges are merged, with their
+        confidences summed as the weight.
+
+        Args:
+            method: 'louvain' or 'label_propagation'
+            resolution: Louvain resolution; above 1 favors smaller communities
+            seed: Random seed, for reproducible labels
+
+        Returns:
+            Community label per node, aligned with view().node_ids; label 0
+            is the largest community
+        """
+        if method not in COMMUNITY_METHODS:
+            raise ValueError(f"Unknown method '{method}' (choose from {', '.join(COMMUNITY_METHODS)})")
+        view = self.view()
+        key = ('communities', (('method', method), ('resolution', resolution), ('seed', seed)))
+        if key in self._results:
+            return self._results[key]
+
+        undirected = nx.from_scipy_sparse_array(view.weighted + view.weighted.T)
+        if method == 'louvain':
+            communities = nx.community.louvain_communities(undirected, weight='weight',
+                                                           resolution=resolution, seed=seed)
+        else:
+            communities = nx.community.asyn_lpa_communities(undirected, weight='weight', seed=seed)
+        members = sorted((sorted(community) for community in communities), key=lambda c: (-len(c), c[0]))
+
+        labels = np.empty(view.num_nodes, dtype=np.int64)
+        for label, rows in enumerate(members):
+            labels[rows] = label
+        self._results[key] = labels
+        logger.info(f"Detected {len(members)} communities ({method}) in {view.num_nodes} nodes")
+        return labels
+
+    # ------------------------------------------------------------------
+    # Metric implementations
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _scale(view: GraphView) -> float:
+        return 1.0 / (view.num_nodes - 1) if view.num_nodes > 1 else 0.0
+
+    def _compute_degree(self, view: GraphView) -> np.ndarray:
+        return (view.in_degree + view.out_degree) * self._scale(view)
+
+    def _compute_in_degree(self, view: GraphView) -> np.ndarray:
+        return view.in_degree * self._scale(view)
+
+    def _compute_out_degree(self, view: GraphView) -> np.ndarray:
+        return view.out_degree * self._scale(view)
+
+    def _compute_pagerank(self, view: GraphView, damping: float = 0.85, tol: float = 1e-6,
+                          max_iter: int = 100) -> np.ndarray:
+        """Confidence-weighted PageRank by power iteration (dangling mass spread uniformly)."""
+        n = view.num_nodes
+        if n == 0:
+            return np.zeros(0)
+        out_weight = np.asarray(view.weighted.sum(axis=1)).ravel()
+        dangling = out_weight == 0
+        inv_weight = np.divide(1.0, out_weight, out=np.zeros(n), where=~dangling)
+        transition_t = (sp.diags(inv_weight) @ view.weighted).T.tocsr()
+
+        rank = np.full(n, 1.0 / n)
+        for iteration in range(max_iter):
+            previous = rank
+            rank = damping * (transition_t @ previous + previous[dangling].sum() / n) + (1.0 - damping) / n
+            if np.abs(rank - previous).sum() < n * tol:
+                break
+        else:
+            logger.warning(f"PageRank did not converge in {max_iter} iterations")
+        return rank
+
+    @staticmethod
+    def _personalized_pagerank(view: GraphView, restart: np.ndarray, damping: float,
+                               tol: float, max_iter: int) -> np.ndarray:
+        """Power iteration for a block of restart vectors (one per column)."""
+        walk_t, dangling = view.walk_matrix()
+        ranks = restart.copy()
+        active = np.arange(restart.shape[1])
+        for iteration in range(max_iter):
+            current = ranks[:, active]
+            # Mass stuck on isolated nodes goes back to the seeds
+            stuck = current[dangling].sum(axis=0)
+            updated = (damping * (walk_t @ current)
+                       + restart[:, active] * ((1.0 - damping) + damping * stuck))
+            change = np.abs(updated - current).sum(axis=0)
+            ranks[:, active] = updated
+            active = active[change >= tol]
+            if len(active) == 0:
+                break
+        else:
+            logger.warning(f"Personalized PageRank: {len(active)} queries did not converge "
+                           f"in {max_iter} iterations")
+        return ranks
+
+    def _compute_betweenness(self, view: GraphView, samples: Optional[int] = 256,
+                             seed: int = 0, batch_size: int = 64) -> np.ndarray:
+        """
+        Betweenness centrality (hop-based, directed), exact or from sampled sources.
+
+        Brandes' algorithm run level-synchronously for a batch of sources at
+        once: path counts are pushed forward and dependencies pulled back
+        one BFS level at a time with sparse matrix products. With samples set,
+        only that many random sources are used and the result is scaled up,
+        as in networkx.betweenness_centrality(k=samples).
+        """
+        n = view.num_nodes
+        if n < 3:
+            return np.zeros(n)
+        if samples is None or samples >= n:
+            sources = np.arange(n)
+        else:
+            sources = np.random.default_rng(seed).choice(n, size=samples, replace=False)
+
+        adjacency = view.binary
+        adjacency_t = adjacency.T.tocsr()
+        centrality = np.zeros(n)
+
+        for start in range(0, len(sources), batch_size):
+            batch = sources[start:start + batch_size]
+            columns = np.arange(len(batch))
+            sigma = np.zeros((n, len(batch)))
+            sigma[batch, columns] = 1.0
+            visited = sigma > 0
+            frontier = sigma.copy()
+            levels = [visited.copy()]
+
+            # Forward: shortest path counts, one BFS level per product
+            while True:
+                reached = adjacency_t @ frontier
+                reached[visited] = 0.0
+                new = reached > 0
+                if not new.any():
+                    break
+                sigma[new] = reached[new]
+                visited |= new
+                frontier = np.where(new, reached, 0.0)
+                levels.append(new)
+
+            # Backward: accumulate dependencies from the deepest level up
+            delta = np.zeros((n, len(batch)))
+            safe_sigma = np.where(sigma > 0, sigma, 1.0)
+            for depth in range(len(levels) - 1, 0, -1):
+                coefficient = np.where(levels[depth], (1.0 + delta) / safe_sigma, 0.0)
+                delta += np.where(levels[depth - 1], sigma * (adjacency @ coefficient), 0.0)
+            delta[batch, columns] = 0.0
+            centrality += delta.sum(axis=1)
+
+        scale = 1.0 / ((n - 1) * (n - 2))
+        if len(sources) < n:
+            scale *= n / len(sources)
+        return centrality * scale
@@ -0,0 +1,198 @@
+"""
+Graph Column Store
+Columnar side store for frequently filtered node properties.
+
+This module handles:
+- Keeping a configured set of "hot" properties per node type (e.g. ticket
+  status, category, priority) in dictionary-encoded NumPy arrays
+- Vectorized filtering, masking and counting over all nodes or over a list
+  of node IDs returned by traverse()/get_neighbors()
+
+KnowledgeGraph keeps the store in sync on every node insert and removal;
+see KnowledgeGraph(hot_properties=...).
+"""
+
+from typing import Dict, List, Optional, Any, Iterable, Sequence
+
+import numpy as np
+
+MISSING = -1  # Code for rows without a value (or of another node type)
+
+
+class ColumnStore:
+    """
+    Dictionary-encoded property columns, one row per node of a configured type.
+
+    Each distinct value of a property gets an int32 code; a filter on
+    status='Open' becomes a single comparison over the status code array.
+    Rows of removed nodes are recycled.
+    """
+
+    def __init__(self, hot_properties: Dict[str, Iterable[str]], initial_capacity: int = 1024):
+        """
+        Args:
+            hot_properties: Properties to store per node type, e.g.
+                {'ticket': ['status', 'category', 'priority'], 'ci': ['type']}
+            initial_capacity: Number of rows allocated up front
+        """
+        self.hot_properties = {node_type: tuple(props) for node_type, props in hot_properties.items()}
+        self.row_of: Dict[str, int] = {}
+        self.node_ids: List[Optional[str]] = []
+        self._free_rows: List[int] = []
+
+        self.type_codes = {node_type: code for code, node_type in enumerate(self.hot_properties)}
+        self.types = np.full(initial_capacity, MISSING, dtype=np.int16)
+
+        names = dict.fromkeys(prop for props in self.hot_properties.values() for prop in props)
+        self.columns: Dict[str, np.ndarray] = {
+            prop: np.full(initial_capacity, MISSING, dtype=np.int32) for prop in names
+        }
+        self.value_codes: Dict[str, Dict[Any, int]] = {prop: {} for prop in names}
+        self.values: Dict[str, List[Any]] = {prop: [] for prop in names}
+
+    def __len__(self) -> int:
+        return len(self.row_of)
+
+    def __contains__(self, node_id: str) -> bool:
+        return node_id in self.row_of
+
+    def set_node(self, node_id: str, node_type: Optional[str], properties: Any) -> None:
+        """Store (or overwrite) a node's hot properties; other node types are dropped."""
+        props = self.hot_properties.get(node_type)
+        if props is None:
+            self.remove_node(node_id)
+            return
+
+        row = self.row_of.get(node_id)
+        if row is None:
+            row = self._allocate_row(node_id)
+        self.types[row] = self.type_codes[node_type]
+        for prop, column in self.columns.items():
+            column[row] = self._encode(prop, properties.get(prop)) if prop in props else MISSING
+
+    def remove_node(self, node_id: str) -> None:
+        row = self.row_of.pop(node_id, None)
+        if row is None:
+            return
+        self.types[row] = MISSING
+        for column in self.columns.values():
+            column[row] = MISSING
+        self.node_ids[row] = None
+        self._free_rows.append(row)
+
+    def mask(self, node_ids: Optional[Sequence[str]] = None, node_type: Optional[str] = None,
+             **conditions: Any) -> np.ndarray:
+        """
+        Evaluate a filter as a boolean array.
+
+        Args:
+            node_ids: Nodes to test, in order; None tests every stored row
+            node_type: Optional node type the nodes must have
+            **conditions: property=value, or property=[values] to match any of them
+
+        Returns:
+            Boolean array aligned with node_ids (or with the store's rows)
+        """
+        if node_ids is None:
+            rows = slice(0, len(self.node_ids))
+            result = self.types[rows] != MISSING
+        else:
+            rows = np.fromiter((self.row_of.get(node_id, MISSING) for node_id in node_ids),
+                               dtype=np.int64, count=len(node_ids))
+            result = rows != MISSING
+            rows = np.where(result, rows, 0)
+
+        if node_type is not None:
+            code = self.type_codes.get(node_type, MISSING)
+            result &= self.types[rows] == code
+        for prop, wanted in conditions.items():
+            column = self._column(prop)
+            result &= np.isin(column[rows], self._codes_for(prop, wanted))
+        return result
+
+    def filter(self, node_ids: Optional[Sequence[str]] = None, node_type: Optional[str] = None,
+               **conditions: Any) -> List[str]:
+        """Return the node IDs matching a filter (in input order, or row order)."""
+        matches = np.flatnonzero(self.mask(node_ids, node_type, **conditions))
+        if node_ids is None:
+            return [self.node_ids[row] for row in matches]
+        return [node_ids[i] for i in matches]
+
+    def count_by(self, prop: str, node_ids: Optional[Sequence[str]] = None,
+                 node_type: Optional[str] = None, **conditions: Any) -> Dict[Any, int]:
+        """
+        Count matching nodes per value of a property.
+
+        Returns:
+            Dictionary value -> count, largest first; nodes without a value
+            are counted under None
+        """
+        column = self._column(prop)
+        selected = self.mask(node_ids, node_type, **conditions)
+        if node_ids is None:
+            codes = column[:len(self.node_ids)][selected]
+        else:
+            rows = np.fromiter((self.row_of.get(node_id, 0) for node_id in node_ids),
+                               dtype=np.int64, count=len(node_ids))
+            codes = column[rows[selected]]
+
+        # Shift by one so MISSING (-1) lands in bin 0
+        counts = np.bincount(codes + 1, minlength=len(self.values[prop]) + 1)
+        result = {}
+        for code in np.argsort(-counts, kind='stable'):
+            if counts[code]:
+                result[self.values[prop][code - 1] if code else None] = int(counts[code])
+        return result
+
+    def values_of(self, prop: str) -> List[Any]:
+        """Distinct values seen for a property (including ones no longer in use)."""
+        self._column(prop)
+        return list(self.values[prop])
+
+    def nbytes(self) -> int:
+        return self.types.nbytes + sum(column.nbytes for column in self.columns.values())
+
+    def _column(self, prop: str) -> np.ndarray:
+        column = self.columns.get(prop)
+        if column is None:
+            raise ValueError(f"'{prop}' is not a hot property (configured: {sorted(self.columns)})")
+        return column
+
+    def _encode(self, prop: str, value: Any) -> int:
+        if value is None:
+            return MISSING
+        codes = self.value_codes[prop]
+        try:
+            code = codes.get(value)
+        except TypeError:
+            return MISSING  # Unhashable (list/dict) values are not indexed
+        if code is None:
+            code = codes[value] = len(codes)
+            self.values[prop].append(value)
+        return code
+
+    def _codes_for(self, prop: str, wanted: Any) -> np.ndarray:
+        if isinstance(wanted, (list, tuple, set, frozenset)):
+            candidates = wanted
+        else:
+            candidates = [wanted]
+        codes = self.value_codes[prop]
+        return np.array([codes[value] for value in candidates if value in codes], dtype=np.int32)
+
+    def _allocate_row(self, node_id: str) -> int:
+        if self._free_rows:
+            row = self._free_rows.pop()
+            self.node_ids[row] = node_id
+        else:
+            row = len(self.node_ids)
+            self.node_ids.append(node_id)
+            if row >= len(self.types):
+                self._grow(max(2 * len(self.types), 1024))
+        self.row_of[node_id] = row
+        return row
+
+    def _grow(self, capacity: int) -> None:
+        extra = capacity - len(self.types)
+        self.types = np.concatenate([self.types, np.full(extra, MISSING, dtype=np.int16)])
+        for prop, column in self.columns.items():
+            self.columns[prop] = np.concatenate([column, np.full(extra, MISSING, dtype=np.int32)])
@@ -9,13 +9,33 @@ This module handles:
 - Graph analytics (centrality, communities, etc.)
 """
 
+import bisect
+import heapq
+import itertools
+import math
 import networkx as nx
 import mysql.connector
-from typing import Dict, List, Tuple, Optional, Any
+import mysql.connector.pooling
+from mysql.connector import errorcode
+from typing import Dict, List, Tuple, Optional, Any, Callable, Iterable, Iterator, Union
+import atexit
 import json
-from datetime import datetime
+from collections import Counter, OrderedDict
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+import mmap
+import os
+import sys
+import threading
+import time
+from array import array
+from datetime import datetime, timedelta
 import logging
 
+import numpy as np
+
+from graph_columns import ColumnStore
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -24,6 +44,119 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+try:
+    import orjson  # Optional: several times faster JSON encode/decode for properties
+except ImportError:
+    orjson = None
+
+# Binary snapshot format (see KnowledgeGraph.save_snapshot)
+SNAPSHOT_MAGIC = b'KGSNAP\x00\x01'
+SNAPSHOT_VERSION = 1
+_EPOCH = datetime(1970, 1, 1)
+
+
+
+def json_loads(data: Union[str, bytes, bytearray]) -> Any:
+    """Decode JSON with orjson when installed, else the standard library."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def encode_properties(properties: Any) -> bytes:
+    """
+    Serialize node or edge properties to JSON bytes.
+    
+    Properties that were loaded but never read are passed through as stored,
+    without a decode/encode round trip.
+    """
+    if properties is None:
+        return b''
+    if isinstance(properties, LazyProperties):
+        if properties.raw is not None:
+            raw = properties.raw
+            return raw.encode('utf-8') if isinstance(raw, str) else bytes(raw)
+        properties = dict(properties)
+    if isinstance(properties, str):
+        return properties.encode('utf-8')
+    if isinstance(properties, (bytes, bytearray)):
+        return bytes(properties)
+    if orjson is not None:
+        return orjson.dumps(properties, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(properties).encode('utf-8')
+
+
+class LazyProperties(MutableMapping):
+    """
+    Properties mapping that keeps the stored JSON and decodes it on first use.
+    
+    Loading does not parse the properties column; a node or edge whose
+    properties are never read never pays for json decoding. Behaves like a
+    dict once accessed, and compares equal to the dict it decodes to.
+    """
+    
+    __slots__ = ('_raw', '_data')
+    
+    def __init__(self, raw: Union[str, bytes, bytearray]):
+        self._raw = raw
+        self._data: Optional[Dict[str, Any]] = None
+    
+    @property
+    def raw(self) -> Optional[Union[str, bytes, bytearray]]:
+        """The stored JSON, or None once it has been decoded."""
+        return self._raw
+    
+    def _decoded(self) -> Dict[str, Any]:
+        if self._data is None:
+            self._data = (json_loads(self._raw) if self._raw else None) or {}
+            self._raw = None
+        return self._data
+    
+    def __getitem__(self, key: str) -> Any:
+        return self._decoded()[key]
+    
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._decoded()[key] = value
+    
+    def __delitem__(self, key: str) -> None:
+        del self._decoded()[key]
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._decoded())
+    
+    def __len__(self) -> int:
+        return len(self._decoded())
+    
+    def __repr__(self) -> str:
+        return repr(self._decoded())
+
+
+# Upserts shared by single-row and bulk writes
+NODE_UPSERT_SQL = """
+    INSERT INTO graph_nodes (node_id, node_type, properties)
+    VALUES (%s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        node_type = VALUES(node_type),
+        properties = VALUES(properties),
+        updated_at = CURRENT_TIMESTAMP
+"""
+EDGE_UPSERT_SQL = """
+    INSERT INTO graph_edges (source_id, target_id, edge_type, confidence, properties)
+    VALUES (%s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        confidence = VALUES(confidence),
+        properties = VALUES(properties),
+        updated_at = CURRENT_TIMESTAMP
+"""
+COMMUNITY_UPSERT_SQL = """
+    INSERT INTO graph_communities (node_id, community_id, method)
+    VALUES (%s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        community_id = VALUES(community_id),
+        method = VALUES(method),
+        updated_at = CURRENT_TIMESTAMP
+"""
+
 
 class KnowledgeGraph:
     """
@@ -36,7 +169,13 @@ class KnowledgeGraph:
     - Syncing with MySQL database
     """
     
-    def __init__(self, db_config: Dict[str, str]):
+    def __init__(self, db_config: Dict[str, str], pool_size: int = 5,
+                 pool_recycle: int = 3600, pool_timeout: float = 10.0,
+                 write_behind: bool = False, write_queue_size: int = 10000,
+                 flush_interval: float = 0.5, write_retries: int = 5,
+                 lazy: bool = False, lazy_cache_size: int = 10000,
+                 hot_properties: Optional[Dict[str, List[str]]] = None,
+                 indexed_properties: Optional[Dict[str, List[str]]] = None):
         """
         Initialize knowledge graph manager.
         
@@ -48,81 +187,822 @@ class KnowledgeGraph:
                     'password': 'password',
                     'database': 'ticketportaal'
                 }
+            pool_size: Connections kept in the shared pool (1-32); 0 disables
+                pooling and opens a new connection per operation
+            pool_recycle: Reconnect pooled connections older than this many
+                seconds, before MySQL's wait_timeout drops them
+            pool_timeout: Seconds to wait for a free pooled connection before
+                raising PoolError
+            write_behind: If True, persisted writes are queued and written by a
+                background thread instead of blocking the caller; call flush()
+                or close() to wait for them
+            write_queue_size: Maximum distinct nodes/edges waiting to be
+                written; callers block when the queue is full
+            flush_interval: Seconds the background writer waits to gather a
+                batch before writing
+            write_retries: Attempts the background writer makes at a batch
+                that fails in MySQL (e.g. lock wait timeout, deadlock) before
+                writing it row by row and giving up on the rows that still
+                fail (see take_failed_writes()); a failing connect is retried
+                until it succeeds
+            lazy: If True, get_neighbors(), traverse() and get_similar_nodes()
+                query MySQL on demand instead of needing load_from_db();
+                writes go to MySQL only. Methods that need the whole graph
+                in memory (paths, metrics, analytics, stats, refresh, ...)
+                raise RuntimeError in this mode
+            lazy_cache_size: Maximum adjacency lists and nodes kept in the lazy
+                mode LRU cache
+            hot_properties: Properties to keep in a columnar store per node
+                type for filter_nodes()/property_mask()/count_by(), e.g.
+                {'ticket': ['status', 'category', 'priority']}
+            indexed_properties: Property keys to hash-index per node type for
+                find_nodes(), e.g. {'ticket': ['ticket_number'], 'ci': ['ci_number']}
         """
         self.db_config = db_config
-        self.graph = nx.DiGraph()  # Directed graph for relationships
+        self.pool_size = pool_size
+        self.pool_recycle = pool_recycle
+        self.pool_timeout = pool_timeout
+        self._pool: Optional[mysql.connector.pooling.MySQLConnectionPool] = None
+        self._pool_lock = threading.Lock()
+        self._connection_born: Dict[int, float] = {}  # MySQL connection_id -> connect time
+        # Directed multigraph keyed by edge_type, so one node pair can hold
+        # several relationship types (mirrors the unique_edge key in MySQL)
+        self.graph = nx.MultiDiGraph()
         self._loaded = False
+        self._load_filters: Dict[str, Any] = {'node_types': None, 'min_confidence': 0.0, 'edge_types': None}
+        self._high_water_mark: Optional[datetime] = None  # Latest updated_at seen in the DB
+        self._tombstone_mark: Optional[int] = None  # Latest graph_tombstones id applied
+        # Typed adjacency: node_id -> edge_type -> neighbor_id (dicts used as ordered sets)
+        self._out_index: Dict[str, Dict[str, Dict[str, None]]] = {}
+        self._in_index: Dict[str, Dict[str, Dict[str, None]]] = {}
+        # SIMILAR_TO neighbors in either direction: node_id -> neighbor_id -> best confidence,
+        # plus a per-node list of (-confidence, neighbor_id) sorted on first query
+        self._similar_scores: Dict[str, Dict[str, float]] = {}
+        self._similar_ranked: Dict[str, List[Tuple[float, str]]] = {}
+        # (direction, node_id, edge_type) -> [(-confidence, neighbor_id)], sorted on
+        # first thresholded query and kept sorted as edges change
+        self._ranked_index: Dict[Tuple[str, str, str], List[Tuple[float, str]]] = {}
+        # Counters behind get_stats(); _version changes on every graph mutation
+        self._node_type_counts: Counter = Counter()
+        self._edge_type_counts: Counter = Counter()
+        self._version = 0
+        self._detailed_stats: Optional[Tuple[int, Dict[str, Any]]] = None
+        # Pending writes while inside batch(), keyed so repeated writes coalesce
+        self._batch_depth = 0
+        self._pending_nodes: Dict[str, Tuple[str, str, str]] = {}
+        self._pending_edges: Dict[Tuple[str, str, str], Tuple[str, str, str, float, Optional[str]]] = {}
+        # Write-behind queue: {'nodes': {key: row}, 'edges': {key: row}} drained by _writer
+        self.write_queue_size = write_queue_size
+        self.flush_interval = flush_interval
+        self.write_retries = max(1, write_retries)
+        self._write_cond = threading.Condition()
+        self._queued: Dict[str, Dict[Any, Tuple]] = {'nodes': {}, 'edges': {}}
+        # Rows MySQL rejected and that were given up on, until take_failed_writes()
+        self._failed_writes: Dict[str, Dict[Any, Tuple]] = {'nodes': {}, 'edges': {}}
+        self._write_in_flight = False
+        self._flush_waiters = 0
+        self._closing = False
+        self._writer: Optional[threading.Thread] = None
+        if write_behind:
+            self._start_writer()
+        # Lazy mode: LRU of (kind, node_id) -> fetched row(s), kind in 'out'/'in'/'node'
+        self.lazy = lazy
+        self.lazy_cache_size = lazy_cache_size
+        self._lazy_cache: 'OrderedDict[Tuple[str, str], Any]' = OrderedDict()
+        self._lazy_lock = threading.Lock()
+        # Columnar copy of hot properties, kept in sync by _insert_node/_remove_node
+        self._columns = ColumnStore(hot_properties or {})
+        self._analytics: Optional['GraphAnalytics'] = None
+        # Community labels (detect_communities/load_communities) with a reverse index
+        self._community_of: Dict[str, int] = {}
+        self._community_members: Dict[int, Dict[str, None]] = {}
+        # Secondary indexes: (node_type, property) -> value -> node IDs (dict as ordered set)
+        self._indexed_properties = {node_type: tuple(props)
+                                    for node_type, props in (indexed_properties or {}).items()}
+        self._property_index: Dict[Tuple[str, str], Dict[Any, Dict[str, None]]] = {
+            (node_type, prop): {} for node_type, props in self._indexed_properties.items() for prop in props
+        }
         
     def connect_db(self) -> mysql.connector.MySQLConnection:
-        """Create database connection."""
-        return mysql.connector.connect(**self.db_config)
+        """
+        Get a database connection from the shared pool.
+        
+        The pool is created on first use. Connections are pinged (and
+        reconnected if dropped) on checkout and recycled after pool_recycle
+        seconds. Calling close() on the result returns it to the pool.
+        
+        Raises:
+            mysql.connector.errors.PoolError: If no connection frees up
+                within pool_timeout seconds
+        """
+        if not self.pool_size:
+            return mysql.connector.connect(**self.db_config)
+        
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = mysql.connector.pooling.MySQLConnectionPool(
+                        pool_name=f"knowledge_graph_{id(self):x}",
+                        pool_size=self.pool_size,
+                        pool_reset_session=True,
+                        **self.db_config
+                    )
+                    logger.info(f"Created MySQL connection pool (size {self.pool_size})")
+        
+        deadline = time.monotonic() + self.pool_timeout
+        delay = 0.01
+        while True:
+            try:
+                conn = self._pool.get_connection()
+                break
+            except mysql.connector.errors.PoolError:
+                # All connections are checked out; wait for one to be returned
+                if time.monotonic() >= deadline:
+                    raise
+                time.sleep(delay)
+                delay = min(delay * 2, 0.5)
+        
+        try:
+            self._check_connection(conn)
+        except Exception:
+            conn.close()
+            raise
+        return conn
+    
+    def _check_connection(self, conn: mysql.connector.MySQLConnection) -> None:
+        """Recycle an old pooled connection, or ping it to make sure it is alive."""
+        connection_id = conn.connection_id
+        born = self._connection_born.setdefault(connection_id, time.monotonic())
+        if self.pool_recycle and time.monotonic() - born > self.pool_recycle:
+            conn.reconnect(attempts=3, delay=1)
+        else:
+            conn.ping(reconnect=True, attempts=3, delay=1)
+        
+        if conn.connection_id != connection_id:
+            # Recycled, or ping() had to reconnect a dropped connection
+            self._connection_born.pop(connection_id, None)
+            self._connection_born[conn.connection_id] = time.monotonic()
     
     def load_from_db(self, node_types: Optional[List[str]] = None,
-                     min_confidence: float = 0.0) -> None:
+                     min_confidence: float = 0.0,
+                     batch_size: int = 5000,
+                     progress_callback: Optional[Callable[[str, int], None]] = None,
+                     edge_types: Optional[List[str]] = None) -> None:
         """
         Load graph data from MySQL into NetworkX.
         
+        Rows are streamed through an unbuffered cursor in batches of
+        batch_size and inserted into the graph as they arrive, so the full
+        result set is never held in memory next to the graph.
+        
+        With node_types, only edges whose source and target both have one of
+        those types are loaded (filtered in SQL), so the result is the induced
+        subgraph without attribute-less endpoint nodes.
+        
         Args:
             node_types: Optional filter for specific node types (e.g., ['ticket', 'user'])
             min_confidence: Minimum confidence threshold for edges (0.0-1.0)
+            batch_size: Number of rows fetched from the server per round-trip
+            progress_callback: Optional callable invoked after every batch with
+                the load phase ('nodes' or 'edges') and the rows loaded so far
+            edge_types: Optional filter for specific edge types (e.g., ['AFFECTS'])
         """
+        self._require_graph('load_from_db')
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        
         logger.info("Loading knowledge graph from database...")
         
         conn = self.connect_db()
-        cursor = conn.cursor(dictionary=True)
+        cursor = conn.cursor(dictionary=True, buffered=False)
         
         try:
             # Load nodes
-            node_query = "SELECT node_id, node_type, properties, created_at FROM graph_nodes"
-            if node_types:
-                placeholders = ','.join(['%s'] * len(node_types))
-                node_query += f" WHERE node_type IN ({placeholders})"
-                cursor.execute(node_query, node_types)
-            else:
-                cursor.execute(node_query)
+            cursor.execute(*self._node_query(node_types))
             
-            nodes = cursor.fetchall()
-            for node in nodes:
-                properties = json.loads(node['properties']) if isinstance(node['properties'], str) else node['properties']
-                self.graph.add_node(
-                    node['node_id'],
-                    node_type=node['node_type'],
-                    properties=properties,
-                    created_at=node['created_at']
-                )
+            node_count = 0
+            for node in self._stream_rows(cursor, batch_size, 'nodes', progress_callback):
+                self._load_node_row(node)
+                node_count += 1
             
-            logger.info(f"Loaded {len(nodes)} nodes")
+            logger.info(f"Loaded {node_count} nodes")
             
             # Load edges
-            edge_query = """
-                SELECT edge_id, source_id, target_id, edge_type, confidence, properties
-                FROM graph_edges
-                WHERE confidence >= %s
-            """
-            cursor.execute(edge_query, (min_confidence,))
+            cursor.execute(*self._edge_query(min_confidence, node_types, edge_types))
             
-            edges = cursor.fetchall()
-            for edge in edges:
-                properties = json.loads(edge['properties']) if edge['properties'] and isinstance(edge['properties'], str) else (edge['properties'] or {})
-                self.graph.add_edge(
-                    edge['source_id'],
-                    edge['target_id'],
-                    edge_id=edge['edge_id'],
-                    edge_type=edge['edge_type'],
-                    confidence=float(edge['confidence']),
-                    properties=properties
-                )
+            edge_count = 0
+            for edge in self._stream_rows(cursor, batch_size, 'edges', progress_callback):
+                self._load_edge_row(edge)
+                edge_count += 1
             
-            logger.info(f"Loaded {len(edges)} edges (min_confidence={min_confidence})")
+            logger.info(f"Loaded {edge_count} edges (min_confidence={min_confidence})")
+            self._load_filters = {'node_types': node_types, 'min_confidence': min_confidence,
+                                  'edge_types': edge_types}
             self._loaded = True
             
         except Exception as e:
             logger.error(f"Error loading graph from database: {e}")
             raise
         finally:
-            cursor.close()
+            self._close_streaming(cursor, conn)
+    
+    def _node_query(self, node_types: Optional[List[str]], since: Optional[datetime] = None,
+                    columns: str = 'node_id, node_type, properties, created_at, updated_at'
+                    ) -> Tuple[str, List[Any]]:
+        """Build the graph_nodes query and parameters for a load, refresh or reconcile."""
+        conditions = []
+        params: List[Any] = []
+        if node_types:
+            conditions.append(f"node_type IN ({','.join(['%s'] * len(node_types))})")
+            params.extend(node_types)
+        if since is not None:
+            conditions.append("updated_at >= %s")
+            params.append(since)
+        
+        query = f"SELECT {columns} FROM graph_nodes"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        return query, params
+    
+    def _edge_query(self, min_confidence: Optional[float], node_types: Optional[List[str]] = None,
+                    edge_types: Optional[List[str]] = None, since: Optional[datetime] = None,
+                    columns: str = 'e.edge_id, e.source_id, e.target_id, e.edge_type, '
+                                   'e.confidence, e.properties, e.updated_at'
+                    ) -> Tuple[str, List[Any]]:
+        """
+        Build the graph_edges query and parameters for a load, refresh or reconcile.
+        
+        A node_types filter is applied to both endpoints by joining
+        graph_nodes, so only edges inside the loaded subgraph are returned.
+        min_confidence=None returns edges of any confidence.
+        """
+        query = f"SELECT {columns} FROM graph_edges e"
+        conditions = []
+        params: List[Any] = []
+        if node_types:
+            placeholders = ','.join(['%s'] * len(node_types))
+            query += f"""
+                JOIN graph_nodes s ON s.node_id = e.source_id AND s.node_type IN ({placeholders})
+                JOIN graph_nodes t ON t.node_id = e.target_id AND t.node_type IN ({placeholders})"""
+            params.extend(node_types)
+            params.extend(node_types)
+        if min_confidence is not None:
+            conditions.append("e.confidence >= %s")
+            params.append(min_confidence)
+        if edge_types:
+            conditions.append(f"e.edge_type IN ({','.join(['%s'] * len(edge_types))})")
+            params.extend(edge_types)
+        if since is not None:
+            conditions.append("e.updated_at >= %s")
+            params.append(since)
+        
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        return query, params
+    
+    def to_compact(self) -> 'CompactKnowledgeGraph':
+        """
+        Build a read-only, array-backed copy of the in-memory graph.
+        
+        Returns:
+            CompactKnowledgeGraph with the same nodes and edges
+        """
+        self._require_graph('to_compact')
+        from compact_knowledge_graph import CompactKnowledgeGraph
+        return CompactKnowledgeGraph.from_knowledge_graph(self)
+    
+    def refresh(self, batch_size: int = 5000, reconcile: bool = False) -> Dict[str, int]:
+        """
+        Apply changes made in MySQL since the last load or refresh.
+        
+        Only rows with updated_at at or after the recorded high-water mark are
+        fetched, using the same node_types/min_confidence filters as the
+        original load. Deletions are read from the graph_tombstones table
+        (migration 008); each tombstone is applied once, tracked by its id,
+        so one that shares a second with the high-water mark does not remove
+        a node re-created in that second on every later refresh. With reconcile=True the node and edge keys are also
+        compared against the database, which catches deletions made before
+        the tombstone triggers existed or edges removed by ON DELETE CASCADE
+        on a node outside the loaded node_types. Edges and nodes that exist
+        only in memory (persist=False) are removed by reconciliation.
+        
+        Args:
+            batch_size: Number of rows fetched from the server per round-trip
+            reconcile: If True, also run a full key reconciliation pass
+        
+        Returns:
+            Dictionary with counts of updated and deleted nodes and edges
+        """
+        self._require_graph('refresh')
+        if not self._loaded:
+            logger.info("Graph not loaded yet, performing full load instead of refresh")
+            self.load_from_db(batch_size=batch_size)
+            return {'nodes_updated': self.graph.number_of_nodes(),
+                    'edges_updated': self.graph.number_of_edges(),
+                    'nodes_deleted': 0, 'edges_deleted': 0}
+        
+        node_types = self._load_filters['node_types']
+        min_confidence = self._load_filters['min_confidence']
+        edge_types = self._load_filters['edge_types']
+        since = self._high_water_mark or datetime(1970, 1, 1)
+        counts = {'nodes_updated': 0, 'edges_updated': 0, 'nodes_deleted': 0, 'edges_deleted': 0}
+        
+        conn = self.connect_db()
+        cursor = conn.cursor(dictionary=True, buffered=False)
+        
+        try:
+            # Apply deletions first so a node deleted and re-created since the
+            # last refresh ends up present. Until a tombstone has been applied
+            # there is no id to continue from, so the first refresh selects by time
+            if self._tombstone_mark is None:
+                condition, params = "deleted_at >= %s", (since,)
+            else:
+                condition, params = "tombstone_id > %s", (self._tombstone_mark,)
+            try:
+                cursor.execute(f"""
+                    SELECT tombstone_id, entity_type, node_id, source_id, target_id, edge_type, deleted_at
+                    FROM graph_tombstones
+                    WHERE {condition}
+                    ORDER BY tombstone_id
+                """, params)
+                for tombstone in self._stream_rows(cursor, batch_size, 'tombstones', None):
+                    if tombstone['entity_type'] == 'node':
+                        if self._remove_node(tombstone['node_id']):
+                            counts['nodes_deleted'] += 1
+                    elif self._remove_edge(tombstone['source_id'], tombstone['target_id'],
+                                           tombstone['edge_type']):
+                        counts['edges_deleted'] += 1
+                    self._tombstone_mark = tombstone['tombstone_id']
+                    self._advance_high_water_mark(tombstone['deleted_at'])
+            except mysql.connector.Error as e:
+                if e.errno != errorcode.ER_NO_SUCH_TABLE:
+                    raise
+                logger.warning("graph_tombstones table not found (run migration 008); "
+                               "deletions are only picked up with reconcile=True")
+            
+            # Changed nodes
+            cursor.execute(*self._node_query(node_types, since=since))
+            for node in self._stream_rows(cursor, batch_size, 'nodes', None):
+                self._load_node_row(node)
+                counts['nodes_updated'] += 1
+            
+            # Changed edges; rows that dropped below min_confidence are removed
+            cursor.execute(*self._edge_query(None, node_types, edge_types, since=since))
+            for edge in self._stream_rows(cursor, batch_size, 'edges', None):
+                if float(edge['confidence']) >= min_confidence:
+                    self._load_edge_row(edge)
+                    counts['edges_updated'] += 1
+                else:
+                    if self._remove_edge(edge['source_id'], edge['target_id'], edge['edge_type']):
+                        counts['edges_deleted'] += 1
+                    self._advance_high_water_mark(edge['updated_at'])
+            
+            if reconcile:
+                nodes_deleted, edges_deleted = self._reconcile(cursor, batch_size)
+                counts['nodes_deleted'] += nodes_deleted
+                counts['edges_deleted'] += edges_deleted
+            
+        except Exception as e:
+            logger.error(f"Error refreshing graph from database: {e}")
+            raise
+        finally:
+            self._close_streaming(cursor, conn)
+        
+        logger.info(f"Refreshed graph: {counts}")
+        return counts
+    
+    def _reconcile(self, cursor, batch_size: int) -> Tuple[int, int]:
+        """Remove nodes and edges that no longer exist in MySQL."""
+        filters = self._load_filters
+        
+        cursor.execute(*self._node_query(filters['node_types'], columns='node_id'))
+        db_nodes = {row['node_id'] for row in self._stream_rows(cursor, batch_size, 'reconcile', None)}
+        
+        cursor.execute(*self._edge_query(filters['min_confidence'], filters['node_types'],
+                                         filters['edge_types'],
+                                         columns='e.source_id, e.target_id, e.edge_type'))
+        db_edges = {(row['source_id'], row['target_id'], row['edge_type'])
+                    for row in self._stream_rows(cursor, batch_size, 'reconcile', None)}
+        
+        stale_edges = [edge for edge in self.graph.edges(keys=True) if edge not in db_edges]
+        edges_deleted = sum(1 for edge in stale_edges if self._remove_edge(*edge))
+        
+        # Endpoints of loaded edges may sit outside the node_types filter
+        stale_nodes = [node_id for node_id, data in self.graph.nodes(data=True)
+                       if node_id not in db_nodes and 'node_type' in data]
+        nodes_deleted = sum(1 for node_id in stale_nodes if self._remove_node(node_id))
+        
+        return nodes_deleted, edges_deleted
+    
+    def _advance_high_water_mark(self, timestamp: Optional[datetime]) -> None:
+        """Move the high-water mark forward to timestamp if it is newer."""
+        if timestamp is not None and (self._high_water_mark is None or timestamp > self._high_water_mark):
+            self._high_water_mark = timestamp
+    
+    def _insert_node(self, node_id: str, node_type: str, properties: Dict[str, Any],
+                     created_at: Optional[datetime]) -> None:
+        """Add or update a node in the graph, the node type counters and property indexes."""
+        if self.graph.has_node(node_id):
+            old = self.graph.nodes[node_id]
+            self._decrement(self._node_type_counts, old.get('node_type', 'unknown'))
+            self._unindex_properties(node_id, old.get('node_type'), old.get('properties'))
+        self._node_type_counts[node_type] += 1
+        for prop in self._indexed_properties.get(node_type, ()):
+            value = properties.get(prop)
+            if value is None:
+                continue
+            try:
+                self._property_index[(node_type, prop)].setdefault(value, {})[node_id] = None
+            except TypeError:
+                pass  # Unhashable values are not indexed
+        self.graph.add_node(node_id, node_type=node_type, properties=properties, created_at=created_at)
+        self._columns.set_node(node_id, node_type, properties)
+        self._version += 1
+    
+    def _unindex_properties(self, node_id: str, node_type: Optional[str],
+                            properties: Optional[Dict[str, Any]]) -> None:
+        """Drop a node from the secondary property indexes."""
+        for prop in self._indexed_properties.get(node_type, ()):
+            by_value = self._property_index[(node_type, prop)]
+            try:
+                nodes = by_value.get(properties.get(prop))
+            except TypeError:
+                continue
+            if nodes is not None:
+                nodes.pop(node_id, None)
+                if not nodes:
+                    del by_value[properties.get(prop)]
+    
+    def _ensure_node(self, node_id: str) -> None:
+        """Create an attribute-less node for an edge endpoint that was not loaded."""
+        if not self.graph.has_node(node_id):
+            self._node_type_counts['unknown'] += 1
+            self.graph.add_node(node_id)
+            self._version += 1
+    
+    @staticmethod
+    def _decrement(counter: Counter, key: str, amount: int = 1) -> None:
+        counter[key] -= amount
+        if counter[key] <= 0:
+            del counter[key]
+    
+    def _insert_edge(self, source_id: str, target_id: str, edge_type: str,
+                     confidence: float, properties: Dict[str, Any],
+                     edge_id: Optional[int] = None) -> None:
+        """Add or update an edge in the graph and the typed adjacency indexes."""
+        attrs = {'edge_type': edge_type, 'confidence': confidence, 'properties': properties}
+        if edge_id is not None:
+            attrs['edge_id'] = edge_id
+        self._ensure_node(source_id)
+        self._ensure_node(target_id)
+        previous = None
+        if self.graph.has_edge(source_id, target_id, key=edge_type):
+            previous = self.graph[source_id][target_id][edge_type].get('confidence', 1.0)
+        else:
+            self._edge_type_counts[edge_type] += 1
+        self.graph.add_edge(source_id, target_id, key=edge_type, **attrs)
+        self._version += 1
+        
+        self._out_index.setdefault(source_id, {}).setdefault(edge_type, {})[target_id] = None
+        self._in_index.setdefault(target_id, {}).setdefault(edge_type, {})[source_id] = None
+        self._rerank_edge(source_id, target_id, edge_type, previous, confidence)
+        if edge_type == 'SIMILAR_TO':
+            self._update_similar(source_id, target_id)
+    
+    def _unindex_edge(self, source_id: str, target_id: str, edge_type: Optional[str]) -> None:
+        """Drop an edge from the typed adjacency indexes (call before removing it from the graph)."""
+        if self.graph.has_edge(source_id, target_id, key=edge_type):
+            previous = self.graph[source_id][target_id][edge_type].get('confidence', 1.0)
+            self._rerank_edge(source_id, target_id, edge_type, previous, None)
+        for index, node_id, neighbor in ((self._out_index, source_id, target_id),
+                                         (self._in_index, target_id, source_id)):
+            by_type = index.get(node_id)
+            if by_type is None or edge_type not in by_type:
+                continue
+            by_type[edge_type].pop(neighbor, None)
+            if not by_type[edge_type]:
+                del by_type[edge_type]
+    
+    def _rerank_edge(self, source_id: str, target_id: str, edge_type: str,
+                     previous: Optional[float], confidence: Optional[float]) -> None:
+        """Move an edge within the sorted ranked lists of both endpoints (None = absent)."""
+        for key, neighbor in ((('out', source_id, edge_type), target_id),
+                              (('in', target_id, edge_type), source_id)):
+            ranked = self._ranked_index.get(key)
+            if ranked is None:
+                continue
+            if previous is not None:
+                del ranked[bisect.bisect_left(ranked, (-previous, neighbor))]
+            if confidence is not None:
+                bisect.insort(ranked, (-confidence, neighbor))
+            elif not ranked:
+                del self._ranked_index[key]
+    
+    def _update_similar(self, node_a: str, node_b: str) -> None:
+        """Re-derive the SIMILAR_TO score between two nodes in both their similarity lists."""
+        if node_a == node_b:
+            return
+        scores = [self.graph[u][v]['SIMILAR_TO'].get('confidence', 0.0)
+                  for u, v in ((node_a, node_b), (node_b, node_a))
+                  if self.graph.has_edge(u, v, key='SIMILAR_TO')]
+        confidence = max(scores) if scores else None
+        
+        for node_id, other in ((node_a, node_b), (node_b, node_a)):
+            node_scores = self._similar_scores.setdefault(node_id, {})
+            previous = node_scores.pop(other, None)
+            ranked = self._similar_ranked.get(node_id)
+            if ranked is not None and previous is not None:
+                del ranked[bisect.bisect_left(ranked, (-previous, other))]
+            if confidence is not None:
+                node_scores[other] = confidence
+                if ranked is not None:
+                    bisect.insort(ranked, (-confidence, other))
+            if not node_scores:
+                del self._similar_scores[node_id]
+                self._similar_ranked.pop(node_id, None)
+    
+    def _remove_node(self, node_id: str) -> bool:
+        """Remove a node and its edges from the in-memory graph."""
+        if not self.graph.has_node(node_id):
+            return False
+        incident = set(self.graph.out_edges(node_id, keys=True))
+        incident.update(self.graph.in_edges(node_id, keys=True))
+        for source, target, edge_type in incident:
+            self._unindex_edge(source, target, edge_type)
+            self._decrement(self._edge_type_counts, edge_type)
+        self._decrement(self._node_type_counts, self.graph.nodes[node_id].get('node_type', 'unknown'))
+        self._columns.remove_node(node_id)
+        node_data = self.graph.nodes[node_id]
+        self._unindex_properties(node_id, node_data.get('node_type'), node_data.get('properties'))
+        self._out_index.pop(node_id, None)
+        self._in_index.pop(node_id, None)
+        self._drop_community(node_id)
+        self.graph.remove_node(node_id)
+        self._version += 1
+        for other in list(self._similar_scores.get(node_id, ())):
+            self._update_similar(node_id, other)
+        return True
+    
+    def _remove_edge(self, source_id: str, target_id: str, edge_type: str) -> bool:
+        """Remove the edge of the given type between two nodes from the in-memory graph."""
+        if not self.graph.has_edge(source_id, target_id, key=edge_type):
+            return False
+        self._unindex_edge(source_id, target_id, edge_type)
+        self._decrement(self._edge_type_counts, edge_type)
+        self.graph.remove_edge(source_id, target_id, key=edge_type)
+        self._version += 1
+        if edge_type == 'SIMILAR_TO':
+            self._update_similar(source_id, target_id)
+        return True
+    
+    def save_snapshot(self, path: str) -> None:
+        """
+        Write the in-memory graph to a compact binary snapshot file.
+        
+        Layout: magic, a small JSON header (counts, high-water mark, load
+        filters, section table) and 8-byte aligned sections holding interned
+        node ids, integer edge arrays and pre-serialized JSON properties.
+        The file is written next to path and renamed into place, so readers
+        never see a partial snapshot.
+        
+        Args:
+            path: Destination file path
+        """
+        self._require_graph('save_snapshot')
+        node_index: Dict[str, int] = {}
+        type_codes: Dict[Optional[str], int] = {}
+        node_ids, node_props = bytearray(), bytearray()
+        node_id_offsets, node_props_offsets = array('q', [0]), array('q', [0])
+        node_type_codes, node_created_at = array('H'), array('d')
+        
+        for node_id, data in self.graph.nodes(data=True):
+            node_index[node_id] = len(node_index)
+            node_ids += node_id.encode('utf-8')
+            node_id_offsets.append(len(node_ids))
+            node_type_codes.append(type_codes.setdefault(data.get('node_type'), len(type_codes)))
+            created_at = data.get('created_at')
+            node_created_at.append((created_at - _EPOCH).total_seconds() if created_at else float('nan'))
+            node_props += encode_properties(data.get('properties', {}))
+            node_props_offsets.append(len(node_props))
+        
+        edge_type_codes: Dict[Optional[str], int] = {}
+        edge_sources, edge_targets = array('I'), array('I')
+        edge_types, edge_confidence, edge_ids = array('H'), array('d'), array('q')
+        edge_props, edge_props_offsets = bytearray(), array('q', [0])
+        
+        for source, target, data in self.graph.edges(data=True):
+            edge_sources.append(node_index[source])
+            edge_targets.append(node_index[target])
+            edge_types.append(edge_type_codes.setdefault(data.get('edge_type'), len(edge_type_codes)))
+            edge_confidence.append(data.get('confidence', 1.0))
+            edge_id = data.get('edge_id')
+            edge_ids.append(edge_id if edge_id is not None else -1)
+            encoded = encode_properties(data.get('properties'))
+            if encoded != b'{}':
+                edge_props += encoded
+            edge_props_offsets.append(len(edge_props))
+        
+        sections = [
+            ('node_id_offsets', node_id_offsets), ('node_ids', node_ids),
+            ('node_type_codes', node_type_codes), ('node_created_at', node_created_at),
+            ('node_props_offsets', node_props_offsets), ('node_props', node_props),
+            ('edge_sources', edge_sources), ('edge_targets', edge_targets),
+            ('edge_type_codes', edge_types), ('edge_confidence', edge_confidence),
+            ('edge_ids', edge_ids),
+            ('edge_props_offsets', edge_props_offsets), ('edge_props', edge_props),
+        ]
+        
+        # Section offsets are relative to the end of the header block
+        section_table = {}
+        offset = 0
+        for name, data in sections:
+            length = len(data) * (data.itemsize if isinstance(data, array) else 1)
+            section_table[name] = [offset, length, data.typecode if isinstance(data, array) else 'B']
+            offset += length + (-length % 8)
+        
+        header = json.dumps({
+            'version': SNAPSHOT_VERSION,
+            'byteorder': sys.byteorder,
+            'node_count': len(node_index),
+            'edge_count': len(edge_sources),
+            'node_types': list(type_codes),
+            'edge_types': list(edge_type_codes),
+            'high_water_mark': self._high_water_mark.isoformat() if self._high_water_mark else None,
+            'tombstone_mark': self._tombstone_mark,
+            'load_filters': self._load_filters,
+            'sections': section_table,
+        }).encode('utf-8')
+        header += b' ' * (-(len(SNAPSHOT_MAGIC) + 4 + len(header)) % 8)
+        
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        with open(tmp_path, 'wb') as f:
+            f.write(SNAPSHOT_MAGIC)
+            f.write(len(header).to_bytes(4, 'little'))
+            f.write(header)
+            for name, data in sections:
+                f.write(data)
+                f.write(b'\x00' * (-section_table[name][1] % 8))
+        os.replace(tmp_path, path)
+        
+        logger.info(f"Saved snapshot with {len(node_index)} nodes and "
+                    f"{len(edge_sources)} edges to {path}")
+    
+    def load_snapshot(self, path: str, refresh: bool = True) -> None:
+        """
+        Load the graph from a snapshot written by save_snapshot.
+        
+        The file is memory-mapped and its arrays are read in place. With
+        refresh=True the snapshot is then topped up from MySQL with every
+        change since the high-water mark stored in the snapshot; if the
+        database is unreachable the snapshot is used as-is.
+        
+        Args:
+            path: Snapshot file path
+            refresh: If True, apply the database delta after loading
+        """
+        self._require_graph('load_snapshot')
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if mm[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+                raise ValueError(f"{path} is not a knowledge graph snapshot")
+            header_start = len(SNAPSHOT_MAGIC) + 4
+            header_len = int.from_bytes(mm[len(SNAPSHOT_MAGIC):header_start], 'little')
+            header = json.loads(mm[header_start:header_start + header_len])
+            if header['version'] != SNAPSHOT_VERSION or header['byteorder'] != sys.byteorder:
+                raise ValueError(f"Unsupported snapshot format in {path}")
+            
+            data_start = header_start + header_len
+            buffer = memoryview(mm)
+            views = [buffer]
+            
+            def section(name: str) -> memoryview:
+                offset, length, typecode = header['sections'][name]
+                view = buffer[data_start + offset:data_start + offset + length]
+                views.append(view)
+                if typecode != 'B':
+                    view = view.cast(typecode)
+                    views.append(view)
+                return view
+            
+            try:
+                id_offsets, id_blob = section('node_id_offsets'), section('node_ids')
+                type_codes, created_at = section('node_type_codes'), section('node_created_at')
+                props_offsets, props_blob = section('node_props_offsets'), section('node_props')
+                node_ids = []
+                
+                for i in range(header['node_count']):
+                    node_id = bytes(id_blob[id_offsets[i]:id_offsets[i + 1]]).decode('utf-8')
+                    node_ids.append(node_id)
+                    node_type = header['node_types'][type_codes[i]]
+                    if node_type is None:
+                        # Endpoint of a loaded edge outside the node_types filter
+                        self._ensure_node(node_id)
+                        continue
+                    seconds = created_at[i]
+                    self._load_node_row({
+                        'node_id': node_id,
+                        'node_type': node_type,
+                        'properties': bytes(props_blob[props_offsets[i]:props_offsets[i + 1]]),
+                        'created_at': _EPOCH + timedelta(seconds=seconds) if seconds == seconds else None,
+                    })
+                
+                sources, targets = section('edge_sources'), section('edge_targets')
+                edge_types, confidence = section('edge_type_codes'), section('edge_confidence')
+                edge_ids = section('edge_ids')
+                props_offsets, props_blob = section('edge_props_offsets'), section('edge_props')
+                
+                for i in range(header['edge_count']):
+                    self._load_edge_row({
+                        'edge_id': edge_ids[i] if edge_ids[i] >= 0 else None,
+                        'source_id': node_ids[sources[i]],
+                        'target_id': node_ids[targets[i]],
+                        'edge_type': header['edge_types'][edge_types[i]],
+                        'confidence': confidence[i],
+                        'properties': bytes(props_blob[props_offsets[i]:props_offsets[i + 1]]) or None,
+                    })
+            finally:
+                for view in reversed(views):
+                    view.release()
+        
+        if header['high_water_mark']:
+            self._advance_high_water_mark(datetime.fromisoformat(header['high_water_mark']))
+        if header.get('tombstone_mark') is not None:
+            self._tombstone_mark = max(self._tombstone_mark or 0, header['tombstone_mark'])
+        # Snapshots written before edge_types filtering lack that key
+        self._load_filters = {'edge_types': None, **header['load_filters']}
+        self._loaded = True
+        logger.info(f"Loaded snapshot with {header['node_count']} nodes and "
+                    f"{header['edge_count']} edges from {path}")
+        
+        if refresh:
+            try:
+                self.refresh()
+            except mysql.connector.Error as e:
+                logger.warning(f"Could not refresh snapshot from database, using snapshot as-is: {e}")
+    
+    def _require_graph(self, method: str) -> None:
+        """Refuse a method that reads the in-memory graph, which stays empty in lazy mode."""
+        if self.lazy:
+            raise RuntimeError(f"{method}() needs the graph in memory and is not supported with "
+                               f"lazy=True; use a KnowledgeGraph without lazy for it")
+    
+    @staticmethod
+    def _close_streaming(cursor, conn: mysql.connector.MySQLConnection) -> None:
+        """
+        Close an unbuffered cursor and return its connection, even mid-stream.
+        
+        With rows still unread (a load that failed part-way), cursor.close()
+        raises "Unread result found", which would hide the original error and
+        keep the connection out of the pool; the rest of the result is
+        discarded first and the connection is closed in any case.
+        """
+        try:
+            try:
+                conn.consume_results()
+            except Exception as e:
+                logger.debug(f"Could not discard unread rows: {e}")
+            try:
+                cursor.close()
+            except Exception as e:
+                logger.warning(f"Error closing cursor: {e}")
+        finally:
             conn.close()
     
+    def _stream_rows(self, cursor, batch_size: int, phase: str,
+                     progress_callback: Optional[Callable[[str, int], None]]) -> Iterator[Dict[str, Any]]:
+        """Yield rows from an executed cursor, fetching batch_size rows at a time."""
+        loaded = 0
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from rows
+            loaded += len(rows)
+            if progress_callback:
+                progress_callback(phase, loaded)
+    
+    def _load_node_row(self, node: Dict[str, Any]) -> None:
+        """Insert a graph_nodes row into the in-memory graph."""
+        properties = node['properties']
+        if isinstance(properties, (str, bytes, bytearray)):
+            properties = LazyProperties(properties)
+        self._insert_node(node['node_id'], node['node_type'], properties, node['created_at'])
+        self._advance_high_water_mark(node.get('updated_at'))
+    
+    def _load_edge_row(self, edge: Dict[str, Any]) -> None:
+        """Insert a graph_edges row into the in-memory graph."""
+        properties = edge['properties'] or {}
+        if isinstance(properties, (str, bytes, bytearray)):
+            properties = LazyProperties(properties)
+        self._insert_edge(
+            edge['source_id'],
+            edge['target_id'],
+            edge['edge_type'],
+            float(edge['confidence']),
+            properties,
+            edge_id=edge['edge_id']
+        )
+        self._advance_high_water_mark(edge.get('updated_at'))
+    
     def add_node(self, node_id: str, node_type: str, properties: Dict[str, Any],
                  persist: bool = True) -> None:
         """
@@ -134,12 +1014,10 @@ class KnowledgeGraph:
             properties: Dictionary of node attributes
             persist: If True, save to MySQL database
         """
-        self.graph.add_node(
-            node_id,
-            node_type=node_type,
-            properties=properties,
-            created_at=datetime.now()
-        )
+        if self.lazy:
+            self._lazy_invalidate([node_id])
+        else:
+            self._insert_node(node_id, node_type, properties, datetime.now())
         
         if persist:
             self._persist_node(node_id, node_type, properties)
@@ -158,6 +1036,13 @@ class KnowledgeGraph:
             properties: Optional edge metadata
             persist: If True, save to MySQL database
         """
+        if self.lazy:
+            # No in-memory graph to validate against; MySQL enforces the foreign keys
+            self._lazy_invalidate([source_id, target_id])
+            if persist:
+                self._persist_edge(source_id, target_id, edge_type, confidence, properties)
+            return
+        
         if not self.graph.has_node(source_id):
             logger.warning(f"Source node {source_id} not found in graph")
             return
@@ -166,19 +1051,308 @@ class KnowledgeGraph:
             logger.warning(f"Target node {target_id} not found in graph")
             return
         
-        self.graph.add_edge(
-            source_id,
-            target_id,
-            edge_type=edge_type,
-            confidence=confidence,
-            properties=properties or {}
-        )
+        self._insert_edge(source_id, target_id, edge_type, confidence, properties or {})
         
         if persist:
             self._persist_edge(source_id, target_id, edge_type, confidence, properties)
     
+    def add_nodes_bulk(self, nodes: Iterable[Tuple[str, str, Dict[str, Any]]],
+                       persist: bool = True, chunk_size: int = 1000) -> int:
+        """
+        Add or update many nodes, persisting them in chunked transactions.
+        
+        Args:
+            nodes: Iterable of (node_id, node_type, properties) tuples
+            persist: If True, save to MySQL database
+            chunk_size: Rows per executemany call and commit
+        
+        Returns:
+            Number of nodes added or updated
+        """
+        rows = {}
+        now = datetime.now()
+        for node_id, node_type, properties in nodes:
+            if not self.lazy:
+                self._insert_node(node_id, node_type, properties, now)
+            # Only build the upsert row (JSON encoding) when it will be written
+            rows[node_id] = (node_id, node_type, self._properties_json(properties)) if persist else None
+        if self.lazy:
+            self._lazy_invalidate(rows)
+        
+        if persist:
+            self._queue_writes(rows, {}, chunk_size)
+        return len(rows)
+    
+    def add_edges_bulk(self, edges: Iterable[Tuple], persist: bool = True,
+                       chunk_size: int = 1000) -> int:
+        """
+        Add or update many edges, persisting them in chunked transactions.
+        
+        Edges whose endpoints are not in the graph are skipped, as in add_edge().
+        
+        Args:
+            edges: Iterable of (source_id, target_id, edge_type[, confidence[, properties]])
+                tuples; confidence defaults to 1.0
+            persist: If True, save to MySQL database
+            chunk_size: Rows per executemany call and commit
+        
+        Returns:
+            Number of edges added or updated
+        """
+        rows = {}
+        skipped = 0
+        for edge in edges:
+            source_id, target_id, edge_type = edge[:3]
+            confidence = edge[3] if len(edge) > 3 else 1.0
+            properties = edge[4] if len(edge) > 4 else None
+            if self.lazy:
+                self._lazy_invalidate([source_id, target_id])
+            elif not (self.graph.has_node(source_id) and self.graph.has_node(target_id)):
+                skipped += 1
+                continue
+            else:
+                self._insert_edge(source_id, target_id, edge_type, confidence, properties or {})
+            rows[(source_id, target_id, edge_type)] = (
+                source_id, target_id, edge_type, confidence,
+                self._properties_json(properties) if properties else None
+            ) if persist else None
+        
+        if skipped:
+            logger.warning(f"Skipped {skipped} edges with endpoints not found in graph")
+        
+        if persist:
+            self._queue_writes({}, rows, chunk_size)
+        return len(rows)
+    
+    @contextmanager
+    def batch(self, chunk_size: int = 1000) -> Iterator['KnowledgeGraph']:
+        """
+        Buffer persisted writes and flush them together on exit.
+        
+        Inside the block add_node(), add_edge() and the bulk methods update
+        the in-memory graph immediately, but their MySQL writes are collected
+        (later writes to the same node or edge replace earlier ones) and sent
+        as chunked executemany upserts when the outermost block exits. Nodes
+        are written before edges so foreign keys are satisfied.
+        
+        Example:
+            with kg.batch():
+                for ticket in tickets:
+                    kg.add_node(f"ticket_{ticket['id']}", 'ticket', {...})
+                    kg.add_edge(f"ticket_{ticket['id']}", f"user_{ticket['user_id']}", 'CREATED_BY')
+        
+        Args:
+            chunk_size: Rows per executemany call and commit
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._flush_batch(chunk_size)
+    
+    def _flush_batch(self, chunk_size: int = 1000) -> None:
+        """Hand the writes buffered by batch() on to the writer (or MySQL)."""
+        nodes, self._pending_nodes = self._pending_nodes, {}
+        edges, self._pending_edges = self._pending_edges, {}
+        depth, self._batch_depth = self._batch_depth, 0
+        try:
+            self._queue_writes(nodes, edges, chunk_size)
+        finally:
+            self._batch_depth = depth
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Write all buffered and queued writes to MySQL and wait for them.
+        
+        Args:
+            timeout: Maximum seconds to wait for the write-behind queue to drain
+        
+        Returns:
+            True if everything was written; False if the timeout expired or
+            MySQL rejected rows that have not been collected with
+            take_failed_writes() yet
+        """
+        self._flush_batch()
+        with self._write_cond:
+            if self._writer is not None:
+                self._flush_waiters += 1
+                self._write_cond.notify_all()
+                try:
+                    if not self._write_cond.wait_for(
+                        lambda: not self._queued_count() and not self._write_in_flight, timeout
+                    ):
+                        return False
+                finally:
+                    self._flush_waiters -= 1
+            return not (self._failed_writes['nodes'] or self._failed_writes['edges'])
+    
+    def take_failed_writes(self) -> Dict[str, Dict[Any, Tuple]]:
+        """
+        Return and forget the rows MySQL rejected.
+        
+        Returns:
+            {'nodes': {node_id: row}, 'edges': {(source_id, target_id, edge_type): row}}
+            with rows in graph_nodes/graph_edges upsert column order
+        """
+        with self._write_cond:
+            failed, self._failed_writes = self._failed_writes, {'nodes': {}, 'edges': {}}
+        return failed
+    
+    def close(self, timeout: Optional[float] = None) -> Dict[str, Dict[Any, Tuple]]:
+        """
+        Flush pending writes and stop the write-behind thread.
+        
+        Later persisted writes are written synchronously again. If the
+        writer does not finish within timeout it keeps draining the queue in
+        the background; call close() again to wait for it.
+        
+        Args:
+            timeout: Maximum seconds to wait for the writer to finish
+        
+        Returns:
+            Rows that were not written, as in take_failed_writes(): the
+            rejected rows plus, after a timeout, the rows still queued
+        """
+        self._flush_batch()
+        with self._write_cond:
+            writer = self._writer
+            if writer is not None:
+                self._closing = True
+                self._write_cond.notify_all()
+        
+        if writer is not None:
+            writer.join(timeout)
+            if writer.is_alive():
+                with self._write_cond:
+                    pending = {kind: dict(rows) for kind, rows in self._queued.items()}
+                logger.warning(f"Write-behind thread still busy after {timeout}s; "
+                               f"{len(pending['nodes'])} node and {len(pending['edges'])} edge "
+                               f"writes are not written yet")
+                failed = self.take_failed_writes()
+                for kind in ('nodes', 'edges'):
+                    failed[kind].update(pending[kind])
+                return failed
+            atexit.unregister(self.close)
+        
+        failed = self.take_failed_writes()
+        if failed['nodes'] or failed['edges']:
+            logger.error(f"{len(failed['nodes'])} node and {len(failed['edges'])} edge writes "
+                         f"were rejected by MySQL and not written")
+        return failed
+    
+    def _start_writer(self) -> None:
+        """Start the background thread that drains the write-behind queue."""
+        self._writer = threading.Thread(target=self._run_writer, name='kg-write-behind', daemon=True)
+        self._writer.start()
+        # Don't lose queued writes when the process exits without close()
+        atexit.register(self.close)
+    
+    def _queued_count(self) -> int:
+        return len(self._queued['nodes']) + len(self._queued['edges'])
+    
+    def _queue_writes(self, nodes: Dict[Any, Tuple], edges: Dict[Any, Tuple],
+                      chunk_size: int = 1000) -> None:
+        """
+        Route upsert rows to the batch() buffer, the write-behind queue or MySQL.
+        
+        Args:
+            nodes: node_id -> graph_nodes upsert row
+            edges: (source_id, target_id, edge_type) -> graph_edges upsert row
+            chunk_size: Rows per executemany call when writing synchronously
+        """
+        if self._batch_depth:
+            self._pending_nodes.update(nodes)
+            self._pending_edges.update(edges)
+            return
+        if self._writer is not None:
+            # Whatever the writer can no longer take (it just stopped) is written here
+            nodes, edges = self._enqueue_writes(nodes, edges)
+        if nodes or edges:
+            self._write_now(nodes, edges, chunk_size)
+    
+    def _enqueue_writes(self, nodes: Dict[Any, Tuple], edges: Dict[Any, Tuple]
+                        ) -> Tuple[Dict[Any, Tuple], Dict[Any, Tuple]]:
+        """
+        Add rows to the write-behind queue, blocking while it is full.
+        
+        Returns:
+            (nodes, edges) rows that were not queued because the writer has stopped
+        """
+        pending = {'nodes': dict(nodes), 'edges': dict(edges)}
+        with self._write_cond:
+            for kind in ('nodes', 'edges'):
+                rows = pending[kind]
+                for key in list(rows):
+                    # A row already queued is replaced in place and needs no room
+                    while (key not in self._queued[kind]
+                           and self._queued_count() >= self.write_queue_size
+                           and self._writer is not None):
+                        self._write_cond.notify_all()
+                        self._write_cond.wait()
+                    if self._writer is None:
+                        return pending['nodes'], pending['edges']
+                    self._queued[kind][key] = rows.pop(key)
+            self._write_cond.notify_all()
+        return {}, {}
+    
+    def _run_writer(self) -> None:
+        """Background loop: gather queued rows for flush_interval, then write them."""
+        attempts = 0  # Failed attempts at the rows currently being retried
+        while True:
+            with self._write_cond:
+                self._write_cond.wait_for(lambda: self._queued_count() or self._closing)
+                deadline = time.monotonic() + self.flush_interval
+                while not (self._closing or self._flush_waiters
+                           or self._queued_count() >= self.write_queue_size):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._write_cond.wait(remaining)
+                
+                if not self._queued_count():
+                    # Closing and nothing left to write; later writes go to MySQL directly
+                    self._writer = None
+                    self._closing = False
+                    self._write_cond.notify_all()
+                    return
+                batch, self._queued = self._queued, {'nodes': {}, 'edges': {}}
+                self._write_in_flight = True
+                self._write_cond.notify_all()  # Wake producers waiting for room
+            
+            # The last attempt (or any attempt while closing) goes row by row,
+            # so only the rows MySQL keeps rejecting are given up on
+            last_attempt = self._closing or attempts + 1 >= self.write_retries
+            try:
+                if last_attempt:
+                    self._write_now(batch['nodes'], batch['edges'], chunk_size=1)
+                else:
+                    self._write_now(batch['nodes'], batch['edges'], raise_errors=True)
+                attempts = 0
+            except Exception as e:
+                attempts += 1
+                with self._write_cond:
+                    if self._closing:
+                        logger.error(f"Could not write {len(batch['nodes'])} node and "
+                                     f"{len(batch['edges'])} edge writes on close: {e}")
+                        for kind in ('nodes', 'edges'):
+                            self._failed_writes[kind].update(batch[kind])
+                    else:
+                        logger.error(f"Write-behind flush failed (attempt {attempts}), retrying: {e}")
+                        # Requeue, letting rows queued meanwhile win over the failed ones
+                        for kind in ('nodes', 'edges'):
+                            batch[kind].update(self._queued[kind])
+                        self._queued = batch
+                if not self._closing:
+                    time.sleep(min(self.flush_interval * 2 ** (attempts - 1), 30.0))
+            finally:
+                with self._write_cond:
+                    self._write_in_flight = False
+                    self._write_cond.notify_all()
+    
     def get_neighbors(self, node_id: str, edge_type: Optional[str] = None,
-                     direction: str = 'out') -> List[str]:
+                     direction: str = 'out', min_confidence: float = 0.0) -> List[str]:
         """
         Get neighboring nodes.
         
@@ -186,81 +1360,140 @@ class KnowledgeGraph:
             node_id: Node to get neighbors for
             edge_type: Optional filter by edge type
             direction: 'out' (outgoing), 'in' (incoming), or 'both'
+            min_confidence: Only follow edges with at least this confidence
         
         Returns:
             List of neighbor node IDs
         """
+        if self.lazy:
+            return self._lazy_neighbors(node_id, edge_type, direction, min_confidence)
+        
         if not self.graph.has_node(node_id):
             return []
         
+        if min_confidence > 0.0:
+            # Thresholded: neighbors come from the confidence-sorted index
+            edge_types = None if edge_type is None else [edge_type]
+            neighbors = []
+            for kind, iter_edges in (('out', self._iter_out_edges), ('in', self._iter_in_edges)):
+                if direction in (kind, 'both'):
+                    found = [neighbor for neighbor, _, _ in iter_edges(node_id, edge_types, min_confidence)]
+                    neighbors.extend(dict.fromkeys(found) if edge_type is None else found)
+            return neighbors
+        
         neighbors = []
         
         if direction in ['out', 'both']:
-            for neighbor in self.graph.successors(node_id):
-                edge_data = self.graph[node_id][neighbor]
-                if edge_type is None or edge_data.get('edge_type') == edge_type:
-                    neighbors.append(neighbor)
+            if edge_type is None:
+                neighbors.extend(self.graph.successors(node_id))
+            else:
+                neighbors.extend(self._out_index.get(node_id, {}).get(edge_type, ()))
         
         if direction in ['in', 'both']:
-            for neighbor in self.graph.predecessors(node_id):
-                edge_data = self.graph[neighbor][node_id]
-                if edge_type is None or edge_data.get('edge_type') == edge_type:
-                    neighbors.append(neighbor)
+            if edge_type is None:
+                neighbors.extend(self.graph.predecessors(node_id))
+            else:
+                neighbors.extend(self._in_index.get(node_id, {}).get(edge_type, ()))
         
         return neighbors
     
-    def traverse(self, start_node: str, max_depth: int = 2,
-                edge_types: Optional[List[str]] = None) -> Dict[str, Any]:
+    def get_edge(self, source_id: str, target_id: str, edge_type: str) -> Optional[Dict[str, Any]]:
         """
-        Traverse graph from starting node up to max depth.
+        Get the attributes of one relationship between two nodes.
         
         Args:
-            start_node: Starting node ID
+            source_id: Source node ID
+            target_id: Target node ID
+            edge_type: Relationship type
+        
+        Returns:
+            Edge attribute dictionary (edge_type, confidence, properties), or None
+        """
+        self._require_graph('get_edge')
+        if not self.graph.has_edge(source_id, target_id, key=edge_type):
+            return None
+        return self.graph[source_id][target_id][edge_type]
+    
+    def get_edge_types(self, source_id: str, target_id: str) -> List[str]:
+        """
+        Get all relationship types from source_id to target_id.
+        
+        Returns:
+            List of edge types (empty if the nodes are not connected)
+        """
+        self._require_graph('get_edge_types')
+        if not self.graph.has_edge(source_id, target_id):
+            return []
+        return list(self.graph[source_id][target_id])
+    
+    def traverse(self, start_node: Union[str, Iterable[str]], max_depth: int = 2,
+                 edge_types: Optional[List[str]] = None,
+                 ids_only: bool = False,
+                 min_confidence: float = 0.0) -> Union[Dict[str, Any], List[str]]:
+        """
+        Traverse graph from starting node(s) up to max depth.
+        
+        Level-synchronous breadth-first search: each hop expands the whole
+        frontier at once and nodes are marked visited when first reached, so
+        every node is expanded and every edge reported at most once.
+        
+        Args:
+            start_node: Starting node ID, or an iterable of node IDs to
+                expand together (e.g. all tickets returned by a vector search)
             max_depth: Maximum traversal depth (default 2 hops)
             edge_types: Optional filter for edge types
+            ids_only: If True, return only the list of reached node IDs in
+                discovery order, skipping edge records and property lookups
+            min_confidence: Only follow edges with at least this confidence
         
         Returns:
-            Dictionary with nodes and edges in subgraph
+            Dictionary with nodes and edges in subgraph, or a list of node IDs
+            when ids_only is True
         """
-        if not self.graph.has_node(start_node):
-            return {'nodes': [], 'edges': []}
-        
-        visited_nodes = set()
+        starts = list(dict.fromkeys([start_node] if isinstance(start_node, str) else start_node))
+        if self.lazy:
+            found = self._lazy_nodes(starts)
+            frontier = [node_id for node_id in starts if found[node_id] is not None]
+        else:
+            frontier = [node_id for node_id in starts if self.graph.has_node(node_id)]
+        visited = dict.fromkeys(frontier)  # Ordered set, in discovery order
         visited_edges = []
-        queue = [(start_node, 0)]  # (node_id, depth)
+        if edge_types is not None:
+            edge_types = list(dict.fromkeys(edge_types))
         
-        while queue:
-            current_node, depth = queue.pop(0)
-            
-            if current_node in visited_nodes or depth > max_depth:
-                continue
+        for depth in range(max_depth + 1):
+            expand = depth < max_depth
+            if not frontier or (ids_only and not expand):
+                break
             
-            visited_nodes.add(current_node)
-            
-            # Get outgoing edges
-            for neighbor in self.graph.successors(current_node):
-                edge_data = self.graph[current_node][neighbor]
-                edge_type = edge_data.get('edge_type')
-                
-                if edge_types is None or edge_type in edge_types:
+            next_frontier = []
+            for current_node, neighbor, edge_type, edge_data in self._iter_frontier_edges(
+                    frontier, edge_types, min_confidence):
+                if not ids_only:
                     visited_edges.append({
                         'source': current_node,
                         'target': neighbor,
                         'type': edge_type,
                         'confidence': edge_data.get('confidence', 1.0)
                     })
-                    
-                    if depth < max_depth:
-                        queue.append((neighbor, depth + 1))
+                
+                if expand and neighbor not in visited:
+                    visited[neighbor] = None
+                    next_frontier.append(neighbor)
+            frontier = next_frontier
+        
+        if ids_only:
+            return list(visited)
         
         # Get node data
+        node_lookup = self._lazy_nodes(visited) if self.lazy else self.graph.nodes
         nodes = []
-        for node_id in visited_nodes:
-            node_data = self.graph.nodes[node_id]
+        for node_id in visited:
+            node_data = node_lookup[node_id] or {}
             nodes.append({
                 'id': node_id,
                 'type': node_data.get('node_type'),
-                'properties': node_data.get('properties', {})
+                'properties': dict(node_data.get('properties', {}))
             })
         
         return {
@@ -268,8 +1501,174 @@ class KnowledgeGraph:
             'edges': visited_edges
         }
     
+    def traverse_ranked(self, start_node: Union[str, Iterable[str]], max_depth: int = 2,
+                        edge_types: Optional[List[str]] = None, direction: str = 'out',
+                        top_n: int = 20, max_fan_out: Optional[int] = 50,
+                        max_nodes: Optional[int] = 1000,
+                        min_path_confidence: float = 0.1,
+                        min_confidence: float = 0.0) -> List[Tuple[str, float]]:
+        """
+        Best-first traversal ranked by cumulative path confidence.
+        
+        The score of a node is the highest product of edge confidences along
+        a path from a start node. Nodes are expanded in order of score, so the
+        search can stop as soon as its budget is spent, and hub nodes only
+        contribute their strongest edges.
+        
+        Args:
+            start_node: Starting node ID, or an iterable of node IDs
+            max_depth: Maximum number of hops from a start node
+            edge_types: Optional filter for edge types
+            direction: 'out' (outgoing), 'in' (incoming), or 'both'
+            top_n: Number of results to return
+            max_fan_out: Maximum number of edges followed from any one node,
+                highest confidence first (None for no cap)
+            max_nodes: Maximum number of nodes expanded in total (None for no cap)
+            min_path_confidence: Paths scoring below this are not followed
+            min_confidence: Only follow edges with at least this confidence
+        
+        Returns:
+            List of (node_id, score) tuples, best first, excluding start nodes
+        """
+        self._require_graph('traverse_ranked')
+        starts = [start_node] if isinstance(start_node, str) else start_node
+        starts = [node_id for node_id in dict.fromkeys(starts) if self.graph.has_node(node_id)]
+        if edge_types is not None:
+            edge_types = list(dict.fromkeys(edge_types))
+        
+        # Best score queued per node and depth; a path is only dominated by one
+        # that is at least as strong and at most as deep
+        best: Dict[str, List[float]] = {}
+        for node_id in starts:
+            best[node_id] = [0.0] * (max_depth + 1)
+            best[node_id][0] = 1.0
+        heap = [(-1.0, 0, node_id) for node_id in starts]
+        settled: Dict[str, float] = {}  # Final score, fixed when a node is first popped
+        expanded_at: Dict[str, int] = {}
+        
+        while heap and (max_nodes is None or len(settled) < max_nodes):
+            neg_score, depth, node_id = heapq.heappop(heap)
+            # A weaker path is still worth expanding if it reached the node in
+            # fewer hops, since it leaves more depth budget for its neighbors
+            if node_id in expanded_at and depth >= expanded_at[node_id]:
+                continue
+            score = -neg_score
+            settled.setdefault(node_id, score)
+            expanded_at[node_id] = depth
+            if depth >= max_depth:
+                continue
+            
+            candidates = []
+            if direction in ['out', 'both']:
+                candidates.extend(self._iter_out_edges(node_id, edge_types, min_confidence))
+            if direction in ['in', 'both']:
+                candidates.extend(self._iter_in_edges(node_id, edge_types, min_confidence))
+            if max_fan_out is not None and len(candidates) > max_fan_out:
+                candidates = heapq.nlargest(max_fan_out, candidates,
+                                            key=lambda edge: edge[2].get('confidence', 1.0))
+            
+            for neighbor, _, edge_data in candidates:
+                path_score = score * edge_data.get('confidence', 1.0)
+                if path_score < min_path_confidence:
+                    continue
+                by_depth = best.get(neighbor)
+                if by_depth is None:
+                    by_depth = best[neighbor] = [0.0] * (max_depth + 1)
+                elif max(by_depth[:depth + 2]) >= path_score:
+                    continue
+                by_depth[depth + 1] = path_score
+                heapq.heappush(heap, (-path_score, depth + 1, neighbor))
+        
+        start_set = set(starts)
+        ranked = [(node_id, score) for node_id, score in settled.items() if node_id not in start_set]
+        ranked.sort(key=lambda x: x[1], reverse=True)
+        return ranked[:top_n]
+    
+    def _iter_frontier_edges(self, frontier: List[str], edge_types: Optional[List[str]],
+                             min_confidence: float = 0.0
+                             ) -> Iterator[Tuple[str, str, str, Dict[str, Any]]]:
+        """Yield (node, neighbor, edge_type, edge_data) for outgoing edges of a BFS level."""
+        if self.lazy:
+            # One batched query for the whole level instead of one per node
+            adjacency = self._lazy_edges(frontier, 'out')
+            for node_id in frontier:
+                for neighbor, edge_type, confidence in adjacency[node_id]:
+                    if (edge_types is None or edge_type in edge_types) and confidence >= min_confidence:
+                        yield node_id, neighbor, edge_type, {'confidence': confidence}
+            return
+        
+        for node_id in frontier:
+            for neighbor, edge_type, edge_data in self._iter_out_edges(node_id, edge_types, min_confidence):
+                yield node_id, neighbor, edge_type, edge_data
+    
+    def _ranked_edges(self, direction: str, node_id: str, edge_type: str) -> List[Tuple[float, str]]:
+        """Return [(-confidence, neighbor_id)] for one node and edge type, best first."""
+        key = (direction, node_id, edge_type)
+        ranked = self._ranked_index.get(key)
+        if ranked is None:
+            index, adjacency = ((self._out_index, self.graph.succ) if direction == 'out'
+                                else (self._in_index, self.graph.pred))
+            neighbors = index.get(node_id, {}).get(edge_type, ())
+            ranked = sorted((-adjacency[node_id][neighbor][edge_type].get('confidence', 1.0), neighbor)
+                            for neighbor in neighbors)
+            self._ranked_index[key] = ranked
+        return ranked
+    
+    def _iter_ranked_edges(self, direction: str, node_id: str, edge_types: Optional[List[str]],
+                           min_confidence: float) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+        """Yield (neighbor, edge_type, edge_data) for edges at or above min_confidence."""
+        index, adjacency = ((self._out_index, self.graph.succ) if direction == 'out'
+                            else (self._in_index, self.graph.pred))
+        by_type = index.get(node_id, {})
+        adjacency = adjacency[node_id]
+        for edge_type in (list(by_type) if edge_types is None else edge_types):
+            if edge_type not in by_type:
+                continue
+            ranked = self._ranked_edges(direction, node_id, edge_type)
+            cut = bisect.bisect_right(ranked, -min_confidence, key=lambda item: item[0])
+            for _, neighbor in ranked[:cut]:
+                yield neighbor, edge_type, adjacency[neighbor][edge_type]
+    
+    def _iter_out_edges(self, node_id: str, edge_types: Optional[List[str]] = None,
+                        min_confidence: float = 0.0) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+        """Yield (neighbor, edge_type, edge_data) for outgoing edges, optionally of given types."""
+        if min_confidence > 0.0:
+            yield from self._iter_ranked_edges('out', node_id, edge_types, min_confidence)
+            return
+        
+        if edge_types is None:
+            for neighbor, by_type in self.graph[node_id].items():
+                for edge_type, edge_data in by_type.items():
+                    yield neighbor, edge_type, edge_data
+            return
+        
+        by_type = self._out_index.get(node_id, {})
+        adjacency = self.graph[node_id]
+        for edge_type in edge_types:
+            for neighbor in by_type.get(edge_type, ()):
+                yield neighbor, edge_type, adjacency[neighbor][edge_type]
+    
+    def _iter_in_edges(self, node_id: str, edge_types: Optional[List[str]] = None,
+                       min_confidence: float = 0.0) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+        """Yield (neighbor, edge_type, edge_data) for incoming edges, optionally of given types."""
+        if min_confidence > 0.0:
+            yield from self._iter_ranked_edges('in', node_id, edge_types, min_confidence)
+            return
+        
+        if edge_types is None:
+            for neighbor, by_type in self.graph.pred[node_id].items():
+                for edge_type, edge_data in by_type.items():
+                    yield neighbor, edge_type, edge_data
+            return
+        
+        by_type = self._in_index.get(node_id, {})
+        adjacency = self.graph.pred[node_id]
+        for edge_type in edge_types:
+            for neighbor in by_type.get(edge_type, ()):
+                yield neighbor, edge_type, adjacency[neighbor][edge_type]
+    
     def find_paths(self, source_id: str, target_id: str,
-                  max_length: int = 3) -> List[List[str]]:
+                  max_length: int = 3, min_confidence: float = 0.0) -> List[List[str]]:
         """
         Find all paths between two nodes.
         
@@ -277,41 +1676,135 @@ class KnowledgeGraph:
             source_id: Source node ID
             target_id: Target node ID
             max_length: Maximum path length
+            min_confidence: Only follow edges with at least this confidence
         
         Returns:
-            List of paths (each path is a list of node IDs)
+            List of paths (each path is a list of node IDs); a node reaches
+            itself by the single path [source_id]
         """
+        self._require_graph('find_paths')
         if not self.graph.has_node(source_id) or not self.graph.has_node(target_id):
             return []
+        if source_id == target_id:
+            # Older networkx releases return no paths here
+            return [[source_id]]
+        
+        graph = self.graph
+        if min_confidence > 0.0:
+            # Read-only view; edges are checked as the search reaches them
+            graph = nx.subgraph_view(self.graph, filter_edge=lambda u, v, key: (
+                self.graph[u][v][key].get('confidence', 1.0) >= min_confidence))
         
         try:
-            paths = list(nx.all_simple_paths(
-                self.graph,
+            # all_simple_paths repeats a path once per parallel edge on a multigraph
+            paths = dict.fromkeys(tuple(path) for path in nx.all_simple_paths(
+                graph,
                 source_id,
                 target_id,
                 cutoff=max_length
             ))
-            return paths
+            return [list(path) for path in paths]
         except nx.NetworkXNoPath:
             return []
     
-    def compute_centrality(self, node_id: str) -> float:
+    def find_best_paths(self, source_id: str, target_id: str, k: int = 5,
+                        max_length: int = 3,
+                        edge_types: Optional[List[str]] = None,
+                        min_confidence: float = 0.0) -> Iterator[Tuple[List[str], float]]:
+        """
+        Lazily yield the k most confident paths between two nodes.
+        
+        Path confidence is the product of edge confidences (the best one
+        where a node pair has parallel edges). Paths are explored best-first
+        on -log(confidence), so they come out in order and the search stops
+        after the k-th. A bounded reverse search from the target first marks
+        which nodes can still reach it within the remaining hops; everything
+        else is never expanded.
+        
+        Args:
+            source_id: Source node ID
+            target_id: Target node ID
+            k: Maximum number of paths to yield
+            max_length: Maximum path length in hops
+            edge_types: Optional filter for edge types
+            min_confidence: Only follow edges with at least this confidence
+        
+        Yields:
+            (path, confidence) tuples, path being a list of node IDs
+        """
+        self._require_graph('find_best_paths')
+        if k < 1 or not self.graph.has_node(source_id) or not self.graph.has_node(target_id):
+            return
+        if source_id == target_id:
+            yield [source_id], 1.0
+            return
+        if edge_types is not None:
+            edge_types = list(dict.fromkeys(edge_types))
+        
+        # Hops from each node to the target, up to max_length
+        hops_to_target = {target_id: 0}
+        frontier = [target_id]
+        for hops in range(1, max_length + 1):
+            next_frontier = []
+            for node_id in frontier:
+                for neighbor, _, _ in self._iter_in_edges(node_id, edge_types, min_confidence):
+                    if neighbor not in hops_to_target:
+                        hops_to_target[neighbor] = hops
+                        next_frontier.append(neighbor)
+            frontier = next_frontier
+        if source_id not in hops_to_target:
+            return
+        
+        counter = itertools.count()  # Tie-breaker so paths are never compared
+        heap = [(0.0, next(counter), (source_id,))]
+        found = 0
+        
+        while heap:
+            cost, _, path = heapq.heappop(heap)
+            last = path[-1]
+            if last == target_id:
+                yield list(path), math.exp(-cost)
+                found += 1
+                if found >= k:
+                    return
+                continue
+            
+            # Best confidence per neighbor across parallel edge types
+            hop_confidence: Dict[str, float] = {}
+            for neighbor, _, edge_data in self._iter_out_edges(last, edge_types, min_confidence):
+                confidence = edge_data.get('confidence', 1.0)
+                if confidence > hop_confidence.get(neighbor, 0.0):
+                    hop_confidence[neighbor] = confidence
+            
+            for neighbor, confidence in hop_confidence.items():
+                remaining = hops_to_target.get(neighbor)
+                if remaining is None or len(path) + remaining > max_length or neighbor in path:
+                    continue
+                heapq.heappush(heap, (cost - math.log(confidence), next(counter), path + (neighbor,)))
+    
+    def compute_centrality(self, node_id: str, min_confidence: float = 0.0) -> float:
         """
         Compute degree centrality for a node.
         
         Args:
             node_id: Node to compute centrality for
+            min_confidence: Only count edges with at least this confidence
         
         Returns:
             Centrality score (0.0-1.0)
         """
+        self._require_graph('compute_centrality')
         if not self.graph.has_node(node_id):
             return 0.0
         
         if self.graph.number_of_nodes() == 0:
             return 0.0
         
-        degree = self.graph.degree(node_id)
+        if min_confidence > 0.0:
+            degree = (sum(1 for _ in self._iter_out_edges(node_id, None, min_confidence))
+                      + sum(1 for _ in self._iter_in_edges(node_id, None, min_confidence)))
+        else:
+            degree = self.graph.degree(node_id)
         max_possible_degree = self.graph.number_of_nodes() - 1
         
         if max_possible_degree == 0:
@@ -319,114 +1812,759 @@ class KnowledgeGraph:
         
         return degree / max_possible_degree
     
-    def get_similar_nodes(self, node_id: str, top_k: int = 5) -> List[Tuple[str, float]]:
+    @property
+    def analytics(self) -> 'GraphAnalytics':
+        """
+        Batch metrics (degree, PageRank, betweenness, ...) for all nodes.
+        
+        Results are computed on a sparse-matrix view of the in-memory graph
+        and cached until the graph changes. See graph_analytics.py.
+        """
+        self._require_graph('analytics')
+        if self._analytics is None:
+            from graph_analytics import GraphAnalytics
+            self._analytics = GraphAnalytics(self)
+        return self._analytics
+    
+    def top_nodes(self, metric: str = 'degree', node_type: Optional[str] = None,
+                  k: int = 10, **params: Any) -> List[Tuple[str, float]]:
+        """
+        Rank nodes by a whole-graph metric, e.g. the most central CIs.
+        
+        Args:
+            metric: 'degree', 'in_degree', 'out_degree', 'pagerank' or 'betweenness'
+            node_type: Only rank nodes of this type
+            k: Number of results
+            **params: Metric options, e.g. samples=500 for betweenness
+        
+        Returns:
+            List of (node_id, score) tuples, best first
+        """
+        return self.analytics.top_nodes(metric, node_type=node_type, k=k, **params)
+    
+    def related_nodes(self, seeds: Union[str, Iterable[str]], node_type: Optional[str] = None,
+                      k: int = 10, damping: float = 0.85) -> List[Tuple[str, float]]:
+        """
+        Rank nodes related to one or more seed nodes by personalized PageRank.
+        
+        Unlike traverse(), relevance is graded: nodes reachable over many
+        high-confidence paths rank above nodes behind a single weak edge,
+        at any distance.
+        
+        The walk runs on a view that may lag recent changes (see
+        GraphAnalytics.max_stale_versions); a seed added since is walked
+        from through its neighbors, so a new ticket costs no rebuild.
+        
+        Args:
+            seeds: Seed node ID, or several IDs walked from together
+            node_type: Only return nodes of this type (e.g. 'kb')
+            k: Number of results
+            damping: Probability of following an edge instead of restarting
+        
+        Returns:
+            List of (node_id, score) tuples, best first (seeds excluded)
+        """
+        if isinstance(seeds, str):
+            seeds = [seeds]
+        return self.analytics.related(seeds, node_type=node_type, k=k, damping=damping)
+    
+    def related_nodes_many(self, seed_sets: Iterable[Union[str, Iterable[str]]],
+                           node_type: Optional[str] = None, k: int = 10,
+                           damping: float = 0.85) -> List[List[Tuple[str, float]]]:
+        """
+        related_nodes() for a batch of queries, computed in one matrix iteration.
+        
+        Args:
+            seed_sets: Per query a seed node ID or an iterable of seed IDs
+            node_type: Only return nodes of this type
+            k: Number of results per query
+            damping: Probability of following an edge instead of restarting
+        
+        Returns:
+            One list of (node_id, score) tuples per query
+        """
+        seed_sets = [[seeds] if isinstance(seeds, str) else seeds for seeds in seed_sets]
+        return self.analytics.related_many(seed_sets, node_type=node_type, k=k, damping=damping)
+    
+    def predict_similar_edges(self, node_type: str = 'ticket', method: str = 'adamic_adar',
+                              top_k: int = 5, min_score: float = 0.0, persist: bool = True,
+                              **options: Any) -> int:
+        """
+        Propose SIMILAR_TO edges between nodes that share many neighbors.
+        
+        Candidate pairs (e.g. tickets on the same CI, from the same user, in
+        the same category) are scored with graph_analytics link prediction;
+        the top_k per node scoring at least min_score are added through
+        add_edges_bulk(), one edge per pair. Confidence is
+        graph_analytics.link_confidence() of the score (Jaccard as is,
+        otherwise 1 - exp(-score)), so it does not depend on the other pairs
+        of the run; the raw score and method are kept in the edge properties.
+        
+        Args:
+            node_type: Type of the nodes to link
+            method: 'common_neighbors', 'jaccard', 'adamic_adar' or 'resource_allocation'
+            top_k: Maximum new edges per node
+            min_score: Minimum raw score for an edge
+            persist: If True, save to MySQL database
+            **options: Passed to GraphAnalytics.link_predictions()
+                (via_edge_types, max_degree, exclude_existing, block_size)
+        
+        Returns:
+            Number of edges added or updated
+        """
+        from graph_analytics import link_confidence
+        
+        predictions = self.analytics.link_predictions(node_type, method=method, k=top_k,
+                                                      min_score=min_score, **options)
+        edges = []
+        seen = set()
+        for source_id, target_id, score in predictions:
+            # Scores are symmetric; a pair in both nodes' top_k is written once
+            pair = (source_id, target_id) if source_id < target_id else (target_id, source_id)
+            if pair in seen:
+                continue
+            seen.add(pair)
+            edges.append((source_id, target_id, 'SIMILAR_TO', link_confidence(method, score),
+                          {'method': method, 'similarity_score': round(score, 6)}))
+        if not edges:
+            return 0
+        logger.info(f"Link prediction ({method}) proposed {len(edges)} SIMILAR_TO edges")
+        return self.add_edges_bulk(edges, persist=persist)
+    
+    def detect_communities(self, method: str = 'louvain', resolution: float = 1.0,
+                           seed: int = 0, persist: bool = True) -> int:
+        """
+        Cluster the graph and label every node with its community.
+        
+        Runs Louvain or label propagation (see GraphAnalytics.community_labels())
+        on the confidence-weighted graph, replaces all current labels and
+        stores them as the 'community' node attribute. With persist=True the
+        graph_communities table (migration 009) is rewritten as well, in one
+        transaction: readers see either the previous run's labels or this
+        run's, never a mix. The in-memory labels are only replaced once that
+        transaction has committed.
+        
+        Persisting needs the whole graph in memory (load_from_db() without
+        node_types, or a snapshot), since every stored label is replaced.
+        
+        Args:
+            method: 'louvain' or 'label_propagation'
+            resolution: Louvain resolution; above 1 favors smaller communities
+            seed: Random seed, for reproducible labels
+            persist: If True, save the labels to MySQL
+        
+        Returns:
+            Number of communities
+        
+        Raises:
+            RuntimeError: If persisting while the graph is not fully loaded
+                (lazy mode, nothing loaded, or a node_types-filtered load)
+            mysql.connector.Error: If the rewrite fails; it is rolled back and
+                both the stored and the in-memory labels stay as they were
+        """
+        self._require_graph('detect_communities')
+        if persist and not self._loaded:
+            raise RuntimeError("detect_communities(persist=True) needs the graph loaded with "
+                               "load_from_db() or load_snapshot(); the stored labels of nodes "
+                               "not in memory would be deleted")
+        if persist and self._load_filters['node_types']:
+            raise RuntimeError(f"detect_communities(persist=True) needs an unfiltered load; with "
+                               f"node_types={self._load_filters['node_types']} the stored labels "
+                               f"of all other nodes would be deleted")
+        
+        labels = self.analytics.community_labels(method, resolution=resolution, seed=seed)
+        new_labels = dict(zip(self.analytics.view().node_ids, labels.tolist()))
+        
+        if persist:
+            # Phantom edge endpoints have no graph_nodes row to reference
+            rows = [(node_id, community_id, method) for node_id, community_id in new_labels.items()
+                    if 'node_type' in self.graph.nodes[node_id]]
+            conn = self.connect_db()
+            cursor = conn.cursor()
+            try:
+                cursor.execute("DELETE FROM graph_communities")
+                for start in range(0, len(rows), 1000):
+                    cursor.executemany(COMMUNITY_UPSERT_SQL, rows[start:start + 1000])
+                conn.commit()
+                logger.info(f"Persisted {len(rows)} community labels")
+            except mysql.connector.Error as e:
+                conn.rollback()
+                logger.error(f"Error persisting community labels, previous labels kept: {e}")
+                raise
+            finally:
+                cursor.close()
+                conn.close()
+        
+        for node_id in list(self._community_of):
+            self._drop_community(node_id)
+        for node_id, community_id in new_labels.items():
+            self._set_community(node_id, community_id)
+        return len(self._community_members)
+    
+    def load_communities(self) -> int:
+        """
+        Load community labels saved by detect_communities()/assign_communities().
+        
+        Labels of nodes that are not in the in-memory graph are skipped,
+        except in lazy mode where all labels are kept for lookups.
+        
+        Returns:
+            Number of labels loaded
+        """
+        for node_id in list(self._community_of):
+            self._drop_community(node_id)
+        
+        conn = self.connect_db()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT node_id, community_id FROM graph_communities")
+            for node_id, community_id in cursor.fetchall():
+                if self.lazy or self.graph.has_node(node_id):
+                    self._set_community(node_id, community_id)
+        except mysql.connector.Error as e:
+            if e.errno != errorcode.ER_NO_SUCH_TABLE:
+                raise
+            logger.warning("graph_communities table not found (run migration 009)")
+        finally:
+            cursor.close()
+            conn.close()
+        
+        logger.info(f"Loaded {len(self._community_of)} community labels "
+                    f"({len(self._community_members)} communities)")
+        return len(self._community_of)
+    
+    def assign_communities(self, node_ids: Optional[Iterable[str]] = None,
+                           persist: bool = True) -> Dict[str, int]:
+        """
+        Put new nodes into existing communities without re-running detection.
+        
+        Each node joins the community its neighbors (either direction) belong
+        to, weighted by edge confidence; ties go to the larger community.
+        Nodes are processed in order, so a node can vote for one assigned just
+        before it. Nodes without labelled neighbors stay unassigned until the
+        next detect_communities().
+        
+        Args:
+            node_ids: Nodes to assign; default all unlabelled nodes in the graph
+            persist: If True, save the new labels to MySQL
+        
+        Returns:
+            Dictionary node_id -> assigned community
+        """
+        self._require_graph('assign_communities')
+        if node_ids is None:
+            node_ids = [node_id for node_id in self.graph if node_id not in self._community_of]
+        
+        assigned = {}
+        for node_id in node_ids:
+            if not self.graph.has_node(node_id):
+                continue
+            votes: Dict[int, float] = {}
+            for edges in (self.graph.out_edges(node_id, data='confidence', default=1.0),
+                          self.graph.in_edges(node_id, data='confidence', default=1.0)):
+                for source, target, confidence in edges:
+                    community_id = self._community_of.get(target if source == node_id else source)
+                    if community_id is not None:
+                        votes[community_id] = votes.get(community_id, 0.0) + confidence
+            if not votes:
+                continue
+            community_id = min(votes, key=lambda c: (-votes[c], -len(self._community_members[c]), c))
+            self._set_community(node_id, community_id)
+            assigned[node_id] = community_id
+        
+        if persist and assigned:
+            rows = [(node_id, community_id, 'neighbor_vote') for node_id, community_id in assigned.items()
+                    if 'node_type' in self.graph.nodes[node_id]]
+            conn = self.connect_db()
+            try:
+                self._write_rows(COMMUNITY_UPSERT_SQL, rows, 1000, 'community labels', conn)
+            finally:
+                conn.close()
+        
+        logger.info(f"Assigned {len(assigned)} nodes to existing communities")
+        return assigned
+    
+    def get_community(self, node_id: str) -> Optional[int]:
+        """Community label of a node, or None if it has none."""
+        return self._community_of.get(node_id)
+    
+    def get_community_members(self, community_id: int,
+                              node_type: Optional[str] = None) -> List[str]:
+        """
+        Nodes in a community, e.g. all tickets of an outage cluster.
+        
+        Args:
+            community_id: Community label (see get_community())
+            node_type: Only return nodes of this type
+        
+        Returns:
+            List of node IDs
+        """
+        members = self._community_members.get(community_id, {})
+        if node_type is None:
+            return list(members)
+        self._require_graph('get_community_members')
+        nodes = self.graph.nodes
+        return [node_id for node_id in members
+                if node_id in nodes and nodes[node_id].get('node_type') == node_type]
+    
+    def _set_community(self, node_id: str, community_id: int) -> None:
+        self._drop_community(node_id)
+        self._community_of[node_id] = community_id
+        self._community_members.setdefault(community_id, {})[node_id] = None
+        if self.graph.has_node(node_id):
+            self.graph.nodes[node_id]['community'] = community_id
+    
+    def _drop_community(self, node_id: str) -> None:
+        community_id = self._community_of.pop(node_id, None)
+        if community_id is None:
+            return
+        members = self._community_members[community_id]
+        members.pop(node_id, None)
+        if not members:
+            del self._community_members[community_id]
+        if self.graph.has_node(node_id):
+            self.graph.nodes[node_id].pop('community', None)
+    
+    def get_similar_nodes(self, node_id: str, top_k: int = 5,
+                          min_confidence: float = 0.0) -> List[Tuple[str, float]]:
         """
         Get most similar nodes based on SIMILAR_TO edges.
         
+        Edges in either direction count; a pair linked both ways is listed
+        once with the higher confidence. Each node's list is kept sorted by
+        confidence, so this is a slice.
+        
         Args:
             node_id: Node to find similar nodes for
             top_k: Number of results to return
+            min_confidence: Leave out nodes with a lower similarity
         
         Returns:
             List of (node_id, similarity_score) tuples
         """
-        similar = []
+        if self.lazy:
+            return self._lazy_similar(node_id, top_k, min_confidence)
+        
+        ranked = self._similar_ranked.get(node_id)
+        if ranked is None:
+            scores = self._similar_scores.get(node_id)
+            if not scores:
+                return []
+            ranked = sorted((-confidence, neighbor) for neighbor, confidence in scores.items())
+            self._similar_ranked[node_id] = ranked
+        return [(neighbor, -neg_confidence) for neg_confidence, neighbor in ranked[:top_k]
+                if -neg_confidence >= min_confidence]
+    
+    def get_similar_nodes_many(self, node_ids: Iterable[str], top_k: int = 5,
+                               min_confidence: float = 0.0) -> Dict[str, List[Tuple[str, float]]]:
+        """
+        Get similar nodes for a batch of nodes, e.g. every ticket on a list page.
         
-        for neighbor in self.get_neighbors(node_id, edge_type='SIMILAR_TO', direction='both'):
-            # Get edge data
-            if self.graph.has_edge(node_id, neighbor):
-                edge_data = self.graph[node_id][neighbor]
+        Args:
+            node_ids: Nodes to find similar nodes for
+            top_k: Number of results per node
+            min_confidence: Leave out nodes with a lower similarity
+        
+        Returns:
+            Dictionary mapping each node ID to its (node_id, similarity_score) list
+        """
+        if self.lazy:
+            # Fetch both directions for the whole batch up front
+            node_ids = list(dict.fromkeys(node_ids))
+            self._lazy_edges(node_ids, 'out')
+            self._lazy_edges(node_ids, 'in')
+        return {node_id: self.get_similar_nodes(node_id, top_k, min_confidence) for node_id in node_ids}
+    
+    def _lazy_neighbors(self, node_id: str, edge_type: Optional[str],
+                        direction: str, min_confidence: float = 0.0) -> List[str]:
+        """get_neighbors() for lazy mode."""
+        neighbors = []
+        for kind in ('out', 'in'):
+            if direction in (kind, 'both'):
+                edges = self._lazy_edges([node_id], kind)[node_id]
+                typed = [neighbor for neighbor, etype, confidence in edges
+                         if (edge_type is None or etype == edge_type) and confidence >= min_confidence]
+                # Untyped lookups list a neighbor once, like successors()/predecessors()
+                neighbors.extend(dict.fromkeys(typed) if edge_type is None else typed)
+        return neighbors
+    
+    def _lazy_similar(self, node_id: str, top_k: int,
+                      min_confidence: float = 0.0) -> List[Tuple[str, float]]:
+        """get_similar_nodes() for lazy mode."""
+        scores: Dict[str, float] = {}
+        for kind in ('out', 'in'):
+            for neighbor, edge_type, confidence in self._lazy_edges([node_id], kind)[node_id]:
+                if (edge_type == 'SIMILAR_TO' and confidence >= min_confidence
+                        and confidence > scores.get(neighbor, -1.0)):
+                    scores[neighbor] = confidence
+        ranked = sorted((-confidence, neighbor) for neighbor, confidence in scores.items())
+        return [(neighbor, -neg_confidence) for neg_confidence, neighbor in ranked[:top_k]]
+    
+    def _lazy_edges(self, node_ids: Iterable[str], direction: str
+                    ) -> Dict[str, List[Tuple[str, str, float]]]:
+        """
+        Fetch adjacency lists from MySQL through the LRU cache.
+        
+        Uncached nodes are fetched together with one IN query per 1000 IDs,
+        served by the idx_source_type / idx_target_type indexes.
+        
+        Args:
+            node_ids: Nodes to fetch edges for
+            direction: 'out' (edges by source_id) or 'in' (edges by target_id)
+        
+        Returns:
+            Dictionary node_id -> list of (neighbor_id, edge_type, confidence)
+        """
+        key_column, neighbor_column = ('source_id', 'target_id') if direction == 'out' else ('target_id', 'source_id')
+        
+        def fetch(cursor, chunk):
+            placeholders = ', '.join(['%s'] * len(chunk))
+            cursor.execute(f"""
+                SELECT {key_column}, {neighbor_column}, edge_type, confidence
+                FROM graph_edges
+                WHERE {key_column} IN ({placeholders})
+            """, chunk)
+            found = {node_id: [] for node_id in chunk}
+            for node_id, neighbor, edge_type, confidence in cursor.fetchall():
+                found[node_id].append((neighbor, edge_type, float(confidence)))
+            return found
+        
+        return self._lazy_lookup(direction, node_ids, fetch)
+    
+    def _lazy_nodes(self, node_ids: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Fetch node attributes from MySQL through the LRU cache (None if missing)."""
+        def fetch(cursor, chunk):
+            placeholders = ', '.join(['%s'] * len(chunk))
+            cursor.execute(f"""
+                SELECT node_id, node_type, properties
+                FROM graph_nodes
+                WHERE node_id IN ({placeholders})
+            """, chunk)
+            found = dict.fromkeys(chunk)
+            for node_id, node_type, properties in cursor.fetchall():
+                if isinstance(properties, (str, bytes, bytearray)):
+                    properties = LazyProperties(properties)
+                found[node_id] = {'node_type': node_type, 'properties': properties}
+            return found
+        
+        return self._lazy_lookup('node', node_ids, fetch)
+    
+    def _lazy_lookup(self, kind: str, node_ids: Iterable[str],
+                     fetch: Callable[[Any, List[str]], Dict[str, Any]],
+                     chunk_size: int = 1000) -> Dict[str, Any]:
+        """Return cached values for node_ids, fetching misses in chunks with fetch()."""
+        result = {}
+        missing = []
+        with self._lazy_lock:
+            for node_id in node_ids:
+                key = (kind, node_id)
+                if key in self._lazy_cache:
+                    self._lazy_cache.move_to_end(key)
+                    result[node_id] = self._lazy_cache[key]
+                elif node_id not in result:
+                    result[node_id] = None
+                    missing.append(node_id)
+        
+        if missing:
+            conn = self.connect_db()
+            cursor = conn.cursor()
+            try:
+                for start in range(0, len(missing), chunk_size):
+                    result.update(fetch(cursor, missing[start:start + chunk_size]))
+            finally:
+                cursor.close()
+                conn.close()
+            
+            with self._lazy_lock:
+                for node_id in missing:
+                    self._lazy_cache[(kind, node_id)] = result[node_id]
+                while len(self._lazy_cache) > self.lazy_cache_size:
+                    self._lazy_cache.popitem(last=False)
+        
+        return result
+    
+    def _lazy_invalidate(self, node_ids: Iterable[str]) -> None:
+        """Drop cached lazy-mode entries for nodes that were written."""
+        with self._lazy_lock:
+            for node_id in node_ids:
+                for kind in ('out', 'in', 'node'):
+                    self._lazy_cache.pop((kind, node_id), None)
+    
+    def find_nodes(self, node_type: Optional[str] = None, **properties: Any) -> List[str]:
+        """
+        Find nodes by property values, e.g. a ticket by its ticket number.
+        
+        Properties listed in indexed_properties are answered from hash
+        indexes; any other conditions are checked on the indexed candidates,
+        or by scanning the nodes if no condition is indexed.
+        
+        Example:
+            kg.find_nodes('ticket', ticket_number='T-2024-001')  # ['ticket_123']
+        
+        Args:
+            node_type: Node type to search; None searches every type
+            **properties: property=value conditions that must all match
+        
+        Returns:
+            List of matching node IDs
+        """
+        if not properties:
+            raise ValueError("find_nodes needs at least one property condition")
+        if self.lazy:
+            return self._lazy_find_nodes(node_type, properties)
+        
+        node_types = [node_type] if node_type is not None else list(self._node_type_counts)
+        matches: List[str] = []
+        for candidate_type in node_types:
+            indexed = [prop for prop in properties if (candidate_type, prop) in self._property_index]
+            if indexed:
+                try:
+                    candidate_sets = [self._property_index[(candidate_type, prop)].get(properties[prop], {})
+                                      for prop in indexed]
+                except TypeError:
+                    continue
+                candidate_sets.sort(key=len)
+                candidates = [node_id for node_id in candidate_sets[0]
+                              if all(node_id in other for other in candidate_sets[1:])]
             else:
-                edge_data = self.graph[neighbor][node_id]
+                candidates = [node_id for node_id, data in self.graph.nodes(data=True)
+                              if data.get('node_type') == candidate_type]
             
-            confidence = edge_data.get('confidence', 0.0)
-            similar.append((neighbor, confidence))
+            remaining = [prop for prop in properties if prop not in indexed]
+            for node_id in candidates:
+                node_props = self.graph.nodes[node_id].get('properties', {})
+                if all(node_props.get(prop) == properties[prop] for prop in remaining):
+                    matches.append(node_id)
+        return matches
+    
+    def _lazy_find_nodes(self, node_type: Optional[str], properties: Dict[str, Any]) -> List[str]:
+        """find_nodes() for lazy mode, matching JSON properties in SQL."""
+        conditions = []
+        params: List[Any] = []
+        if node_type is not None:
+            conditions.append("node_type = %s")
+            params.append(node_type)
+        for prop, value in properties.items():
+            conditions.append("JSON_UNQUOTE(JSON_EXTRACT(properties, %s)) = %s")
+            params.extend([f'$."{prop}"', value])
+        
+        conn = self.connect_db()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"SELECT node_id FROM graph_nodes WHERE {' AND '.join(conditions)}", params)
+            return [row[0] for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+            conn.close()
+    
+    def filter_nodes(self, node_type: Optional[str] = None,
+                     node_ids: Optional[Iterable[str]] = None, **conditions: Any) -> List[str]:
+        """
+        Find nodes by hot property values with vectorized column filters.
+        
+        Only properties listed in hot_properties can be used as conditions.
+        
+        Example:
+            nearby = kg.traverse('ci_789', max_depth=2, ids_only=True)
+            kg.filter_nodes('ticket', node_ids=nearby, status='Open', category='Hardware')
+        
+        Args:
+            node_type: Optional node type the nodes must have
+            node_ids: Optional candidate nodes (e.g. a traverse() or
+                get_neighbors() result); all stored nodes if omitted
+            **conditions: property=value, or property=[values] to match any
+        
+        Returns:
+            Matching node IDs, in node_ids order when given
+        """
+        self._require_graph('filter_nodes')
+        if node_ids is not None:
+            node_ids = list(node_ids)
+        return self._columns.filter(node_ids, node_type, **conditions)
+    
+    def property_mask(self, node_ids: Iterable[str], node_type: Optional[str] = None,
+                      **conditions: Any) -> np.ndarray:
+        """
+        Evaluate a hot property filter for a list of nodes.
         
-        # Sort by confidence and return top_k
-        similar.sort(key=lambda x: x[1], reverse=True)
-        return similar[:top_k]
+        Args:
+            node_ids: Nodes to test
+            node_type: Optional node type the nodes must have
+            **conditions: property=value, or property=[values] to match any
+        
+        Returns:
+            Boolean NumPy array aligned with node_ids
+        """
+        self._require_graph('property_mask')
+        return self._columns.mask(list(node_ids), node_type, **conditions)
+    
+    def count_by(self, prop: str, node_type: Optional[str] = None,
+                 node_ids: Optional[Iterable[str]] = None, **conditions: Any) -> Dict[Any, int]:
+        """
+        Count nodes per value of a hot property, e.g. open tickets per category.
+        
+        Args:
+            prop: Hot property to group by
+            node_type: Optional node type the nodes must have
+            node_ids: Optional candidate nodes; all stored nodes if omitted
+            **conditions: Additional property=value filters
+        
+        Returns:
+            Dictionary value -> count, largest first (None for missing values)
+        """
+        self._require_graph('count_by')
+        if node_ids is not None:
+            node_ids = list(node_ids)
+        return self._columns.count_by(prop, node_ids, node_type, **conditions)
     
-    def get_stats(self) -> Dict[str, Any]:
+    def get_stats(self, detailed: bool = False) -> Dict[str, Any]:
         """
         Get graph statistics.
         
+        The basic metrics come from counters kept up to date on every node
+        and edge change, so they cost O(number of types), not a graph scan.
+        
+        Args:
+            detailed: If True, also include connectivity metrics that need a
+                full pass over the graph; these are cached until the graph
+                changes
+        
         Returns:
             Dictionary with graph metrics
         """
+        self._require_graph('get_stats')
+        # MultiDiGraph.number_of_edges() sums every node's adjacency, so totals
+        # come from the per-type counters as well
+        num_nodes = sum(self._node_type_counts.values())
+        num_edges = sum(self._edge_type_counts.values())
         stats = {
-            'total_nodes': self.graph.number_of_nodes(),
-            'total_edges': self.graph.number_of_edges(),
-            'node_types': {},
-            'edge_types': {},
+            'total_nodes': num_nodes,
+            'total_edges': num_edges,
+            'node_types': dict(self._node_type_counts),
+            'edge_types': dict(self._edge_type_counts),
             'avg_degree': 0.0,
             'density': 0.0
         }
         
-        # Count node types
-        for node_id in self.graph.nodes():
-            node_type = self.graph.nodes[node_id].get('node_type', 'unknown')
-            stats['node_types'][node_type] = stats['node_types'].get(node_type, 0) + 1
+        # Compute metrics; every edge adds one to an in- and an out-degree
+        if num_nodes > 0:
+            stats['avg_degree'] = 2 * num_edges / num_nodes
+        if num_nodes > 1:
+            stats['density'] = num_edges / (num_nodes * (num_nodes - 1))
         
-        # Count edge types
-        for source, target in self.graph.edges():
-            edge_type = self.graph[source][target].get('edge_type', 'unknown')
-            stats['edge_types'][edge_type] = stats['edge_types'].get(edge_type, 0) + 1
-        
-        # Compute metrics
-        if self.graph.number_of_nodes() > 0:
-            total_degree = sum(dict(self.graph.degree()).values())
-            stats['avg_degree'] = total_degree / self.graph.number_of_nodes()
-            stats['density'] = nx.density(self.graph)
+        if detailed:
+            if self._detailed_stats is None or self._detailed_stats[0] != self._version:
+                self._detailed_stats = (self._version, self._compute_detailed_stats())
+            stats.update(self._detailed_stats[1])
         
         return stats
     
+    def _compute_detailed_stats(self) -> Dict[str, Any]:
+        """Compute the full-scan metrics for get_stats(detailed=True)."""
+        components = [len(c) for c in nx.weakly_connected_components(self.graph)]
+        degrees = [degree for _, degree in self.graph.degree()]
+        return {
+            'weakly_connected_components': len(components),
+            'largest_component_size': max(components, default=0),
+            'isolated_nodes': sum(1 for degree in degrees if degree == 0),
+            'max_degree': max(degrees, default=0)
+        }
+    
     def _persist_node(self, node_id: str, node_type: str, properties: Dict[str, Any]) -> None:
-        """Save node to MySQL database."""
-        conn = self.connect_db()
-        cursor = conn.cursor()
+        """Save node to MySQL database (deferred in batch() or write-behind mode)."""
+        self._queue_writes({node_id: (node_id, node_type, self._properties_json(properties))}, {})
+    
+    def _persist_edge(self, source_id: str, target_id: str, edge_type: str,
+                     confidence: float, properties: Optional[Dict[str, Any]]) -> None:
+        """Save edge to MySQL database (deferred in batch() or write-behind mode)."""
+        props_json = self._properties_json(properties) if properties else None
+        self._queue_writes({}, {(source_id, target_id, edge_type): (
+            source_id, target_id, edge_type, confidence, props_json
+        )})
+    
+    @staticmethod
+    def _properties_json(properties: Any) -> str:
+        """Serialize properties for a JSON column."""
+        return encode_properties(properties).decode('utf-8')
+    
+    def _write_now(self, nodes: Dict[Any, Tuple], edges: Dict[Any, Tuple],
+                   chunk_size: int = 1000, raise_errors: bool = False) -> None:
+        """
+        Upsert node rows, then edge rows, over a single connection.
+        
+        Args:
+            nodes: node_id -> graph_nodes upsert row
+            edges: (source_id, target_id, edge_type) -> graph_edges upsert row
+            chunk_size: Rows per executemany call and commit
+            raise_errors: Re-raise the first failing chunk instead of logging
+                it; otherwise rejected rows are kept for take_failed_writes()
+        """
+        if not nodes and not edges:
+            return
         
+        node_label = f"node {next(iter(nodes))}" if len(nodes) == 1 else 'nodes'
+        edge_label = 'edges'
+        if len(edges) == 1:
+            source_id, target_id, _ = next(iter(edges))
+            edge_label = f"edge {source_id}->{target_id}"
+        
+        failed_nodes: List[Tuple] = []
+        failed_edges: List[Tuple] = []
+        conn = self.connect_db()
         try:
-            query = """
-                INSERT INTO graph_nodes (node_id, node_type, properties)
-                VALUES (%s, %s, %s)
-                ON DUPLICATE KEY UPDATE
-                    node_type = VALUES(node_type),
-                    properties = VALUES(properties),
-                    updated_at = CURRENT_TIMESTAMP
-            """
-            cursor.execute(query, (node_id, node_type, json.dumps(properties)))
-            conn.commit()
-        except Exception as e:
-            logger.error(f"Error persisting node {node_id}: {e}")
-            conn.rollback()
+            self._write_rows(NODE_UPSERT_SQL, list(nodes.values()), chunk_size, node_label, conn,
+                             raise_errors=raise_errors, failed=failed_nodes)
+            self._write_rows(EDGE_UPSERT_SQL, list(edges.values()), chunk_size, edge_label, conn,
+                             raise_errors=raise_errors, failed=failed_edges)
         finally:
-            cursor.close()
             conn.close()
+        
+        if failed_nodes or failed_edges:
+            with self._write_cond:
+                self._failed_writes['nodes'].update((row[0], row) for row in failed_nodes)
+                self._failed_writes['edges'].update((row[:3], row) for row in failed_edges)
     
-    def _persist_edge(self, source_id: str, target_id: str, edge_type: str,
-                     confidence: float, properties: Optional[Dict[str, Any]]) -> None:
-        """Save edge to MySQL database."""
-        conn = self.connect_db()
+    def _write_rows(self, query: str, rows: List[Tuple], chunk_size: int, label: str,
+                    conn: mysql.connector.MySQLConnection, raise_errors: bool = False,
+                    failed: Optional[List[Tuple]] = None) -> int:
+        """
+        Upsert rows, committing once per chunk.
+        
+        A failing chunk is rolled back; then it is re-raised with
+        raise_errors=True, otherwise logged (and added to failed) while later
+        chunks are still written.
+        
+        Returns:
+            Number of rows written successfully
+        """
+        if not rows:
+            return 0
+        
         cursor = conn.cursor()
+        written = 0
         
         try:
-            query = """
-                INSERT INTO graph_edges (source_id, target_id, edge_type, confidence, properties)
-                VALUES (%s, %s, %s, %s, %s)
-                ON DUPLICATE KEY UPDATE
-                    confidence = VALUES(confidence),
-                    properties = VALUES(properties),
-                    updated_at = CURRENT_TIMESTAMP
-            """
-            props_json = json.dumps(properties) if properties else None
-            cursor.execute(query, (source_id, target_id, edge_type, confidence, props_json))
-            conn.commit()
-        except Exception as e:
-            logger.error(f"Error persisting edge {source_id}->{target_id}: {e}")
-            conn.rollback()
+            for start in range(0, len(rows), chunk_size):
+                chunk = rows[start:start + chunk_size]
+                try:
+                    cursor.executemany(query, chunk)
+                    conn.commit()
+                    written += len(chunk)
+                except Exception as e:
+                    conn.rollback()
+                    if raise_errors:
+                        raise
+                    where = f" (rows {start}-{start + len(chunk) - 1})" if len(rows) > 1 else ""
+                    logger.error(f"Error persisting {label}{where}: {e}")
+                    if failed is not None:
+                        failed.extend(chunk)
         finally:
             cursor.close()
-            conn.close()
+        
+        if len(rows) > 1:
+            logger.info(f"Persisted {written}/{len(rows)} {label}")
+        return written
 
 
 # Example usage
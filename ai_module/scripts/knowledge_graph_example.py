@@ -15,12 +15,15 @@ db_config = {
     'database': 'ticketportaal'
 }
 
+# Only follow edges with confidence >= 0.5 in the queries below
+MIN_CONFIDENCE = 0.5
+
 # Initialize knowledge graph
 kg = KnowledgeGraph(db_config)
 
 # Load existing graph from database
 print("Loading knowledge graph from database...")
-kg.load_from_db(min_confidence=0.5)  # Only load edges with confidence >= 0.5
+kg.load_from_db()  # Load all edges once; queries below apply their own threshold
 print(f"Loaded {kg.graph.number_of_nodes()} nodes and {kg.graph.number_of_edges()} edges\n")
 
 # ============================================================================
@@ -34,7 +37,7 @@ ticket_id = 'ticket_1'
 print(f"\nFinding tickets related to {ticket_id}...")
 
 # Get similar tickets
-similar = kg.get_similar_nodes(ticket_id, top_k=5)
+similar = kg.get_similar_nodes(ticket_id, top_k=5, min_confidence=MIN_CONFIDENCE)
 if similar:
     print(f"\nSimilar tickets:")
     for node_id, score in similar:
@@ -54,7 +57,7 @@ print("=" * 70)
 print(f"\nTracing relationships from {ticket_id}...")
 
 # Traverse graph to find all related entities
-subgraph = kg.traverse(ticket_id, max_depth=2)
+subgraph = kg.traverse(ticket_id, max_depth=2, min_confidence=MIN_CONFIDENCE)
 
 print(f"\nFound {len(subgraph['nodes'])} related entities:")
 for node in subgraph['nodes']:
@@ -85,7 +88,8 @@ print("=" * 70)
 print(f"\nFinding CI items affected by {ticket_id}...")
 
 # Get CI items connected via AFFECTS relationship
-affected_cis = kg.get_neighbors(ticket_id, edge_type='AFFECTS', direction='out')
+affected_cis = kg.get_neighbors(ticket_id, edge_type='AFFECTS', direction='out',
+                               min_confidence=MIN_CONFIDENCE)
 
 if affected_cis:
     print(f"\nAffected CI items:")
@@ -94,7 +98,7 @@ if affected_cis:
         props = ci_data.get('properties', {})
         
         # Get edge confidence
-        edge_data = kg.graph[ticket_id][ci_id]
+        edge_data = kg.get_edge(ticket_id, ci_id, 'AFFECTS')
         confidence = edge_data.get('confidence', 0.0)
         
         print(f"  • {props.get('name', 'N/A')} ({props.get('type', 'N/A')})")
@@ -114,20 +118,20 @@ print("=" * 70)
 kb_id = 'kb_1'
 print(f"\nFinding resolution path from {ticket_id} to {kb_id}...")
 
-paths = kg.find_paths(ticket_id, kb_id, max_length=3)
+# Only the 3 most confident paths; stops searching once they are found
+paths = list(kg.find_best_paths(ticket_id, kb_id, k=3, max_length=3,
+                                min_confidence=MIN_CONFIDENCE))
 
 if paths:
     print(f"\nFound {len(paths)} path(s):")
-    for i, path in enumerate(paths, 1):
-        print(f"\n  Path {i}:")
+    for i, (path, confidence) in enumerate(paths, 1):
+        print(f"\n  Path {i} (confidence: {confidence:.2f}):")
         for j in range(len(path) - 1):
             source = path[j]
             target = path[j + 1]
             
-            # Get edge type
-            if kg.graph.has_edge(source, target):
-                edge_data = kg.graph[source][target]
-                edge_type = edge_data.get('edge_type', 'UNKNOWN')
+            # Get edge types (a node pair can have several relationships)
+            for edge_type in kg.get_edge_types(source, target):
                 print(f"    {source} --{edge_type}--> {target}")
 else:
     print("  No paths found")
@@ -148,7 +152,7 @@ ticket_nodes = [node_id for node_id in kg.graph.nodes()
 # Compute centrality for each ticket
 ticket_centrality = []
 for ticket_id in ticket_nodes:
-    centrality = kg.compute_centrality(ticket_id)
+    centrality = kg.compute_centrality(ticket_id, min_confidence=MIN_CONFIDENCE)
     props = kg.graph.nodes[ticket_id].get('properties', {})
     ticket_centrality.append((ticket_id, props.get('title', 'N/A'), centrality))
 
@@ -208,15 +212,15 @@ for ticket_id in top_tickets:
     print(f"    Title: {props.get('title', 'N/A')}")
     
     # Get centrality (importance score)
-    centrality = kg.compute_centrality(ticket_id)
+    centrality = kg.compute_centrality(ticket_id, min_confidence=MIN_CONFIDENCE)
     print(f"    Importance: {centrality:.3f}")
     
     # Get related entities
-    neighbors = kg.get_neighbors(ticket_id, direction='out')
+    neighbors = kg.get_neighbors(ticket_id, direction='out', min_confidence=MIN_CONFIDENCE)
     print(f"    Related entities: {len(neighbors)}")
     
     # Get similar tickets
-    similar = kg.get_similar_nodes(ticket_id, top_k=3)
+    similar = kg.get_similar_nodes(ticket_id, top_k=3, min_confidence=MIN_CONFIDENCE)
     if similar:
         print(f"    Similar tickets: {[s[0] for s in similar]}")
     
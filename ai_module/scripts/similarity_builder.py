@@ -0,0 +1,185 @@
+"""
+Similarity Edge Builder
+Builds SIMILAR_TO edges (method "vector_similarity") from ticket/KB embeddings.
+
+This module handles:
+- Top-k cosine neighbors for every row of an embedding matrix, computed in
+  fixed-size blocks so memory stays bounded (works on .npy memmaps larger
+  than RAM)
+- Incremental runs that only compare newly appended rows against the
+  existing rows
+- Writing the results into a KnowledgeGraph through add_edges_bulk()
+
+Embeddings are expected as an (N, dim) float array whose row i belongs to
+node_ids[i], e.g. exported from the vector database after a sync.
+"""
+
+import argparse
+import logging
+from typing import Iterator, List, Sequence, Set, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SIMILARITY_METHOD = 'vector_similarity'
+
+
+def load_embeddings(path: str) -> np.ndarray:
+    """Open a .npy embedding matrix as a read-only memmap (nothing is read yet)."""
+    return np.load(path, mmap_mode='r')
+
+
+def _inverse_norms(embeddings: np.ndarray, block_size: int) -> np.ndarray:
+    """1 / L2 norm per row (0 for all-zero rows), read block by block."""
+    inverse = np.zeros(len(embeddings), dtype=np.float32)
+    for start in range(0, len(embeddings), block_size):
+        block = np.asarray(embeddings[start:start + block_size], dtype=np.float32)
+        norms = np.sqrt(np.einsum('ij,ij->i', block, block))
+        np.divide(1.0, norms, out=inverse[start:start + block_size], where=norms > 0)
+    return inverse
+
+
+def iter_top_k(embeddings: np.ndarray, top_k: int = 5, min_similarity: float = 0.0,
+               block_size: int = 2048, start_row: int = 0
+               ) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    Top-k cosine neighbors per row, computed blockwise.
+
+    Each block of query rows is multiplied against the index one block at a
+    time and a running top-k is kept, so peak memory is about
+    block_size * (block_size + top_k) scores regardless of N.
+
+    Args:
+        embeddings: (N, dim) array or memmap
+        top_k: Neighbors to keep per row (a row is never its own neighbor)
+        min_similarity: Drop neighbors with a lower cosine similarity
+        block_size: Rows per query and index block
+        start_row: Only compute neighbors for rows from here on (incremental
+            mode); they are still compared against all N rows
+
+    Yields:
+        (rows, neighbors, similarities) per query block: rows is (b,),
+        neighbors and similarities are (b, top_k), best first; entries below
+        min_similarity have neighbor -1
+    """
+    total = len(embeddings)
+    if top_k <= 0 or start_row >= total:
+        return
+    inverse = _inverse_norms(embeddings, block_size)
+
+    for query_start in range(start_row, total, block_size):
+        rows = np.arange(query_start, min(query_start + block_size, total))
+        queries = np.asarray(embeddings[query_start:query_start + block_size], dtype=np.float32) * inverse[rows, None]
+        best_scores = np.full((len(rows), top_k), -np.inf, dtype=np.float32)
+        best_ids = np.full((len(rows), top_k), -1, dtype=np.int64)
+
+        for index_start in range(0, total, block_size):
+            index = np.asarray(embeddings[index_start:index_start + block_size], dtype=np.float32)
+            index_ids = np.arange(index_start, index_start + len(index))
+            scores = queries @ (index * inverse[index_ids, None]).T
+            overlap = np.flatnonzero((rows >= index_start) & (rows < index_start + len(index)))
+            scores[overlap, rows[overlap] - index_start] = -np.inf
+
+            # Merge this block into the running top-k
+            scores = np.concatenate([best_scores, scores], axis=1)
+            ids = np.concatenate([best_ids, np.broadcast_to(index_ids, (len(rows), len(index_ids)))], axis=1)
+            keep = np.argpartition(-scores, top_k - 1, axis=1)[:, :top_k]
+            best_scores = np.take_along_axis(scores, keep, axis=1)
+            best_ids = np.take_along_axis(ids, keep, axis=1)
+
+        order = np.argsort(-best_scores, axis=1, kind='stable')
+        best_scores = np.take_along_axis(best_scores, order, axis=1)
+        best_ids = np.take_along_axis(best_ids, order, axis=1)
+        best_ids[~(best_scores >= min_similarity)] = -1
+        yield rows, best_ids, best_scores
+
+
+def build_similarity_edges(kg: 'KnowledgeGraph', embeddings: Union[np.ndarray, str],
+                           node_ids: Sequence[str], top_k: int = 5, min_similarity: float = 0.75,
+                           block_size: int = 2048, start_row: int = 0, persist: bool = True) -> int:
+    """
+    Compute top-k similar nodes per embedding row and add them as SIMILAR_TO edges.
+
+    Edges are written per query block through kg.add_edges_bulk(), with the
+    cosine similarity as confidence and the properties used by the schema
+    example: {"similarity_score": ..., "method": "vector_similarity"}.
+    Similarity is symmetric, so a pair in both rows' top_k is written once,
+    in the direction it was first found.
+
+    Args:
+        kg: KnowledgeGraph to write to (nodes must already exist)
+        embeddings: (N, dim) array, or path to a .npy file (memory-mapped)
+        node_ids: Node ID for each embedding row
+        top_k: Neighbors per row
+        min_similarity: Minimum cosine similarity for an edge
+        block_size: Rows per block (bounds memory)
+        start_row: First new row; rows before it are only used as neighbors
+        persist: If True, save to MySQL database
+
+    Returns:
+        Number of edges added or updated
+    """
+    if isinstance(embeddings, str):
+        embeddings = load_embeddings(embeddings)
+    if len(node_ids) != len(embeddings):
+        raise ValueError(f"Got {len(node_ids)} node IDs for {len(embeddings)} embedding rows")
+
+    written = 0
+    # (row, neighbor) pairs whose neighbor is still to be queried; dropped
+    # again once the neighbor lists the row, so this stays small
+    pending: Set[Tuple[int, int]] = set()
+    for rows, neighbors, similarities in iter_top_k(embeddings, top_k, min_similarity, block_size, start_row):
+        edges: List[Tuple] = []
+        for row, row_neighbors, row_similarities in zip(rows.tolist(), neighbors.tolist(), similarities.tolist()):
+            for neighbor, similarity in zip(row_neighbors, row_similarities):
+                if neighbor < 0:
+                    continue
+                if neighbor > row:
+                    pending.add((row, neighbor))
+                elif (neighbor, row) in pending:
+                    pending.discard((neighbor, row))
+                    continue
+                similarity = min(similarity, 1.0)
+                edges.append((node_ids[row], node_ids[neighbor], 'SIMILAR_TO', similarity,
+                              {'similarity_score': round(similarity, 4), 'method': SIMILARITY_METHOD}))
+        written += kg.add_edges_bulk(edges, persist=persist)
+        logger.info(f"Similarity edges: rows {rows[0]}-{rows[-1]} done ({written} edges so far)")
+    return written
+
+
+def main():
+    """Nightly/incremental similarity rebuild from an exported embedding matrix"""
+    from knowledge_graph import KnowledgeGraph
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('embeddings', help='Path to (N, dim) .npy embedding matrix')
+    parser.add_argument('node_ids', help='Text file with the node ID of each row, one per line')
+    parser.add_argument('--top-k', type=int, default=5)
+    parser.add_argument('--min-similarity', type=float, default=0.75)
+    parser.add_argument('--block-size', type=int, default=2048)
+    parser.add_argument('--start-row', type=int, default=0,
+                        help='Only compute neighbors for rows from here on (incremental run)')
+    parser.add_argument('--node-types', default='ticket,kb',
+                        help='Comma-separated node types of the embedded rows')
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--user', default='root')
+    parser.add_argument('--password', default='')
+    parser.add_argument('--database', default='ticketportaal')
+    args = parser.parse_args()
+
+    with open(args.node_ids, encoding='utf-8') as f:
+        node_ids = [line.strip() for line in f if line.strip()]
+
+    kg = KnowledgeGraph({'host': args.host, 'user': args.user,
+                         'password': args.password, 'database': args.database})
+    # Only the endpoint nodes are needed in memory to add the edges
+    kg.load_from_db(node_types=args.node_types.split(','), edge_types=['SIMILAR_TO'])
+    written = build_similarity_edges(kg, args.embeddings, node_ids, top_k=args.top_k,
+                                     min_similarity=args.min_similarity, block_size=args.block_size,
+                                     start_row=args.start_row)
+    print(f"Wrote {written} SIMILAR_TO edges")
+
+
+if __name__ == "__main__":
+    main()
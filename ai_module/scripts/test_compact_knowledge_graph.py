@@ -0,0 +1,99 @@
+"""
+Tests for CompactKnowledgeGraph (no database needed).
+
+This script checks that the CSR graph answers neighbor, traversal and path
+queries the same way as the KnowledgeGraph it was built from, on a random
+graph with parallel edges of different types.
+"""
+
+import sys
+import os
+import random
+from typing import Any, Dict, List
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from knowledge_graph import KnowledgeGraph
+from compact_knowledge_graph import CompactKnowledgeGraph
+
+
+EDGE_TYPES = ['AFFECTS', 'CREATED_BY', 'SIMILAR_TO']
+
+
+def build_random_graph(num_nodes: int = 40, num_edges: int = 160, seed: int = 0) -> KnowledgeGraph:
+    """
+    Build an in-memory graph with random edge types and confidences (nothing is persisted).
+    """
+    rng = random.Random(seed)
+    kg = KnowledgeGraph({'host': 'localhost', 'user': 'root', 'password': '', 'database': 'ticketportaal'})
+    for i in range(num_nodes):
+        kg.add_node(f'n{i}', rng.choice(['ticket', 'ci']), {'index': i}, persist=False)
+    for _ in range(num_edges):
+        source, target = rng.sample(range(num_nodes), 2)
+        kg.add_edge(f'n{source}', f'n{target}', rng.choice(EDGE_TYPES),
+                    confidence=round(rng.uniform(0.05, 1.0), 2), persist=False)
+    return kg
+
+
+def edge_list(subgraph: Dict[str, Any]) -> List[tuple]:
+    return sorted((edge['source'], edge['target'], edge['type'], round(edge['confidence'], 6))
+                  for edge in subgraph['edges'])
+
+
+def test_queries_match_knowledge_graph() -> None:
+    """get_neighbors, traverse and find_paths agree with KnowledgeGraph."""
+    kg = build_random_graph()
+    compact = CompactKnowledgeGraph.from_knowledge_graph(kg)
+    nodes = list(kg.graph.nodes())
+    assert compact.number_of_nodes() == len(nodes)
+    assert compact.number_of_edges() == kg.graph.number_of_edges()
+
+    for node_id in nodes + ['missing']:
+        for edge_type in [None] + EDGE_TYPES:
+            for direction in ('out', 'in', 'both'):
+                for min_confidence in (0.0, 0.5):
+                    label = (node_id, edge_type, direction, min_confidence)
+                    assert sorted(compact.get_neighbors(node_id, edge_type, direction, min_confidence)) == \
+                        sorted(kg.get_neighbors(node_id, edge_type, direction, min_confidence)), label
+
+    rng = random.Random(1)
+    for start in rng.sample(nodes, 10) + [['n0', 'n1', 'missing']]:
+        for max_depth, edge_types, min_confidence in [(1, None, 0.0), (2, None, 0.4),
+                                                      (3, ['AFFECTS', 'SIMILAR_TO'], 0.0)]:
+            label = (start, max_depth, edge_types, min_confidence)
+            options = dict(max_depth=max_depth, edge_types=edge_types, min_confidence=min_confidence)
+            assert sorted(compact.traverse(start, ids_only=True, **options)) == \
+                sorted(kg.traverse(start, ids_only=True, **options)), label
+            expected, actual = kg.traverse(start, **options), compact.traverse(start, **options)
+            assert sorted(node['id'] for node in actual['nodes']) == \
+                sorted(node['id'] for node in expected['nodes']), label
+            assert edge_list(actual) == edge_list(expected), label
+
+    for _ in range(40):
+        source, target = rng.sample(nodes, 2)
+        for max_length, min_confidence in [(3, 0.0), (4, 0.3)]:
+            assert sorted(compact.find_paths(source, target, max_length, min_confidence)) == \
+                sorted(kg.find_paths(source, target, max_length, min_confidence)), (source, target)
+    assert compact.find_paths('n0', 'n0') == kg.find_paths('n0', 'n0') == [['n0']]
+    assert compact.find_paths('n0', 'missing') == kg.find_paths('n0', 'missing') == []
+
+
+def main():
+    """
+    Main test function.
+    """
+    print("\n" + "=" * 70)
+    print("COMPACT KNOWLEDGE GRAPH TEST SUITE")
+    print("=" * 70)
+
+    test_queries_match_knowledge_graph()
+    print("✅ CompactKnowledgeGraph queries match KnowledgeGraph")
+
+    print("\n" + "=" * 70)
+    print("✅ ALL TESTS PASSED!")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
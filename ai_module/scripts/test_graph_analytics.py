@@ -0,0 +1,187 @@
+"""
+Tests for GraphAnalytics (no database needed).
+
+This script checks:
+1. PageRank, betweenness and Adamic-Adar/Jaccard against networkx on a
+   small random graph
+2. predict_similar_edges() writing each pair once
+3. related_nodes() on a stale view
+"""
+
+import sys
+import os
+import math
+import random
+from typing import Dict
+
+import networkx as nx
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from knowledge_graph import KnowledgeGraph
+
+
+def build_mixed_graph(seed: int = 0) -> KnowledgeGraph:
+    """
+    Build an in-memory graph of tickets linked to shared CIs, users and
+    categories, plus some SIMILAR_TO edges (nothing is persisted).
+    """
+    rng = random.Random(seed)
+    kg = KnowledgeGraph({'host': 'localhost', 'user': 'root', 'password': '', 'database': 'ticketportaal'})
+    tickets = [f'ticket_{i}' for i in range(40)]
+    others = ([(f'ci_{i}', 'ci', 'AFFECTS') for i in range(12)]
+              + [(f'user_{i}', 'user', 'CREATED_BY') for i in range(8)]
+              + [(f'category_{i}', 'category', 'BELONGS_TO') for i in range(3)])
+    for ticket in tickets:
+        kg.add_node(ticket, 'ticket', {}, persist=False)
+    for node_id, node_type, _ in others:
+        kg.add_node(node_id, node_type, {}, persist=False)
+
+    for ticket in tickets:
+        for node_id, _, edge_type in rng.sample(others, 3):
+            kg.add_edge(ticket, node_id, edge_type, confidence=round(rng.uniform(0.1, 1.0), 2), persist=False)
+    for _ in range(30):
+        source, target = rng.sample(tickets, 2)
+        kg.add_edge(source, target, 'SIMILAR_TO', confidence=round(rng.uniform(0.5, 1.0), 2), persist=False)
+    # A few isolated nodes exercise the dangling-node handling
+    for i in range(3):
+        kg.add_node(f'kb_{i}', 'kb', {}, persist=False)
+    return kg
+
+
+def assert_close(actual: Dict[str, float], expected: Dict[str, float], tolerance: float, label: str) -> None:
+    assert actual.keys() == expected.keys(), label
+    for key, value in expected.items():
+        assert abs(actual[key] - value) < tolerance, (label, key, actual[key], value)
+
+
+def test_pagerank_matches_networkx() -> None:
+    """Confidence-weighted PageRank equals networkx.pagerank(weight='confidence')."""
+    kg = build_mixed_graph()
+    expected = nx.pagerank(kg.graph, alpha=0.85, weight='confidence', tol=1e-12, max_iter=1000)
+    actual = kg.analytics.pagerank(tol=1e-12, max_iter=1000)
+    assert_close(actual, expected, 1e-8, 'pagerank')
+
+
+def test_betweenness_matches_networkx() -> None:
+    """Exact (unsampled) betweenness equals networkx.betweenness_centrality()."""
+    kg = build_mixed_graph()
+    expected = nx.betweenness_centrality(kg.graph, normalized=True)
+    actual = kg.analytics.betweenness(samples=None)
+    assert_close(actual, expected, 1e-9, 'betweenness')
+
+
+def test_link_predictions_match_networkx() -> None:
+    """
+    Adamic-Adar and Jaccard scores equal networkx on the undirected, non-SIMILAR_TO
+    graph, and with max_degree on that graph without the hub neighbors.
+    """
+    kg = build_mixed_graph()
+    undirected = nx.Graph()
+    undirected.add_nodes_from(kg.graph)
+    undirected.add_edges_from((u, v) for u, v, edge_type in kg.graph.edges(keys=True)
+                              if edge_type != 'SIMILAR_TO')
+    tickets = [node_id for node_id, data in kg.graph.nodes(data=True) if data['node_type'] == 'ticket']
+    pairs = [(a, b) for a in tickets for b in tickets if a != b]
+
+    for max_degree in (None, 5):
+        hubs = [node_id for node_id, degree in undirected.degree() if max_degree is not None and degree > max_degree]
+        assert not set(hubs) & set(tickets)
+        without_hubs = undirected.copy()
+        without_hubs.remove_nodes_from(hubs)
+        for method, networkx_method in [('adamic_adar', nx.adamic_adar_index),
+                                        ('jaccard', nx.jaccard_coefficient)]:
+            label = (method, max_degree)
+            expected = {(a, b): score for a, b, score in networkx_method(without_hubs, pairs) if score > 0}
+            predictions = kg.analytics.link_predictions(node_type='ticket', method=method, k=len(tickets),
+                                                        max_degree=max_degree, exclude_existing=False)
+            actual = {(a, b): score for a, b, score in predictions}
+            assert len(actual) == len(predictions), label
+            assert_close(actual, expected, 1e-9, label)
+
+
+def test_predict_similar_edges_once_per_pair() -> None:
+    """predict_similar_edges() writes one edge per unordered pair, with a score-only confidence."""
+    kg = build_mixed_graph()
+    predictions = kg.analytics.link_predictions('ticket', 'adamic_adar', k=3)
+    assert {(a, b) for a, b, _ in predictions} & {(b, a) for a, b, _ in predictions}
+
+    before = {(u, v) for u, v, edge_type in kg.graph.edges(keys=True) if edge_type == 'SIMILAR_TO'}
+    written = kg.predict_similar_edges('ticket', 'adamic_adar', top_k=3, persist=False)
+    added = [(u, v, data) for u, v, edge_type, data in kg.graph.edges(keys=True, data=True)
+             if edge_type == 'SIMILAR_TO' and (u, v) not in before]
+    assert len(added) == written == len({frozenset((u, v)) for u, v, _ in added})
+    for _, _, data in added:
+        expected = 1.0 - math.exp(-data['properties']['similarity_score'])
+        assert abs(data['confidence'] - expected) < 1e-5
+
+
+def test_related_nodes_on_stale_view() -> None:
+    """related_nodes() for a just-added ticket reuses the view and skips removed nodes."""
+    kg = build_mixed_graph()
+    kg.related_nodes('ticket_0', node_type='ticket', k=5)
+    view = kg.analytics.view()
+
+    kg.add_node('ticket_new', 'ticket', {}, persist=False)
+    kg.add_edge('ticket_new', 'ci_0', 'AFFECTS', confidence=0.9, persist=False)
+    kg.add_edge('ticket_new', 'user_0', 'CREATED_BY', confidence=0.6, persist=False)
+    stale = kg.related_nodes('ticket_new', node_type='ticket', k=5)
+    assert kg.analytics._view is view and len(stale) == 5
+
+    removed = stale[0][0]
+    kg._remove_node(removed)  # As refresh() does for a deleted row
+    after_removal = kg.related_nodes('ticket_new', node_type='ticket', k=5)
+    assert kg.analytics._view is view and len(after_removal) == 5 and removed not in dict(after_removal)
+
+    # Seeding through the neighbors finds the same tickets as a rebuilt view
+    kg.analytics.max_stale_versions = 0
+    fresh = kg.related_nodes('ticket_new', node_type='ticket', k=5)
+    assert kg.analytics._view is not view
+    kg.analytics.max_stale_versions = 1000
+    kg.add_node('ticket_newer', 'ticket', {}, persist=False)
+    kg.add_edge('ticket_newer', 'ci_0', 'AFFECTS', confidence=0.9, persist=False)
+    kg.add_edge('ticket_newer', 'user_0', 'CREATED_BY', confidence=0.6, persist=False)
+    stale = kg.related_nodes('ticket_newer', node_type='ticket', k=6)
+    assert set(dict(stale)) == set(dict(fresh)) | {'ticket_new'}, (stale, fresh)
+
+
+def test_related_nodes_with_iterator_seeds() -> None:
+    """Seeds given as one-shot iterators rank the same as lists, without the seeds."""
+    kg = build_mixed_graph()
+    seeds = ['ticket_0', 'ticket_1']
+    expected = kg.related_nodes(seeds, node_type='ticket', k=5)
+    assert not set(dict(expected)) & set(seeds)
+    assert kg.related_nodes(iter(seeds), node_type='ticket', k=5) == expected
+    batch = kg.related_nodes_many([(seed for seed in seeds), iter(['ticket_2'])], node_type='ticket', k=5)
+    assert batch == [expected, kg.related_nodes('ticket_2', node_type='ticket', k=5)]
+
+
+def main():
+    """
+    Main test function.
+    """
+    print("\n" + "=" * 70)
+    print("GRAPH ANALYTICS TEST SUITE")
+    print("=" * 70)
+
+    test_pagerank_matches_networkx()
+    print("✅ PageRank matches networkx")
+    test_betweenness_matches_networkx()
+    print("✅ Betweenness matches networkx")
+    test_link_predictions_match_networkx()
+    print("✅ Adamic-Adar and Jaccard link scores match networkx")
+    test_predict_similar_edges_once_per_pair()
+    print("✅ predict_similar_edges() writes each pair once")
+    test_related_nodes_on_stale_view()
+    print("✅ related_nodes() works on a stale view")
+    test_related_nodes_with_iterator_seeds()
+    print("✅ related_nodes() accepts iterator seeds")
+
+    print("\n" + "=" * 70)
+    print("✅ ALL TESTS PASSED!")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
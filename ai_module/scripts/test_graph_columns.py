@@ -0,0 +1,104 @@
+"""
+Tests for the ColumnStore property columns (no database needed).
+
+This script checks ColumnStore filters and counts against a plain Python
+scan, across updates, removals and reused rows.
+"""
+
+import sys
+import os
+import random
+from typing import Any, Dict
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from graph_columns import ColumnStore
+
+
+def test_column_store_filters() -> None:
+    """ColumnStore.mask/filter/count_by agree with a plain scan, across updates and removals."""
+    rng = random.Random(0)
+    store = ColumnStore({'ticket': ['status', 'priority'], 'ci': ['status']}, initial_capacity=4)
+    nodes: Dict[str, Dict[str, Any]] = {}
+
+    def put(node_id, node_type, properties):
+        store.set_node(node_id, node_type, properties)
+        nodes[node_id] = {'node_type': node_type, **properties}
+
+    for i in range(200):
+        node_type = rng.choice(['ticket', 'ticket', 'ci', 'user'])
+        properties = {'status': rng.choice(['Open', 'Closed', 'Pending', None]),
+                      'priority': rng.choice(['low', 'high'])}
+        put(f'node_{i}', node_type, properties)
+    for i in rng.sample(range(200), 50):
+        put(f'node_{i}', 'ticket', {'status': 'Open', 'priority': 'urgent'})
+    for i in rng.sample(range(200), 40):
+        store.remove_node(f'node_{i}')
+        nodes.pop(f'node_{i}', None)
+    for i in range(200, 230):  # Reuses the freed rows
+        put(f'node_{i}', 'ticket', {'status': 'Closed'})
+
+    stored = {node_id: data for node_id, data in nodes.items() if data['node_type'] in ('ticket', 'ci')}
+    assert len(store) == len(stored)
+
+    def scan(node_ids, node_type=None, **conditions):
+        matches = []
+        for node_id in node_ids:
+            data = stored.get(node_id)
+            if data is None or (node_type is not None and data['node_type'] != node_type):
+                continue
+            if node_type is None and data['node_type'] == 'ci' and 'priority' in conditions:
+                continue  # priority is not stored for CIs
+            wanted = all(data.get(prop) in (value if isinstance(value, list) else [value])
+                         for prop, value in conditions.items())
+            if wanted:
+                matches.append(node_id)
+        return matches
+
+    probe = [f'node_{i}' for i in rng.sample(range(260), 120)]  # Includes unknown IDs
+    for node_type, conditions in [(None, {}), ('ticket', {}), ('ci', {'status': 'Open'}),
+                                  ('ticket', {'status': ['Open', 'Pending'], 'priority': 'urgent'}),
+                                  (None, {'status': 'Closed'}), ('ticket', {'status': 'Unknown'}),
+                                  ('user', {})]:
+        assert sorted(store.filter(node_type=node_type, **conditions)) == \
+            sorted(scan(stored, node_type, **conditions)), (node_type, conditions)
+        assert store.filter(probe, node_type, **conditions) == scan(probe, node_type, **conditions), \
+            (node_type, conditions)
+        assert store.mask(probe, node_type, **conditions).tolist() == \
+            [node_id in scan([node_id], node_type, **conditions) for node_id in probe]
+
+    def count(prop, node_ids, node_type=None, **conditions):
+        counts: Dict[Any, int] = {}
+        for node_id in scan(node_ids, node_type, **conditions):
+            data = stored[node_id]
+            value = data.get(prop) if prop in store.hot_properties[data['node_type']] else None
+            counts[value] = counts.get(value, 0) + 1
+        return counts
+
+    for prop, node_ids, node_type, conditions in [('status', stored, 'ticket', {}),
+                                                  ('status', stored, None, {}),
+                                                  ('priority', probe, None, {'status': 'Open'})]:
+        counts = store.count_by(prop, None if node_ids is stored else node_ids, node_type, **conditions)
+        assert counts == count(prop, node_ids, node_type, **conditions), (prop, node_type, conditions)
+        assert list(counts.values()) == sorted(counts.values(), reverse=True), (prop, node_type, conditions)
+
+
+def main():
+    """
+    Main test function.
+    """
+    print("\n" + "=" * 70)
+    print("COLUMN STORE TEST SUITE")
+    print("=" * 70)
+
+    test_column_store_filters()
+    print("✅ ColumnStore filters match a plain scan")
+
+    print("\n" + "=" * 70)
+    print("✅ ALL TESTS PASSED!")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -10,7 +10,13 @@ This script demonstrates:
 
 import sys
 import os
+import json
+import random
+import shutil
+import tempfile
+from datetime import datetime
 from knowledge_graph import KnowledgeGraph
+from compact_knowledge_graph import CompactKnowledgeGraph
 import mysql.connector
 from typing import Dict
 
@@ -228,6 +234,10 @@ def test_add_edges(kg: KnowledgeGraph) -> bool:
         })
         print("✅ Added edge: ticket_1 --SIMILAR_TO--> ticket_3")
         
+        # Parallel relationship between the same pair
+        kg.add_edge('ticket_1', 'ticket_3', 'DUPLICATE_OF', confidence=0.90)
+        print("✅ Added edge: ticket_1 --DUPLICATE_OF--> ticket_3")
+        
         # DOCUMENTED_IN relationship
         kg.add_edge('ticket_1', 'kb_1', 'DOCUMENTED_IN', confidence=0.80, properties={
             'relevance_score': 0.80
@@ -260,6 +270,12 @@ def test_queries(kg: KnowledgeGraph) -> bool:
         affected = kg.get_neighbors('ticket_1', edge_type='AFFECTS', direction='out')
         print(f"   Affected CI items: {affected}")
         
+        # Test 2b: Parallel edge types between one node pair
+        print("\n📊 Query 2b: Relationships from ticket_1 to ticket_3")
+        edge_types = kg.get_edge_types('ticket_1', 'ticket_3')
+        print(f"   Edge types: {edge_types}")
+        assert set(edge_types) == {'SIMILAR_TO', 'DUPLICATE_OF'}, "Parallel edge was lost"
+        
         # Test 3: Traverse graph
         print("\n📊 Query 3: Traverse from ticket_1 (max depth 2)")
         subgraph = kg.traverse('ticket_1', max_depth=2)
@@ -333,6 +349,441 @@ def test_statistics(kg: KnowledgeGraph) -> bool:
         return False
 
 
+def build_random_graph(num_nodes: int = 60, num_edges: int = 240, seed: int = 0) -> KnowledgeGraph:
+    """
+    Build an in-memory graph with random confidences (nothing is persisted).
+    """
+    rng = random.Random(seed)
+    kg = KnowledgeGraph(get_db_config())
+    for i in range(num_nodes):
+        kg.add_node(f'n{i}', 'ticket', {}, persist=False)
+    for _ in range(num_edges):
+        source, target = rng.sample(range(num_nodes), 2)
+        kg.add_edge(f'n{source}', f'n{target}', rng.choice(['AFFECTS', 'SIMILAR_TO']),
+                    confidence=round(rng.uniform(0.05, 1.0), 2), persist=False)
+    return kg
+
+
+def best_path_scores(kg: KnowledgeGraph, start: str, max_depth: int, direction: str) -> Dict[str, float]:
+    """
+    Brute force: best confidence product over all simple paths of at most max_depth hops.
+    """
+    best: Dict[str, float] = {}
+    
+    def walk(node_id, score, depth, path):
+        if depth == max_depth:
+            return
+        steps = []
+        if direction in ['out', 'both']:
+            steps += [(v, d['confidence']) for _, v, d in kg.graph.out_edges(node_id, data=True)]
+        if direction in ['in', 'both']:
+            steps += [(u, d['confidence']) for u, _, d in kg.graph.in_edges(node_id, data=True)]
+        for neighbor, confidence in steps:
+            if neighbor in path:
+                continue
+            best[neighbor] = max(best.get(neighbor, 0.0), score * confidence)
+            walk(neighbor, score * confidence, depth + 1, path | {neighbor})
+    
+    walk(start, 1.0, 0, {start})
+    best.pop(start, None)
+    return best
+
+
+class FakeCursor:
+    """
+    Stand-in for an unbuffered mysql-connector cursor over canned result sets.
+    
+    Like the real one, close() raises while rows of the last query are unread.
+    """
+    
+    def __init__(self, conn: 'FakeConnection'):
+        self.conn = conn
+        self.rows = []
+    
+    def execute(self, query, params=()):
+        self.conn.queries.append(query)
+        self.conn.params.append(params)
+        self.rows = list(self.conn.results.pop(0)) if self.conn.results else []
+    
+    def executemany(self, query, rows):
+        self.conn.queries.append(query)
+        if self.conn.fail_writes or any(row[0] in self.conn.reject for row in rows):
+            raise mysql.connector.errors.DatabaseError(msg="Lock wait timeout exceeded", errno=1205)
+        self.conn.written.extend(rows)
+    
+    def fetchmany(self, size=1):
+        batch, self.rows = self.rows[:size], self.rows[size:]
+        return batch
+    
+    def fetchall(self):
+        return self.fetchmany(len(self.rows))
+    
+    def close(self):
+        if self.rows:
+            raise mysql.connector.errors.InternalError("Unread result found")
+
+
+class FakeConnection:
+    """
+    Stand-in for a (pooled) MySQL connection; records queries, writes and close().
+    
+    executemany() fails for every chunk with fail_writes, or for chunks
+    holding a row whose first column is in reject.
+    """
+    
+    def __init__(self, results=(), fail_writes: bool = False, reject=()):
+        self.results = [list(rows) for rows in results]
+        self.fail_writes = fail_writes
+        self.reject = set(reject)
+        self.queries = []
+        self.params = []
+        self.written = []
+        self.cursors = []
+        self.commits = 0
+        self.closed = False
+    
+    def cursor(self, **kwargs):
+        cursor = FakeCursor(self)
+        self.cursors.append(cursor)
+        return cursor
+    
+    def consume_results(self):
+        for cursor in self.cursors:
+            cursor.rows = []
+    
+    def commit(self):
+        self.commits += 1
+    
+    def rollback(self):
+        pass
+    
+    def close(self):
+        self.closed = True
+
+
+def node_row(node_id: str, node_type: str = 'ticket', **properties) -> Dict:
+    """A graph_nodes row as the dictionary cursor returns it."""
+    stamp = datetime(2024, 1, 1)
+    return {'node_id': node_id, 'node_type': node_type, 'properties': json.dumps(properties),
+            'created_at': stamp, 'updated_at': stamp}
+
+
+def edge_row(source_id: str, target_id: str, edge_type: str, confidence: float) -> Dict:
+    """A graph_edges row as the dictionary cursor returns it."""
+    return {'edge_id': None, 'source_id': source_id, 'target_id': target_id, 'edge_type': edge_type,
+            'confidence': confidence, 'properties': None, 'updated_at': datetime(2024, 1, 1)}
+
+
+def tombstone_row(tombstone_id: int, node_id: str = None, edge: tuple = (None, None, None)) -> Dict:
+    """A graph_tombstones row for a deleted node, or for a deleted (source, target, type) edge."""
+    source_id, target_id, edge_type = edge
+    return {'tombstone_id': tombstone_id, 'entity_type': 'node' if node_id else 'edge',
+            'node_id': node_id, 'source_id': source_id, 'target_id': target_id,
+            'edge_type': edge_type, 'deleted_at': datetime(2024, 1, 1)}
+
+
+def test_refresh_applies_deltas() -> None:
+    """
+    refresh() applies tombstones and upserts from stub rows, each tombstone
+    only once, and reconcile=True drops rows MySQL no longer has.
+    """
+    kg = KnowledgeGraph(get_db_config())
+    for node_id in ('ticket_a', 'ticket_b', 'ci_c'):
+        kg.add_node(node_id, node_id.split('_')[0], {}, persist=False)
+    kg.add_edge('ticket_a', 'ticket_b', 'SIMILAR_TO', confidence=0.9, persist=False)
+    kg.add_edge('ticket_b', 'ci_c', 'AFFECTS', confidence=0.9, persist=False)
+    kg._load_filters['min_confidence'] = 0.5
+    kg._loaded = True
+    kg._advance_high_water_mark(datetime(2024, 1, 1))
+    
+    # ci_c is deleted and re-created in the same second as the high-water mark
+    conn = FakeConnection([
+        [tombstone_row(7, node_id='ci_c'), tombstone_row(8, edge=('ticket_a', 'ticket_b', 'SIMILAR_TO'))],
+        [node_row('ci_c', 'ci', name='Printer'), node_row('ticket_d')],
+        [edge_row('ticket_a', 'ticket_d', 'AFFECTS', 0.7), edge_row('ticket_a', 'ci_c', 'AFFECTS', 0.2)],
+    ])
+    kg.connect_db = lambda: conn
+    counts = kg.refresh()
+    assert counts == {'nodes_updated': 2, 'edges_updated': 1, 'nodes_deleted': 1, 'edges_deleted': 1}, counts
+    assert 'deleted_at >= %s' in conn.queries[0] and kg._tombstone_mark == 8
+    assert dict(kg.graph.nodes['ci_c']['properties']) == {'name': 'Printer'}
+    assert sorted(kg.graph.edges(keys=True)) == [('ticket_a', 'ticket_d', 'AFFECTS')]
+    
+    conn = FakeConnection([[], [node_row('ci_c', 'ci', name='Printer')], []])
+    kg.connect_db = lambda: conn
+    counts = kg.refresh()
+    assert 'tombstone_id > %s' in conn.queries[0] and conn.params[0] == (8,)
+    assert counts['nodes_deleted'] == 0 and kg.graph.has_node('ci_c')
+    
+    kg._insert_edge('ticket_d', 'ghost', 'AFFECTS', 0.9, {})  # Endpoint outside the loaded rows
+    conn = FakeConnection([[], [], [],
+                           [{'node_id': node_id} for node_id in ('ticket_a', 'ci_c', 'ticket_d')],
+                           [{'source_id': 'ticket_d', 'target_id': 'ghost', 'edge_type': 'AFFECTS'}]])
+    kg.connect_db = lambda: conn
+    counts = kg.refresh(reconcile=True)
+    assert counts['nodes_deleted'] == 1 and counts['edges_deleted'] == 1, counts
+    assert sorted(kg.graph.nodes()) == ['ci_c', 'ghost', 'ticket_a', 'ticket_d']
+    assert sorted(kg.graph.edges(keys=True)) == [('ticket_d', 'ghost', 'AFFECTS')]
+    assert conn.closed
+
+
+def test_streaming_load_failure_returns_connection() -> None:
+    """
+    A load that fails mid-stream raises the original error and still closes
+    (returns to the pool) its connection, for every streaming loader.
+    """
+    rows = [node_row(f'n{i}') for i in range(10)]
+    
+    def stop(phase, loaded):
+        raise RuntimeError("progress callback failed")
+    
+    conn = FakeConnection([rows])
+    kg = KnowledgeGraph(get_db_config())
+    kg.connect_db = lambda: conn
+    try:
+        kg.load_from_db(batch_size=2, progress_callback=stop)
+        raise AssertionError("load_from_db() did not raise")
+    except RuntimeError:
+        pass
+    assert conn.closed
+    
+    # A bad row halfway through a refresh
+    conn = FakeConnection([[], rows[:3] + [{'node_id': 'broken'}] + rows[3:]])
+    kg._loaded = True
+    kg.connect_db = lambda: conn
+    try:
+        kg.refresh(batch_size=2)
+        raise AssertionError("refresh() did not raise")
+    except KeyError:
+        pass
+    assert conn.closed
+    
+    conn = FakeConnection([rows])
+    original_connect = KnowledgeGraph.connect_db
+    KnowledgeGraph.connect_db = lambda self: conn
+    try:
+        CompactKnowledgeGraph.from_db(get_db_config(), batch_size=2, progress_callback=stop)
+        raise AssertionError("CompactKnowledgeGraph.from_db() did not raise")
+    except RuntimeError:
+        pass
+    finally:
+        KnowledgeGraph.connect_db = original_connect
+    assert conn.closed
+
+
+def test_bulk_adds_serialize_only_when_persisting() -> None:
+    """add_nodes_bulk()/add_edges_bulk() JSON-encode properties only for rows they write."""
+    kg = KnowledgeGraph(get_db_config())
+    nodes = [(f'ticket_{i}', 'ticket', {'index': i}) for i in range(5)]
+    edges = [(f'ticket_{i}', f'ticket_{i + 1}', 'SIMILAR_TO', 0.5, {'rank': i}) for i in range(4)]
+    
+    def no_json(properties):
+        raise AssertionError("properties serialized without a write")
+    kg._properties_json = no_json
+    assert kg.add_nodes_bulk(nodes + nodes[:2], persist=False) == 5
+    assert kg.add_edges_bulk(edges, persist=False) == 4
+    assert kg.graph.number_of_nodes() == 5 and kg.graph.number_of_edges() == 4
+    
+    del kg._properties_json
+    conn = FakeConnection()
+    kg.connect_db = lambda: conn
+    kg.add_nodes_bulk(nodes[:1])
+    kg.add_edges_bulk(edges[:1])
+    assert conn.written == [('ticket_0', 'ticket', '{"index":0}'),
+                            ('ticket_0', 'ticket_1', 'SIMILAR_TO', 0.5, '{"rank":0}')]
+
+
+def test_lazy_mode_rejects_in_memory_methods() -> None:
+    """Methods without a lazy SQL path raise instead of answering from the empty graph."""
+    kg = KnowledgeGraph(get_db_config(), lazy=True)
+    calls = [
+        lambda: kg.find_paths('a', 'b'),
+        lambda: list(kg.find_best_paths('a', 'b')),
+        lambda: kg.traverse_ranked('a'),
+        lambda: kg.compute_centrality('a'),
+        lambda: kg.get_stats(),
+        lambda: kg.filter_nodes('ticket'),
+        lambda: kg.top_nodes('pagerank'),
+        lambda: kg.related_nodes('a'),
+        lambda: kg.detect_communities(persist=False),
+        lambda: kg.refresh(),
+    ]
+    for call in calls:
+        try:
+            call()
+            raise AssertionError("lazy mode call did not raise")
+        except RuntimeError as e:
+            assert 'lazy' in str(e)
+
+
+def test_detect_communities_replaces_labels_atomically() -> None:
+    """
+    detect_communities() refuses to rewrite the stored labels from a partial
+    graph, and only swaps the in-memory labels once the rewrite committed.
+    """
+    kg = build_random_graph()
+    for loaded, node_types in [(False, None), (True, ['ticket'])]:
+        kg._loaded = loaded
+        kg._load_filters['node_types'] = node_types
+        try:
+            kg.detect_communities()
+            raise AssertionError("detect_communities() persisted from a partial graph")
+        except RuntimeError:
+            pass
+    kg._load_filters['node_types'] = None
+    
+    conn = FakeConnection(fail_writes=True)
+    kg.connect_db = lambda: conn
+    try:
+        kg.detect_communities()
+        raise AssertionError("detect_communities() did not raise")
+    except mysql.connector.Error:
+        pass
+    assert kg.get_community('n0') is None and conn.commits == 0
+    
+    conn = FakeConnection()
+    count = kg.detect_communities()
+    assert conn.queries[0].startswith("DELETE FROM graph_communities") and conn.commits == 1
+    assert len(conn.written) == kg.graph.number_of_nodes()
+    assert len({row[1] for row in conn.written}) == count
+    assert all(kg.get_community(node_id) == community_id for node_id, community_id, _ in conn.written)
+
+
+def test_write_behind_coalesces_and_retries() -> None:
+    """
+    The write-behind queue keeps only the latest write per node/edge, hands
+    rows MySQL keeps rejecting to take_failed_writes(), and close() drains it.
+    """
+    conn = FakeConnection(reject={'ticket_bad'})
+    kg = KnowledgeGraph(get_db_config(), write_behind=True, flush_interval=5.0, write_retries=2)
+    kg.connect_db = lambda: conn
+    try:
+        kg.add_node('ticket_1', 'ticket', {'status': 'Open'})
+        kg.add_node('ticket_1', 'ticket', {'status': 'Closed'})
+        kg.add_node('ci_1', 'ci', {})
+        kg.add_edge('ticket_1', 'ci_1', 'AFFECTS', confidence=0.4)
+        kg.add_edge('ticket_1', 'ci_1', 'AFFECTS', confidence=0.8)
+        assert kg.flush(timeout=10)
+        assert sorted(conn.written) == [('ci_1', 'ci', '{}'), ('ticket_1', 'ci_1', 'AFFECTS', 0.8, None),
+                                        ('ticket_1', 'ticket', '{"status":"Closed"}')]
+        
+        # The first attempt fails as a whole; the last one goes row by row
+        conn.written.clear()
+        kg.write_retries, kg.flush_interval = 2, 0.01
+        kg.add_node('ticket_bad', 'ticket', {})
+        kg.add_node('ticket_2', 'ticket', {})
+        assert not kg.flush(timeout=10)
+        assert conn.written == [('ticket_2', 'ticket', '{}')]
+        failed = kg.take_failed_writes()
+        assert failed == {'nodes': {'ticket_bad': ('ticket_bad', 'ticket', '{}')}, 'edges': {}}
+        assert kg.take_failed_writes() == {'nodes': {}, 'edges': {}} and kg.flush(timeout=10)
+        
+        # close() writes what is still queued, returns the rejected rows and stops the thread
+        conn.written.clear()
+        kg.flush_interval = 5.0
+        kg.add_node('ticket_3', 'ticket', {})
+        kg.add_node('ticket_bad', 'ticket', {})
+        assert kg.close(timeout=10) == {'nodes': {'ticket_bad': ('ticket_bad', 'ticket', '{}')}, 'edges': {}}
+        assert conn.written == [('ticket_3', 'ticket', '{}')] and kg._writer is None
+        kg.add_node('ticket_4', 'ticket', {})  # Synchronous again
+        assert conn.written[-1] == ('ticket_4', 'ticket', '{}')
+    finally:
+        kg.close(timeout=10)
+
+
+def test_ranked_index_follows_edge_changes() -> None:
+    """
+    The confidence-sorted adjacency lists stay sorted and complete while edges
+    are updated and removed, and compute_centrality() thresholds agree with
+    CompactKnowledgeGraph.
+    """
+    rng = random.Random(1)
+    kg = build_random_graph()
+    for node_id in kg.graph.nodes():
+        kg.get_neighbors(node_id, direction='both', min_confidence=0.3)
+    ranked_lists = dict(kg._ranked_index)
+    assert ranked_lists
+    
+    edges = list(kg.graph.edges(keys=True))
+    for source, target, edge_type in rng.sample(edges, 60):
+        kg.add_edge(source, target, edge_type, confidence=round(rng.uniform(0.05, 1.0), 2), persist=False)
+    for _ in range(30):
+        source, target = rng.sample(list(kg.graph.nodes()), 2)
+        kg.add_edge(source, target, 'AFFECTS', confidence=round(rng.uniform(0.05, 1.0), 2), persist=False)
+    for source, target, edge_type in rng.sample(edges, 40):
+        kg._remove_edge(source, target, edge_type)
+    for node_id in ['n3', 'n17']:
+        kg._remove_node(node_id)
+    
+    for (direction, node_id, edge_type), ranked in kg._ranked_index.items():
+        adjacency = kg.graph.succ if direction == 'out' else kg.graph.pred
+        expected = sorted((-data[edge_type]['confidence'], neighbor)
+                          for neighbor, data in adjacency.get(node_id, {}).items() if edge_type in data)
+        assert ranked == expected, (direction, node_id, edge_type)
+        if (direction, node_id, edge_type) in ranked_lists:
+            assert ranked is ranked_lists[(direction, node_id, edge_type)]  # Updated in place
+    
+    compact = CompactKnowledgeGraph.from_knowledge_graph(kg)
+    for node_id in kg.graph.nodes():
+        for min_confidence in (0.0, 0.3, 0.75):
+            assert abs(compact.compute_centrality(node_id, min_confidence)
+                       - kg.compute_centrality(node_id, min_confidence)) < 1e-9, (node_id, min_confidence)
+
+
+def test_snapshot_round_trip() -> None:
+    """
+    load_snapshot() restores the nodes, edges, properties, high-water mark and
+    load filters written by save_snapshot(), without touching the database.
+    """
+    kg = build_random_graph()
+    kg.add_node('ticket_ü', 'ticket', {'title': 'Printer ✓ offline', 'tags': ['a', 'b'], 'priority': 2},
+                persist=False)
+    kg.add_node('ci_1', 'ci', {}, persist=False)
+    kg._insert_edge('ticket_ü', 'ci_1', 'AFFECTS', 0.375, {'source': 'manual'}, edge_id=42)
+    kg._insert_edge('ticket_ü', 'ci_1', 'SIMILAR_TO', 0.9, {})
+    kg._insert_edge('ci_1', 'orphan', 'AFFECTS', 0.5, {})  # Endpoint without a loaded row
+    kg._advance_high_water_mark(datetime(2024, 5, 6, 7, 8, 9))
+    kg._tombstone_mark = 17
+    kg._load_filters = {'node_types': None, 'min_confidence': 0.25, 'edge_types': ['AFFECTS', 'SIMILAR_TO']}
+    kg._loaded = True
+    
+    path = os.path.join(tempfile.mkdtemp(), 'graph.snapshot')
+    try:
+        kg.save_snapshot(path)
+        restored = KnowledgeGraph(get_db_config())
+        restored.connect_db = lambda: (_ for _ in ()).throw(AssertionError("snapshot load used the database"))
+        restored.load_snapshot(path, refresh=False)
+    finally:
+        shutil.rmtree(os.path.dirname(path))
+    
+    assert dict(restored.graph.nodes(data=True)) == dict(kg.graph.nodes(data=True))
+    assert sorted(restored.graph.edges(keys=True, data=True)) == sorted(kg.graph.edges(keys=True, data=True))
+    assert restored.get_edge('ticket_ü', 'ci_1', 'AFFECTS')['edge_id'] == 42
+    assert restored._high_water_mark == kg._high_water_mark and restored._tombstone_mark == 17
+    assert restored._load_filters == kg._load_filters and restored._loaded
+    assert restored.get_stats() == kg.get_stats()
+    assert restored.get_similar_nodes('ci_1') == kg.get_similar_nodes('ci_1')
+
+
+def test_traverse_ranked_scores() -> None:
+    """
+    traverse_ranked() must score every node with its best path within max_depth.
+    
+    Runs in memory only; no database needed.
+    """
+    kg = build_random_graph()
+    for start in kg.graph.nodes():
+        for max_depth, direction in [(1, 'out'), (2, 'both'), (3, 'out')]:
+            expected = best_path_scores(kg, start, max_depth, direction)
+            ranked = kg.traverse_ranked(start, max_depth=max_depth, direction=direction,
+                                        top_n=len(kg.graph), max_fan_out=None,
+                                        max_nodes=None, min_path_confidence=0.0)
+            actual = dict(ranked)
+            assert actual.keys() == expected.keys(), (start, max_depth, direction)
+            for node_id, score in expected.items():
+                assert abs(actual[node_id] - score) < 1e-9, (start, max_depth, direction, node_id)
+
+
 def main():
     """
     Main test function.
@@ -341,6 +792,26 @@ def main():
     print("KNOWLEDGE GRAPH TEST SUITE")
     print("=" * 70)
     
+    # In-memory checks (no database needed)
+    test_traverse_ranked_scores()
+    print("✅ traverse_ranked matches brute-force path scores")
+    test_streaming_load_failure_returns_connection()
+    print("✅ Failed streaming loads return their connection")
+    test_bulk_adds_serialize_only_when_persisting()
+    print("✅ Bulk adds serialize properties only when persisting")
+    test_lazy_mode_rejects_in_memory_methods()
+    print("✅ Lazy mode rejects methods that need the in-memory graph")
+    test_detect_communities_replaces_labels_atomically()
+    print("✅ detect_communities() replaces stored labels atomically")
+    test_write_behind_coalesces_and_retries()
+    print("✅ Write-behind coalesces, retries and drains on close")
+    test_ranked_index_follows_edge_changes()
+    print("✅ Confidence-sorted adjacency follows edge updates and removals")
+    test_refresh_applies_deltas()
+    print("✅ refresh() applies tombstones, upserts and reconciliation")
+    test_snapshot_round_trip()
+    print("✅ Snapshots round-trip nodes, edges and the high-water mark")
+    
     # Get database configuration
     db_config = get_db_config()
     
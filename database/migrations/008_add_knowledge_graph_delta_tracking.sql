@@ -0,0 +1,63 @@
+-- Knowledge Graph Delta Tracking Migration
+-- Adds what KnowledgeGraph.refresh() needs to pick up changes incrementally
+-- Part of RAG AI Local Implementation
+-- Requires: 007_create_knowledge_graph_schema.sql
+
+-- ============================================================================
+-- updated_at Indexes
+-- ============================================================================
+-- refresh() fetches rows WHERE updated_at >= <high-water mark>; without these
+-- indexes every refresh is a full table scan.
+
+ALTER TABLE graph_nodes ADD INDEX idx_updated_at (updated_at);
+ALTER TABLE graph_edges ADD INDEX idx_updated_at (updated_at);
+
+-- ============================================================================
+-- Graph Tombstones Table
+-- ============================================================================
+-- Records deleted nodes and edges so in-memory graphs can drop them without
+-- re-reading the full tables. Filled by the triggers below.
+--
+-- Note: MySQL does not fire triggers for ON DELETE CASCADE, so edges removed
+-- through a node delete are not recorded here. Removing the node from the
+-- in-memory graph drops its edges as well.
+
+CREATE TABLE IF NOT EXISTS graph_tombstones (
+    tombstone_id BIGINT AUTO_INCREMENT PRIMARY KEY COMMENT 'Auto-incrementing tombstone identifier',
+    entity_type ENUM('node', 'edge') NOT NULL COMMENT 'Kind of deleted entity',
+    node_id VARCHAR(255) DEFAULT NULL COMMENT 'Deleted node ID (entity_type = node)',
+    source_id VARCHAR(255) DEFAULT NULL COMMENT 'Source node ID of deleted edge (entity_type = edge)',
+    target_id VARCHAR(255) DEFAULT NULL COMMENT 'Target node ID of deleted edge (entity_type = edge)',
+    edge_type VARCHAR(50) DEFAULT NULL COMMENT 'Relationship type of deleted edge (entity_type = edge)',
+    deleted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT 'When the entity was deleted',
+    INDEX idx_deleted_at (deleted_at) COMMENT 'Fast lookup of deletions since a high-water mark'
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+COMMENT='Knowledge graph tombstones - deleted nodes and edges for incremental refresh';
+
+-- ============================================================================
+-- Tombstone Triggers
+-- ============================================================================
+
+DROP TRIGGER IF EXISTS trg_graph_nodes_tombstone;
+CREATE TRIGGER trg_graph_nodes_tombstone AFTER DELETE ON graph_nodes
+FOR EACH ROW
+    INSERT INTO graph_tombstones (entity_type, node_id) VALUES ('node', OLD.node_id);
+
+DROP TRIGGER IF EXISTS trg_graph_edges_tombstone;
+CREATE TRIGGER trg_graph_edges_tombstone AFTER DELETE ON graph_edges
+FOR EACH ROW
+    INSERT INTO graph_tombstones (entity_type, source_id, target_id, edge_type)
+    VALUES ('edge', OLD.source_id, OLD.target_id, OLD.edge_type);
+
+-- ============================================================================
+-- Maintenance
+-- ============================================================================
+-- Tombstones are only needed until every running graph has refreshed past
+-- them. Prune old entries periodically, e.g.:
+--
+-- DELETE FROM graph_tombstones WHERE deleted_at < NOW() - INTERVAL 7 DAY;
+-- ============================================================================
+
+-- Verification queries
+SELECT 'Knowledge graph delta tracking created successfully' AS status;
+SELECT COUNT(*) AS tombstone_count FROM graph_tombstones;
@@ -0,0 +1,28 @@
+-- Knowledge Graph Communities Migration
+-- Stores the cluster labels computed by KnowledgeGraph.detect_communities()
+-- Part of RAG AI Local Implementation
+-- Requires: 007_create_knowledge_graph_schema.sql
+
+-- ============================================================================
+-- Graph Communities Table
+-- ============================================================================
+-- One row per labelled node. A full detection run replaces all rows;
+-- KnowledgeGraph.assign_communities() adds rows for new nodes in between.
+-- KnowledgeGraph.load_communities() reads the labels back at startup so
+-- cluster lookups do not require re-running detection.
+
+CREATE TABLE IF NOT EXISTS graph_communities (
+    node_id VARCHAR(255) PRIMARY KEY COMMENT 'Labelled node ID',
+    community_id INT NOT NULL COMMENT 'Community label (0 = largest community of the last detection run)',
+    method VARCHAR(50) NOT NULL COMMENT 'How the label was assigned: louvain, label_propagation or neighbor_vote',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT 'Last update timestamp',
+
+    FOREIGN KEY (node_id) REFERENCES graph_nodes(node_id) ON DELETE CASCADE,
+
+    INDEX idx_community_id (community_id) COMMENT 'Fast lookup of community members'
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+COMMENT='Knowledge graph community labels - ticket clusters for problem management';
+
+-- Verification queries
+SELECT 'Knowledge graph communities table created successfully' AS status;
+SELECT COUNT(*) AS labelled_nodes, COUNT(DISTINCT community_id) AS communities FROM graph_communities;